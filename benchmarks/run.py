@@ -0,0 +1,365 @@
+"""
+Run the benchmark suite and report the results as JSON.
+
+Usage:
+
+    python -m benchmarks.run --file-count 20000 --output results.json
+    python -m benchmarks.run --compare results.json
+
+Every benchmark runs against the same deterministic synthetic repository, so
+results for two commits are comparable as long as the parameters match.
+"""
+import json
+import platform
+import shutil
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import click
+
+from benchmarks.synthetic_repo import (
+    MATCH_TOKEN,
+    SyntheticRepo,
+    SyntheticRepoParams,
+    generate_repo,
+)
+from gator.resources.build import build_changeset, build_gator_resource
+from gator.resources.changeset_cache import ChangesetCache
+from gator.resources.util import get_recursive_path_contents
+
+# format of the JSON report, bumped when it changes incompatibly
+REPORT_VERSION = 1
+# number of files created or removed by the file code change benchmarks
+FILE_CHANGE_COUNT = 100
+
+# prepares a working copy for one run; the returned callable is what gets timed
+Setup = Callable[[SyntheticRepo, Path], Callable[[], object]]
+
+
+def _in_place(timed: Callable[[Path], object]) -> Setup:
+    """Run against the generated repository itself, for benchmarks that only read."""
+    return lambda repo, workdir: lambda: timed(repo.path)
+
+
+def _on_copy(timed: Callable[[Path], object]) -> Setup:
+    """Run against a fresh copy of the repository, for benchmarks that write."""
+
+    def setup(repo: SyntheticRepo, workdir: Path) -> Callable[[], object]:
+        copy = workdir / "repo"
+        shutil.rmtree(copy, ignore_errors=True)
+        shutil.copytree(repo.path, copy)
+        return lambda: timed(copy)
+
+    return setup
+
+
+def _read_all_contents(repo_path: Path) -> int:
+    return sum(1 for _ in get_recursive_path_contents(repo_path))
+
+
+def _regex_filter(regex: str) -> Callable[[Path], object]:
+    regex_filter = build_gator_resource(
+        {
+            "kind": "RegexFilter",
+            "version": "v1alpha",
+            "spec": {"regex": regex, "paths": ["."]},
+        }
+    )
+    return regex_filter.matches  # type: ignore
+
+
+def _regex_replace(repo_path: Path) -> None:
+    build_gator_resource(
+        {
+            "kind": "RegexReplaceCodeChange",
+            "version": "v1alpha",
+            "spec": {
+                "replacement_details": [
+                    {
+                        "regex": MATCH_TOKEN,
+                        "replace_term": f"{MATCH_TOKEN}-replaced",
+                        "paths": ["."],
+                    }
+                ]
+            },
+        }
+    ).make_code_changes(  # type: ignore
+        repo_path
+    )
+
+
+def _new_file(repo_path: Path) -> None:
+    build_gator_resource(
+        {
+            "kind": "NewFileCodeChange",
+            "version": "v1alpha",
+            "spec": {
+                "files": [
+                    {"file_path": f"new/dir{i % 10}/file{i}.txt", "file_content": "new"}
+                    for i in range(FILE_CHANGE_COUNT)
+                ]
+            },
+        }
+    ).make_code_changes(  # type: ignore
+        repo_path
+    )
+
+
+def _remove_file(repo: SyntheticRepo) -> Callable[[Path], object]:
+    files = [
+        str(path.relative_to(repo.path))
+        for path in repo.files[:: max(1, len(repo.files) // FILE_CHANGE_COUNT)]
+    ][:FILE_CHANGE_COUNT]
+    code_change = build_gator_resource(
+        {"kind": "RemoveFileCodeChange", "version": "v1alpha", "spec": {"files": files}}
+    )
+    return code_change.make_code_changes  # type: ignore
+
+
+def _cached_changeset(spec: str) -> Setup:
+    """Build from the on-disk cache, filled by the warm-up run, in a new cache each run."""
+
+    def setup(repo: SyntheticRepo, workdir: Path) -> Callable[[], object]:
+        cache = ChangesetCache(workdir / "changesets")
+        return lambda: build_changeset(spec, cache)
+
+    return setup
+
+
+def _cli_startup() -> None:
+    subprocess.run(  # nosec
+        [sys.executable, "-m", "gator", "--help"], capture_output=True, check=True
+    )
+
+
+def large_changeset_spec(resource_count: int) -> str:
+    """
+    Render a changeset with `resource_count` filters and replacement details.
+
+    :param resource_count: Number of filters, and of replacement details.
+    """
+    filters = "".join(
+        f"""
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: 'package-{i}==(\\d+)\\.(\\d+)'
+        paths:
+          - requirements.txt
+          - app{i}/**/requirements*.txt"""
+        for i in range(resource_count)
+    )
+    details = "".join(
+        f"""
+          - regex: 'package-{i}==\\d+\\.\\d+'
+            replace_term: "package-{i}==2.0"
+            paths:
+              - requirements.txt
+              - ./app{i}/"""
+        for i in range(resource_count)
+    )
+    return f"""
+kind: Changeset
+version: v1alpha
+spec:
+  name: benchmark changeset
+  filters:{filters}
+  code_changes:
+    - kind: RegexReplaceCodeChange
+      version: v1alpha
+      spec:
+        replacement_details:{details}
+"""
+
+
+def build_benchmarks(repo: SyntheticRepo, spec_resources: int) -> Dict[str, Setup]:
+    """
+    Build the benchmarks to run against `repo`, by name.
+
+    :param repo: The synthetic repository.
+    :param spec_resources: Number of resources in the changeset parsed by `build_changeset`.
+    """
+    spec = large_changeset_spec(spec_resources)
+    return {
+        "get_recursive_path_contents": _in_place(_read_all_contents),
+        "regex_filter.no_match": _in_place(_regex_filter(r"absent-token-\d+")),
+        "regex_filter.match": _in_place(_regex_filter(MATCH_TOKEN)),
+        "regex_replace_code_change": _on_copy(_regex_replace),
+        "new_file_code_change": _on_copy(_new_file),
+        "remove_file_code_change": _on_copy(_remove_file(repo)),
+        "build_changeset": lambda repo, workdir: lambda: build_changeset(spec),
+        "build_changeset.cached": _cached_changeset(spec),
+        "cli_startup": lambda repo, workdir: _cli_startup,
+    }
+
+
+def time_benchmark(
+    setup: Setup, repo: SyntheticRepo, workdir: Path, repeat: int
+) -> List[float]:
+    """
+    Time `repeat` runs of a benchmark, after one untimed warm-up run.
+
+    :return: Wall clock seconds of each timed run.
+    """
+    timings = []
+    for run in range(repeat + 1):
+        timed = setup(repo, workdir)
+        start = time.perf_counter()
+        timed()
+        elapsed = time.perf_counter() - start
+        if run:
+            timings.append(elapsed)
+    return timings
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.mean(timings),
+        "max_s": max(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(  # nosec
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    params: SyntheticRepoParams,
+    repeat: int,
+    spec_resources: int,
+    selected: Optional[List[str]] = None,
+) -> Dict:
+    """
+    Generate the synthetic repository and run the selected benchmarks against it.
+
+    :param params: Shape of the synthetic repository.
+    :param repeat: Number of timed runs of each benchmark.
+    :param spec_resources: Number of resources in the changeset parsed by `build_changeset`.
+    :param selected: Names of the benchmarks to run, or None to run all of them.
+    :return: The JSON report.
+    """
+    with tempfile.TemporaryDirectory(prefix="gator-benchmark-") as temp_dir:
+        workdir = Path(temp_dir)
+        repo = generate_repo(workdir / "source", params)
+        benchmarks = build_benchmarks(repo, spec_resources)
+        results = {}
+        for name, setup in benchmarks.items():
+            if selected and name not in selected:
+                continue
+            results[name] = summarize(time_benchmark(setup, repo, workdir, repeat))
+
+    return {
+        "version": REPORT_VERSION,
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": json.loads(params.json()),
+        "repo": {
+            "files": len(repo.files),
+            "matching_files": len(repo.matching_files),
+            "total_bytes": repo.total_bytes,
+        },
+        "repeat": repeat,
+        "spec_resources": spec_resources,
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    Compare the median timings of two reports.
+
+    :param threshold: Relative slowdown, e.g. 0.1 for 10%, above which a benchmark regressed.
+    :return: The names of the benchmarks that regressed.
+    """
+    if baseline["params"] != current["params"]:
+        click.echo(
+            "Warning: the reports used different repository parameters", err=True
+        )
+
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before, after = baseline["results"][name]["median_s"], result["median_s"]
+        change = (after - before) / before if before else 0.0
+        regressed = change > threshold
+        click.echo(
+            f"{name:32} {before:10.4f}s -> {after:10.4f}s {change:+8.1%}"
+            + (" REGRESSED" if regressed else ""),
+            err=True,
+        )
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+@click.command()
+@click.option("--file-count", type=click.IntRange(min=0), default=2000)
+@click.option("--depth", type=click.IntRange(min=0), default=4)
+@click.option("--dirs-per-level", type=click.IntRange(min=1), default=4)
+@click.option("--median-file-bytes", type=click.IntRange(min=1), default=2048)
+@click.option("--file-bytes-sigma", type=click.FloatRange(min=0), default=1.0)
+@click.option("--binary-ratio", type=click.FloatRange(0, 1), default=0.05)
+@click.option("--match-density", type=click.FloatRange(0, 1), default=0.01)
+@click.option("--seed", type=int, default=0)
+@click.option("--repeat", type=click.IntRange(min=1), default=5)
+@click.option("--spec-resources", type=click.IntRange(min=1), default=500)
+@click.option(
+    "--benchmark", "selected", multiple=True, help="Only run the named benchmarks."
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False), help="Write the report to a file."
+)
+@click.option(
+    "--compare",
+    "baseline_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Report to compare against; exits non-zero if any benchmark regressed.",
+)
+@click.option("--threshold", type=click.FloatRange(min=0), default=0.1)
+def main(
+    repeat: int,
+    spec_resources: int,
+    selected: List[str],
+    output: Optional[str],
+    baseline_path: Optional[str],
+    threshold: float,
+    **params,
+):
+    report = run_suite(
+        SyntheticRepoParams(**params), repeat, spec_resources, list(selected) or None
+    )
+    rendered = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        Path(output).write_text(rendered + "\n")
+    else:
+        click.echo(rendered)
+
+    if baseline_path:
+        baseline = json.loads(Path(baseline_path).read_text())
+        if compare(baseline, report, threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,125 @@
+"""
+Generate deterministic synthetic repositories to benchmark against.
+
+The same parameters and seed always produce the same tree, byte for byte, so
+benchmark results from different commits are comparable.
+"""
+import math
+import random
+from pathlib import Path
+from typing import List
+
+from pydantic import BaseModel, confloat, conint
+
+# present in `match_density` of the text files, and nowhere else
+MATCH_TOKEN = "gator-benchmark-match"
+
+_WORDS = (
+    "import from def class return self value name path config version",
+    "requirements docker image registry service deploy build test app",
+)
+_VOCABULARY = " ".join(_WORDS).split()
+
+
+class SyntheticRepoParams(BaseModel):
+    """
+    Shape of a synthetic repository.
+
+    :param file_count: Number of files to create.
+    :param depth: Maximum directory depth below the repository root.
+    :param dirs_per_level: Number of subdirectories in each directory.
+    :param median_file_bytes: Median file size; sizes follow a log-normal distribution.
+    :param file_bytes_sigma: Spread of the log-normal size distribution.
+    :param binary_ratio: Fraction of files that are binary.
+    :param match_density: Fraction of text files that contain `MATCH_TOKEN`.
+    :param seed: Seed for the random number generator.
+    """
+
+    file_count: conint(ge=0) = 1000  # type: ignore
+    depth: conint(ge=0) = 4  # type: ignore
+    dirs_per_level: conint(ge=1) = 4  # type: ignore
+    median_file_bytes: conint(ge=1) = 2048  # type: ignore
+    file_bytes_sigma: confloat(ge=0) = 1.0  # type: ignore
+    binary_ratio: confloat(ge=0, le=1) = 0.05  # type: ignore
+    match_density: confloat(ge=0, le=1) = 0.01  # type: ignore
+    seed: int = 0
+
+
+class SyntheticRepo(BaseModel):
+    """A generated repository and what it contains."""
+
+    path: Path
+    params: SyntheticRepoParams
+    files: List[Path]
+    matching_files: List[Path]
+    total_bytes: int
+
+
+def _directories(params: SyntheticRepoParams) -> List[str]:
+    directories = [""]
+    level = [""]
+    for _ in range(params.depth):
+        level = [
+            f"{parent}dir{i}/" for parent in level for i in range(params.dirs_per_level)
+        ]
+        directories.extend(level)
+    return directories
+
+
+def _text(rng: random.Random, size: int, match: bool) -> bytes:
+    lines = []
+    length = 0
+    while length < size:
+        line = " ".join(rng.choice(_VOCABULARY) for _ in range(rng.randint(3, 12)))
+        lines.append(line)
+        length += len(line) + 1
+    if match:
+        lines.insert(rng.randrange(len(lines) + 1), f"uses: {MATCH_TOKEN}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def generate_repo(path: Path, params: SyntheticRepoParams) -> SyntheticRepo:
+    """
+    Generate a synthetic repository at `path`.
+
+    :param path: Directory to generate the repository in; created if missing.
+    :param params: Shape of the repository.
+    :return: The generated repository.
+    """
+    rng = random.Random(params.seed)
+    directories = _directories(params)
+    files: List[Path] = []
+    matching_files: List[Path] = []
+    total_bytes = 0
+
+    for i in range(params.file_count):
+        file_path = path / f"{rng.choice(directories)}file{i}"
+        size = max(
+            1,
+            int(
+                params.median_file_bytes
+                * math.exp(rng.gauss(0, 1) * params.file_bytes_sigma)
+            ),
+        )
+        if rng.random() < params.binary_ratio:
+            file_path = file_path.with_suffix(".bin")
+            content = b"\x00" + rng.getrandbits(8 * size).to_bytes(size, "little")
+        else:
+            file_path = file_path.with_suffix(".txt")
+            match = rng.random() < params.match_density
+            content = _text(rng, size, match)
+            if match:
+                matching_files.append(file_path)
+
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(content)
+        files.append(file_path)
+        total_bytes += len(content)
+
+    return SyntheticRepo(
+        path=path,
+        params=params,
+        files=files,
+        matching_files=matching_files,
+        total_bytes=total_bytes,
+    )
@@ -38,16 +38,16 @@ done
 pytest tests --cov-report html
 
 echo "Running MyPy..."
-mypy gator tests
+mypy gator tests benchmarks
 
 echo "Running black..."
-black ${BLACK_ACTION} gator tests
+black ${BLACK_ACTION} gator tests benchmarks
 
 echo "Running iSort..."
-isort ${ISORT_ACTION} gator tests
+isort ${ISORT_ACTION} gator tests benchmarks
 
 echo "Running flake8..."
-flake8 gator tests
+flake8 gator tests benchmarks
 
 echo "Running bandit..."
 bandit --ini .bandit --quiet -r gator
@@ -1,6 +1,36 @@
+import itertools
+import json
+import os
+import sys
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
 import click
 
-from gator.pre_process import preprocess_repository
+from gator import metrics
+from gator.constants import CLONED_REPOS_DIRECTORY, RUNS_DIRECTORY
+from gator.metrics import Metrics, MetricsFile, run_report
+
+# Commands import what they use when they run, so that starting the CLI, e.g. for
+# `--help` or `process`, does not import git, the GitHub client or every resource.
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.journal import RunJournal
+    from gator.pipeline import Pipeline, RepositoryTarget
+    from gator.pre_process import CloneStrategy
+    from gator.resources.changeset_cache import ChangesetCache
+    from gator.resources.plan import ChangesetPlan
+    from gator.sources import GitHubClient, RepositorySource
 
 
 @click.group()
@@ -8,28 +38,492 @@ def cli():
     pass
 
 
+CLONE_STRATEGIES = ("shallow", "blobless", "sparse")
+
+
+def _clone_strategy(
+    plans: List["ChangesetPlan"], clone_strategies: Tuple[str, ...]
+) -> "CloneStrategy":
+    from gator.pre_process import CloneStrategy, sparse_checkout_cone
+    from gator.resources.patterns import normalize_spec_paths
+
+    sparse_directories = None
+    if "sparse" in clone_strategies:
+        cones = [sparse_checkout_cone(plan) for plan in plans]
+        if any(cone is None for cone in cones):
+            click.echo(
+                "Warning: a changeset may touch any path, checking out whole trees",
+                err=True,
+            )
+        else:
+            sparse_directories = normalize_spec_paths(
+                [directory for cone in cones for directory in cone or ()],
+                drop_nested=True,
+            )
+    return CloneStrategy(
+        shallow="shallow" in clone_strategies,
+        blobless="blobless" in clone_strategies,
+        sparse_directories=sparse_directories,
+    )
+
+
+def _changeset_cache(directory: Optional[str]) -> Optional["ChangesetCache"]:
+    from gator.resources.changeset_cache import ChangesetCache
+
+    return ChangesetCache(directory) if directory else None
+
+
+@contextmanager
+def _changeset_errors(path: str, param_hint: str) -> Iterator[None]:
+    """Report a changeset that could not be built as a bad parameter."""
+    from gator.exceptions import InvalidSpecificationError
+
+    try:
+        yield
+    except InvalidSpecificationError as e:
+        # the validation or yaml error, when there is one, tells what is wrong
+        raise click.BadParameter(
+            f"{path} is not a valid changeset:\n{e.__cause__ or e}",
+            param_hint=param_hint,
+        ) from e
+
+
+def _build_plans(
+    changeset_paths: Tuple[str, ...], changeset_cache_dir: Optional[str]
+) -> List["ChangesetPlan"]:
+    from gator.resources.build import build_changeset_plans
+
+    changeset_cache = _changeset_cache(changeset_cache_dir)
+    plans = []
+    for path in changeset_paths:
+        with _changeset_errors(path, "CHANGESET_PATHS"):
+            plans.extend(build_changeset_plans(Path(path).read_text(), changeset_cache))
+    return plans
+
+
+def _open_journal(
+    plans: List["ChangesetPlan"],
+    journal_dir: str,
+    resume_run_id: Optional[str],
+    dry_run: bool,
+) -> Optional["RunJournal"]:
+    """Start or resume the journal of a run; dry runs are not journaled."""
+    from gator.journal import RunJournal, RunJournalError
+
+    if dry_run:
+        if resume_run_id:
+            raise click.UsageError("Dry runs are not journaled, and cannot be resumed")
+        return None
+    try:
+        if resume_run_id:
+            journal = RunJournal.resume(journal_dir, resume_run_id, plans)
+        else:
+            journal = RunJournal.create(journal_dir, plans)
+    except RunJournalError as e:
+        raise click.UsageError(str(e))
+    click.echo(
+        f"Run {journal.run_id}; continue it with --resume {journal.run_id}", err=True
+    )
+    return journal
+
+
+def _run_metrics(pipeline: "Pipeline") -> Metrics:
+    """Return the metrics of every repository, and of the work not done for any."""
+    run_metrics = Metrics()
+    run_metrics.merge(pipeline.metrics.samples())
+    run_metrics.merge(metrics.UNATTRIBUTED.samples())
+    return run_metrics
+
+
+def _echo_results(
+    pipeline: "Pipeline",
+    targets: Iterable["RepositoryTarget"],
+    dry_run: bool,
+    metrics_file: Optional[MetricsFile],
+) -> Dict[str, Any]:
+    """
+    Run the pipeline, echoing each result as it comes.
+
+    :return: The status of every repository, by name; for runs of several changesets,
+        the status of each of its changesets, by changeset name.
+    """
+    several = len(pipeline.plans) > 1
+    statuses: Dict[str, Any] = {}
+    for result in pipeline.run(targets):
+        name = result.target.name
+        if several:
+            name += f" [{result.changeset}]"
+        message = f"{name}: {result.status.value}"
+        if result.error:
+            message += f" ({result.error})"
+        click.echo(message, err=dry_run)
+        if result.diff:
+            click.echo(result.diff, nl=False)
+        if several:
+            statuses.setdefault(result.target.name, {})[
+                result.changeset
+            ] = result.status.value
+        else:
+            statuses[result.target.name] = result.status.value
+        if metrics_file is not None:
+            metrics_file.update(_run_metrics(pipeline))
+    if metrics_file is not None:
+        metrics_file.update(_run_metrics(pipeline), force=True)
+    return statuses
+
+
+def _any_failed(statuses: Dict[str, Any]) -> bool:
+    """Whether any repository, or any changeset of one, failed, see `_echo_results`."""
+    from gator.pipeline import RepositoryStatus
+
+    return any(
+        RepositoryStatus.FAILED.value
+        in (status.values() if isinstance(status, dict) else [status])
+        for status in statuses.values()
+    )
+
+
+def _repository_sources(
+    github: "GitHubClient",
+    repositories: Tuple[str, ...],
+    repositories_file: Optional[TextIO],
+    github_orgs: Tuple[str, ...],
+    github_topics: Tuple[str, ...],
+) -> List["RepositorySource"]:
+    from gator.sources import (
+        GitHubOrgRepositories,
+        GitHubSearchRepositories,
+        ListedRepositories,
+    )
+
+    sources: List["RepositorySource"] = []
+    if repositories or repositories_file is not None:
+        lines = itertools.chain(repositories, repositories_file or ())
+        sources.append(
+            ListedRepositories(
+                lines, github.github_username, github.github_token, github.github_domain
+            )
+        )
+    sources.extend(
+        GitHubOrgRepositories(github, org, github_topics) for org in github_orgs
+    )
+    if github_topics and not github_orgs:
+        query = " ".join(f"topic:{topic}" for topic in github_topics)
+        sources.append(GitHubSearchRepositories(github, query))
+    return sources
+
+
 @cli.command()
+@click.argument(
+    "changeset_paths",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "--repository",
+    "repositories",
+    multiple=True,
+    help="Repository to run against, as org/name or a clone URL. Repeatable.",
+)
+@click.option(
+    "--repositories",
+    "repositories_file",
+    type=click.File("r"),
+    help="File listing repositories, one per line; `-` reads from stdin.",
+)
+@click.option(
+    "--github-org",
+    "github_orgs",
+    multiple=True,
+    help="Run against every repository of this GitHub organization. Repeatable.",
+)
+@click.option(
+    "--github-topic",
+    "github_topics",
+    multiple=True,
+    help="Only run against --github-org repositories with this topic, or, without "
+    "--github-org, against every repository with it. Repeatable.",
+)
+@click.option(
+    "--github-search",
+    "github_searches",
+    multiple=True,
+    help="Run against the results of a GitHub repository search, e.g. "
+    "'org:some-org language:python'. Repeatable.",
+)
+@click.option(
+    "--github-cache",
+    "github_cache_dir",
+    type=click.Path(file_okay=False),
+    envvar="GATOR_GITHUB_CACHE",
+    help="Keep GitHub listings in this directory, and revalidate them with "
+    "conditional requests on later runs.",
+)
 @click.option("--github-username", envvar="GATOR_GITHUB_USERNAME")
 @click.option("--github-token", envvar="GATOR_GITHUB_TOKEN")
 @click.option("--github-domain", envvar="GATOR_GITHUB_DOMAIN")
-@click.option("--repository")
+@click.option(
+    "--clone-dir", type=click.Path(file_okay=False), default=CLONED_REPOS_DIRECTORY
+)
+@click.option("--clone-workers", type=click.IntRange(min=1), default=8)
+@click.option(
+    "--process-workers", type=click.IntRange(min=1), default=os.cpu_count() or 1
+)
+@click.option("--post-process-workers", type=click.IntRange(min=1), default=4)
+@click.option(
+    "--threads", is_flag=True, help="Process repositories on threads, not processes."
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Print the changes as unified diffs, without modifying clones or pushing.",
+)
+@click.option(
+    "--branch",
+    help="Branch to push changes to; by default named after the changeset. Only "
+    "for a single changeset.",
+)
+@click.option(
+    "--clone-strategy",
+    "clone_strategies",
+    type=click.Choice(CLONE_STRATEGIES),
+    multiple=True,
+    help="Clone less of each repository: only the latest commit (shallow), file "
+    "contents on demand (blobless), or only the directories the changeset's paths "
+    "need (sparse). Repeatable, to combine strategies.",
+)
+@click.option(
+    "--mirror-cache",
+    "mirror_cache_dir",
+    type=click.Path(file_okay=False),
+    envvar="GATOR_MIRROR_CACHE",
+    help="Keep bare mirrors of repositories in this directory, update them "
+    "incrementally, and check each run out from them instead of cloning.",
+)
+@click.option(
+    "--mirror-cache-gb",
+    type=click.FloatRange(min=0),
+    help="Disk budget of the mirror cache; least recently used mirrors are evicted.",
+)
+@click.option(
+    "--filter-cache",
+    "filter_store_path",
+    type=click.Path(dir_okay=False),
+    envvar="GATOR_FILTER_CACHE",
+    help="SQLite file of filter results from previous runs; only files changed "
+    "since are re-scanned.",
+)
+@click.option(
+    "--changeset-cache",
+    "changeset_cache_dir",
+    type=click.Path(file_okay=False),
+    envvar="GATOR_CHANGESET_CACHE",
+    help="Directory of validated changesets, reused while their spec is unchanged.",
+)
+@click.option(
+    "--journal-dir",
+    type=click.Path(file_okay=False),
+    default=RUNS_DIRECTORY,
+    envvar="GATOR_JOURNAL_DIR",
+    help="Directory of run journals, which record each repository's progress.",
+)
+@click.option(
+    "--resume",
+    "resume_run_id",
+    help="Continue an interrupted run, skipping the repositories it completed. "
+    "Takes the same changeset and repositories as the interrupted run.",
+)
+@click.option(
+    "--metrics-file",
+    "metrics_path",
+    type=click.Path(dir_okay=False),
+    help="Keep the run's metrics in this file, in the OpenMetrics text format, "
+    "updated as repositories complete.",
+)
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False),
+    help="Write a JSON summary of the run's metrics to this file once it completes.",
+)
+@click.option(
+    "--profile",
+    "profile_dir",
+    type=click.Path(file_okay=False),
+    help="Profile every filter and code change run, per repository, into this "
+    "directory: cProfile files, and their timings and peak memory in profiles.jsonl.",
+)
 def run(
-    github_username: str,
-    github_token: str,
-    github_domain: str,
-    repository: str,
+    changeset_paths: Tuple[str, ...],
+    repositories: Tuple[str, ...],
+    repositories_file: Optional[TextIO],
+    github_orgs: Tuple[str, ...],
+    github_topics: Tuple[str, ...],
+    github_searches: Tuple[str, ...],
+    github_cache_dir: Optional[str],
+    github_username: Optional[str],
+    github_token: Optional[str],
+    github_domain: Optional[str],
+    clone_dir: str,
+    clone_workers: int,
+    process_workers: int,
+    post_process_workers: int,
+    threads: bool,
+    dry_run: bool,
+    branch: Optional[str],
+    clone_strategies: Tuple[str, ...],
+    mirror_cache_dir: Optional[str],
+    mirror_cache_gb: Optional[float],
+    filter_store_path: Optional[str],
+    changeset_cache_dir: Optional[str],
+    journal_dir: str,
+    resume_run_id: Optional[str],
+    metrics_path: Optional[str],
+    report_path: Optional[str],
+    profile_dir: Optional[str],
 ):
-    click.echo(f"Running Gator on {repository}...")
+    """
+    Run changesets against many repositories.
 
-    preprocess_repository(
-        github_username,
+    Every file may hold several changesets, as YAML documents. Changesets run together
+    share a single clone of each repository, and push to a branch each.
+    """
+    from gator.hooks import Profiler, register_resource_hook
+    from gator.pipeline import Pipeline, PipelineConfig
+    from gator.post_process import PullRequestOpener
+    from gator.rate_limit import RateLimiter
+    from gator.sources import (
+        GitHubClient,
+        GitHubSearchRepositories,
+        ResponseCache,
+        iter_targets,
+    )
+
+    rate_limiter = RateLimiter()
+    github = GitHubClient(
         github_token,
-        repository.split("/")[0],
-        repository.split("/")[1],
         github_domain,
+        github_username,
+        cache=ResponseCache(github_cache_dir) if github_cache_dir else None,
+        rate_limiter=rate_limiter,
     )
+    sources = _repository_sources(
+        github, repositories, repositories_file, github_orgs, github_topics
+    )
+    sources.extend(GitHubSearchRepositories(github, q) for q in github_searches)
+    if not sources:
+        raise click.UsageError(
+            "Provide --repository, --repositories, --github-org, --github-topic or "
+            "--github-search"
+        )
+
+    plans = _build_plans(changeset_paths, changeset_cache_dir)
+    config = PipelineConfig(
+        clone_dir=Path(clone_dir),
+        clone_workers=clone_workers,
+        process_workers=process_workers,
+        post_process_workers=post_process_workers,
+        use_processes=not threads,
+        dry_run=dry_run,
+        branch_name=branch,
+        clone_strategy=_clone_strategy(plans, clone_strategies),
+        mirror_cache_dir=mirror_cache_dir,
+        mirror_cache_bytes=None
+        if mirror_cache_gb is None
+        else int(mirror_cache_gb * 1e9),
+        filter_store_path=filter_store_path,
+    )
+    pull_requests = None
+    if github_token and not dry_run:
+        pull_requests = PullRequestOpener(github_token, github_domain, rate_limiter)
+
+    try:
+        pipeline = Pipeline(plans, config, pull_requests)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    journal = _open_journal(plans, journal_dir, resume_run_id, dry_run)
+    pipeline.journal = journal
+    if profile_dir:
+        register_resource_hook(Profiler(profile_dir))
+    metrics_file = MetricsFile(metrics_path) if metrics_path else None
+    with journal or nullcontext():
+        statuses = _echo_results(pipeline, iter_targets(sources), dry_run, metrics_file)
+
+    if report_path:
+        report = run_report(_run_metrics(pipeline), statuses)
+        Path(report_path).write_text(json.dumps(report, indent=2) + "\n")
+    if _any_failed(statuses):
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument("changeset_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("repo_path", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Print the changes as a unified diff instead of writing them.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of workers to process the repository's files on.",
+)
+@click.option(
+    "--filter-cache",
+    "filter_store_path",
+    type=click.Path(dir_okay=False),
+    envvar="GATOR_FILTER_CACHE",
+    help="SQLite file of filter results from previous runs; only files changed "
+    "since are re-scanned.",
+)
+@click.option(
+    "--changeset-cache",
+    "changeset_cache_dir",
+    type=click.Path(file_okay=False),
+    envvar="GATOR_CHANGESET_CACHE",
+    help="Directory of validated changesets, reused while their spec is unchanged.",
+)
+def process(
+    changeset_path: str,
+    repo_path: str,
+    dry_run: bool,
+    workers: int,
+    filter_store_path: Optional[str],
+    changeset_cache_dir: Optional[str],
+):
+    """Apply a changeset to a local checkout of a repository."""
+    from gator.process import preview_repository, process_repository
+    from gator.resources.build import build_changeset
+
+    with _changeset_errors(changeset_path, "CHANGESET_PATH"):
+        changeset = build_changeset(
+            Path(changeset_path).read_text(), _changeset_cache(changeset_cache_dir)
+        )
+    filter_store = None
+    if filter_store_path:
+        from gator.resources.filters.store import FilterResultStore
+
+        filter_store = FilterResultStore(filter_store_path)
+
+    if dry_run:
+        diff = preview_repository(
+            changeset, Path(repo_path), workers=workers, filter_store=filter_store
+        )
+        if diff is None:
+            click.echo("Filters did not match, no changes.", err=True)
+        else:
+            click.echo(diff, nl=False)
+        return
 
-    click.echo("Done.")
+    if process_repository(
+        changeset, Path(repo_path), workers=workers, filter_store=filter_store
+    ):
+        click.echo("Done.")
+    else:
+        click.echo("Filters did not match, no changes.")
 
 
 if __name__ == "__main__":  # pragma: no cover
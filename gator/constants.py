@@ -3,3 +3,20 @@ import re
 DEFAULT_REGEX_MODES = re.MULTILINE
 GIT_INTERNALS_DIRECTORY = ".git"
 VERSION_V1_ALPHA = "v1alpha"
+DEFAULT_CONTENT_CACHE_BYTES = 64 * 1024 * 1024
+BINARY_SNIFF_BYTES = 8 * 1024
+MMAP_THRESHOLD_BYTES = 1024 * 1024
+IGNORE_FILE_NAMES = (".gitignore", ".gatorignore")
+MIN_PREFILTER_LITERAL_LENGTH = 2
+DEFAULT_PARALLEL_CHUNK_SIZE = 256
+CLONED_REPOS_DIRECTORY = "cloned_repos"
+CHECKOUTS_DIRECTORY = "checkouts"
+RUNS_DIRECTORY = "gator_runs"
+# stages of the pipeline
+PRE_PROCESS = "pre-process"
+PROCESS = "process"
+POST_PROCESS = "post-process"
+# estimated cost of evaluating a filter against a repository, in arbitrary units
+STAT_FILTER_COST = 1.0
+LISTING_FILTER_COST = 5.0
+CONTENT_FILTER_COST = 100.0
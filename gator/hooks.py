@@ -0,0 +1,224 @@
+"""
+Observe every resource Gator runs.
+
+A `ResourceHook` is called before and after every `FilterResource.matches`,
+`FilterResource.matches_tree` and `CodeChangeResource.make_code_changes`, including
+those of custom resources, with the resource kind, the repository, and how long the
+call took. Built-in regex filters are evaluated in a single fused pass, which hooks
+see as one call carrying all of them.
+
+Hooks are registered per process, with `register_resource_hook`; the pipeline
+registers the hooks of the parent process in each of its process stage workers,
+so hooks must be picklable to be used with them.
+
+`Profiler` is a hook that profiles every call with cProfile, and records the peak
+memory allocated during it with tracemalloc.
+"""
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from gator import metrics
+from gator.resources.models import GatorResource
+
+MATCHES = "matches"
+MATCHES_TREE = "matches_tree"
+MAKE_CODE_CHANGES = "make_code_changes"
+
+PROFILE_SUFFIX = ".prof"
+PROFILE_SUMMARY = "profiles.jsonl"
+
+
+class ResourceCall(NamedTuple):
+    """
+    A resource about to run against a repository.
+
+    :param kind: Kind of the resource, e.g. `RegexFilter`.
+    :param version: Version of the resource kind, e.g. `v1alpha`.
+    :param operation: The method called, one of `MATCHES`, `MATCHES_TREE` and
+        `MAKE_CODE_CHANGES`.
+    :param repo_path: The repository content, or its mirror for `MATCHES_TREE`.
+    :param resources: The resources run, more than one for fused regex filters.
+    """
+
+    kind: str
+    version: str
+    operation: str
+    repo_path: Path
+    resources: Tuple[GatorResource, ...]
+
+
+class ResourceTiming(NamedTuple):
+    """
+    How a resource call went.
+
+    :param wall_seconds: Wall time of the call.
+    :param cpu_seconds: CPU time of the calling thread during the call.
+    :param error: What the call raised, if it did.
+    """
+
+    wall_seconds: float
+    cpu_seconds: float
+    error: Optional[BaseException] = None
+
+
+class ResourceHook:
+    """Called around every resource call; override either method."""
+
+    def before(self, call: ResourceCall) -> None:
+        """Called right before the resource runs."""
+
+    def after(self, call: ResourceCall, timing: ResourceTiming) -> None:
+        """Called right after the resource ran, whether or not it raised."""
+
+
+_HOOKS: List[ResourceHook] = []
+
+
+def register_resource_hook(hook: ResourceHook) -> None:
+    """Call `hook` around every resource call in this process."""
+    if hook not in _HOOKS:
+        _HOOKS.append(hook)
+
+
+def unregister_resource_hook(hook: ResourceHook) -> None:
+    """Stop calling `hook`, if it was registered."""
+    if hook in _HOOKS:
+        _HOOKS.remove(hook)
+
+
+def registered_resource_hooks() -> List[ResourceHook]:
+    """Return the hooks registered in this process, in the order they are called."""
+    return list(_HOOKS)
+
+
+@contextmanager
+def observed(
+    resources: Sequence[GatorResource], operation: str, repo_path: Path
+) -> Iterator[None]:
+    """
+    Run resources within the context, calling the registered hooks around it.
+
+    Also records the time spent in the `resource_seconds` and `resource_cpu_seconds`
+    metrics, labelled with the class of the resource.
+    :param resources: The resources run, all of the same class.
+    :param operation: The method called, e.g. `MATCHES`.
+    :param repo_path: The repository the resources run against.
+    """
+    resource = resources[0]
+    call = ResourceCall(
+        resource.kind,  # type: ignore
+        resource.version,  # type: ignore
+        operation,
+        repo_path,
+        tuple(resources),
+    )
+    hooks = list(_HOOKS)
+    for hook in hooks:
+        hook.before(call)
+    error = None
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        timing = ResourceTiming(
+            time.perf_counter() - wall, time.thread_time() - cpu, error
+        )
+        name = type(resource).__name__
+        metrics.add("resource_seconds", timing.wall_seconds, resource=name)
+        metrics.add("resource_cpu_seconds", timing.cpu_seconds, resource=name)
+        for hook in reversed(hooks):
+            hook.after(call, timing)
+
+
+class Profiler(ResourceHook):
+    """
+    Profile every resource call, one cProfile file per call.
+
+    Profiles are written to `<directory>/<repository>/`, and can be loaded with
+    `pstats` or viewers such as snakeviz. Every call is also summarised as a line of
+    `profiles.jsonl`, with its timings and the peak memory allocated during it.
+    Peak memory is tracked per process, so it is only accurate when repositories are
+    processed on processes rather than threads.
+    :param directory: Where to write the profiles.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # the calls in progress stay with the process that made them
+        return {"directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"])
+
+    def before(self, call: ResourceCall) -> None:
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        if depth:
+            # resources run by other resources are part of the outer profile
+            return
+        _reset_peak_memory()
+        profile = cProfile.Profile()
+        self._local.profile = profile
+        profile.enable()
+
+    def after(self, call: ResourceCall, timing: ResourceTiming) -> None:
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        profile = self._local.profile
+        profile.disable()
+        _, peak_memory = tracemalloc.get_traced_memory()
+
+        repository = _slug(f"{call.repo_path.parent.name}-{call.repo_path.name}")
+        directory = self.directory / repository
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / (
+            f"{time.time_ns()}-{os.getpid()}-{call.kind}-{call.operation}"
+            f"{PROFILE_SUFFIX}"
+        )
+        profile.dump_stats(path)
+        summary = {
+            "repository": str(call.repo_path),
+            "kind": call.kind,
+            "version": call.version,
+            "operation": call.operation,
+            "wall_seconds": timing.wall_seconds,
+            "cpu_seconds": timing.cpu_seconds,
+            "peak_memory_bytes": peak_memory,
+            "failed": timing.error is not None,
+            "profile": str(path.relative_to(self.directory)),
+        }
+        # a single append of a short line, so that processes do not interleave
+        with open(self.directory / PROFILE_SUMMARY, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+
+
+def _reset_peak_memory() -> None:
+    """Start tracing memory allocations, or track their peak anew."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:  # Python < 3.9
+        # the peak then only counts memory allocated after the restart
+        tracemalloc.stop()
+        tracemalloc.start()
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", name).strip("-") or "repository"
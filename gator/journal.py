@@ -0,0 +1,206 @@
+"""
+Record the progress of a run, so that an interrupted run can be resumed.
+
+A `RunJournal` is an append-only file of JSON lines. The first line identifies the
+run and the changeset plans it runs; every other line records a stage a repository
+completed, per changeset for runs of several changesets. Each record is a single
+buffered write, flushed as soon as it is complete, so the journal survives the
+process being killed; if the machine goes down, at worst the last records are lost,
+and that work is redone. A record cut short by a crash is ignored when the journal
+is read back.
+
+Resuming a run skips the repositories, or changesets of a repository, the journal
+shows as done, and only opens the pull requests of those pushed without one. Any
+other repository is run again from the start: clones are updated in place, so that
+is cheap.
+"""
+import json
+import os
+import secrets
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+from gator.exceptions import GatorError
+from gator.resources.plan import ChangesetPlan, fingerprint_plans
+
+JOURNAL_SUFFIX = ".jsonl"
+
+
+class RunJournalError(GatorError):
+    """The run journal could not be resumed."""
+
+
+class JournalStage(str, Enum):
+    CLONED = "cloned"
+    FILTERED_OUT = "filtered-out"
+    UNCHANGED = "unchanged"
+    CHANGED = "changed"
+    # changes are committed and pushed in one step; the local branch is not kept
+    PUSHED = "pushed"
+    PULL_REQUEST_OPENED = "pull-request-opened"
+    FAILED = "failed"
+
+
+# (repository, changeset) of an entry
+_EntryKey = Tuple[str, Optional[str]]
+
+
+def _plans(
+    plans: Union[ChangesetPlan, Sequence[ChangesetPlan]]
+) -> Sequence[ChangesetPlan]:
+    return [plans] if isinstance(plans, ChangesetPlan) else plans
+
+
+class RunJournal:
+    """
+    Append-only record of the stages each repository of a run completed.
+
+    Safe to share between threads. Use `create` to start a run, and `resume` to
+    continue one.
+    :param path: The journal file.
+    :param run_id: Identifies the run.
+    :param plan_fingerprint: Identifies the changeset plans of the run, see
+        `fingerprint_plans`.
+    :param entries: The last record of each repository, by name and changeset.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        run_id: str,
+        plan_fingerprint: str,
+        entries: Optional[Dict[_EntryKey, Dict[str, Any]]] = None,
+    ):
+        self.path = Path(path)
+        self.run_id = run_id
+        self.plan_fingerprint = plan_fingerprint
+        self._entries: Dict[_EntryKey, Dict[str, Any]] = entries or {}
+        self._lock = threading.Lock()
+        # line buffered, so that every record is flushed as a single write
+        self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+
+    @classmethod
+    def create(
+        cls,
+        directory: Union[str, Path],
+        plans: Union[ChangesetPlan, Sequence[ChangesetPlan]],
+    ) -> "RunJournal":
+        """
+        Start the journal of a new run.
+
+        :param directory: Where journals are kept, one file per run.
+        :param plans: The changeset plan of the run, or the plans of every changeset it runs.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        journal = cls(
+            directory / f"{run_id}{JOURNAL_SUFFIX}",
+            run_id,
+            fingerprint_plans(_plans(plans)),
+        )
+        journal._write({"run_id": run_id, "plan": journal.plan_fingerprint})
+        return journal
+
+    @classmethod
+    def resume(
+        cls,
+        directory: Union[str, Path],
+        run_id: str,
+        plans: Union[ChangesetPlan, Sequence[ChangesetPlan]],
+    ) -> "RunJournal":
+        """
+        Continue the journal of an earlier run.
+
+        :param directory: Where journals are kept, one file per run.
+        :param run_id: The run to continue.
+        :param plans: The changeset plans of the run; they must be the ones the run
+            started with, in the same order.
+        :raises RunJournalError: There is no such run, or it ran other changesets.
+        """
+        path = Path(directory) / f"{run_id}{JOURNAL_SUFFIX}"
+        try:
+            content = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            raise RunJournalError(f"No journal of run {run_id} in {directory}")
+
+        lines = content.splitlines()
+        header = _parse(lines[0]) if lines else None
+        if header is None or "plan" not in header:
+            raise RunJournalError(f"The journal of run {run_id} is corrupt")
+        if header["plan"] != fingerprint_plans(_plans(plans)):
+            raise RunJournalError(
+                f"Run {run_id} ran a different changeset, it cannot be resumed"
+            )
+        entries = {}
+        for line in lines[1:]:
+            record = _parse(line)
+            if record is not None and "repository" in record:
+                entries[(record["repository"], record.get("changeset"))] = record
+
+        journal = cls(path, run_id, header["plan"], entries)
+        if content and not content.endswith("\n"):
+            # finish the record cut short, so that it does not swallow the next one
+            journal._file.write("\n")
+        return journal
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def record(
+        self,
+        repository: str,
+        stage: JournalStage,
+        changeset: Optional[str] = None,
+        **details: Any,
+    ) -> None:
+        """
+        Record that a repository completed a stage.
+
+        :param repository: Name of the repository, see `RepositoryTarget.name`.
+        :param stage: The stage completed.
+        :param changeset: Name of the changeset the stage was completed for, in runs
+            of several changesets.
+        :param details: JSON serializable information to resume from, e.g. the branch
+            a pull request is to be opened against.
+        """
+        entry = {"repository": repository, "stage": stage.value, **details}
+        if changeset is not None:
+            entry["changeset"] = changeset
+        self._write(entry)
+        with self._lock:
+            self._entries[(repository, changeset)] = entry
+
+    def last_entry(
+        self, repository: str, changeset: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return the last record of a repository, or of one of its changesets, if any."""
+        with self._lock:
+            return self._entries.get((repository, changeset))
+
+    def close(self) -> None:
+        """Write the journal to disk and close it."""
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self) -> "RunJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _parse(line: str) -> Optional[Dict[str, Any]]:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        # cut short by a crash
+        return None
+    return record if isinstance(record, dict) else None
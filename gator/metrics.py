@@ -0,0 +1,224 @@
+"""
+Measure where the time of a run goes.
+
+Instrumented code calls `add` and `timed`, which record into the `Metrics` being
+collected in the current context, see `collecting`. The pipeline collects the
+metrics of every stage of every repository separately, wherever the stage runs,
+including worker processes, and merges them into the run's metrics labelled with
+the repository. Work outside of `collecting` is recorded in `UNATTRIBUTED`.
+
+Every metric is a counter. Timings record wall time, as `<name>_seconds`, and the
+CPU time of the calling thread, as `<name>_cpu_seconds`. Run metrics can be written
+in the OpenMetrics text format, e.g. for a node exporter's textfile collector to
+pick up during long runs, and summarised with `run_report` once a run completes.
+"""
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+Labels = Tuple[Tuple[str, str], ...]
+# (name, labels, value), as exchanged between processes
+Sample = Tuple[str, Dict[str, str], float]
+
+METRIC_PREFIX = "gator_"
+# most slow repositories and patterns listed by `run_report`
+REPORT_TOP = 10
+
+
+class Metrics:
+    """Counters, by name and labels. Safe to share between threads."""
+
+    def __init__(self) -> None:
+        self._values: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """
+        Increase a counter.
+
+        :param name: The counter, e.g. `files_walked`.
+        :param value: How much to increase it by.
+        :param labels: Distinguish counters of the same name, e.g. `stage="process"`.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def samples(self) -> List[Sample]:
+        """Return every counter, e.g. to send it to another process."""
+        with self._lock:
+            items = list(self._values.items())
+        return [(name, dict(labels), value) for (name, labels), value in items]
+
+    def merge(self, samples: Iterable[Sample], **labels: str) -> None:
+        """
+        Add counters from elsewhere to these.
+
+        :param samples: The counters, see `samples`.
+        :param labels: Added to the labels of every counter, e.g. the repository.
+        """
+        for name, sample_labels, value in samples:
+            self.add(name, value, **{**sample_labels, **labels})
+
+    def total(self, name: str, **labels: str) -> float:
+        """Return the sum of the counters named `name` that have all of `labels`."""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(
+                value
+                for (key_name, key_labels), value in self._values.items()
+                if key_name == name and wanted <= set(key_labels)
+            )
+
+    def to_openmetrics(self) -> str:
+        """Render the counters in the OpenMetrics text format."""
+        families: Dict[str, List[str]] = {}
+        with self._lock:
+            items = sorted(self._values.items())
+        for (name, labels), value in items:
+            family = f"{METRIC_PREFIX}{name}"
+            rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            families.setdefault(family, []).append(
+                f"{family}_total{{{rendered}}} {value!r}"
+                if rendered
+                else f"{family}_total {value!r}"
+            )
+        lines = []
+        for family, samples in families.items():
+            lines.append(f"# TYPE {family} counter")
+            lines.extend(samples)
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_openmetrics(self, path: Union[str, Path]) -> None:
+        """Write the counters to `path` in the OpenMetrics text format, atomically."""
+        path = Path(path)
+        fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.to_openmetrics())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+UNATTRIBUTED = Metrics()
+_current: ContextVar[Optional[Metrics]] = ContextVar("gator_metrics", default=None)
+
+
+def current() -> Metrics:
+    """Return the metrics being collected in the current context."""
+    return _current.get() or UNATTRIBUTED
+
+
+def add(name: str, value: float = 1.0, **labels: str) -> None:
+    """Increase a counter of the metrics being collected, see `Metrics.add`."""
+    current().add(name, value, **labels)
+
+
+@contextmanager
+def collecting(metrics: Metrics) -> Iterator[Metrics]:
+    """
+    Record metrics into `metrics` within the context.
+
+    Context does not carry over to threads started within it: threads that work on
+    behalf of a repository must collect themselves.
+    """
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(name: str, **labels: str) -> Iterator[None]:
+    """Record the wall and CPU time spent within the context."""
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        metrics = current()
+        metrics.add(f"{name}_seconds", time.perf_counter() - wall, **labels)
+        metrics.add(f"{name}_cpu_seconds", time.thread_time() - cpu, **labels)
+
+
+class MetricsFile:
+    """
+    Keep an OpenMetrics file up to date during a run.
+
+    :param path: The file.
+    :param interval_seconds: Least time between two writes.
+    """
+
+    def __init__(self, path: Union[str, Path], interval_seconds: float = 5.0):
+        self.path = Path(path)
+        self.interval_seconds = interval_seconds
+        self._written_at: Optional[float] = None
+
+    def update(self, metrics: Metrics, force: bool = False) -> None:
+        """Write `metrics`, unless they were written less than the interval ago."""
+        now = time.monotonic()
+        if (
+            force
+            or self._written_at is None
+            or now - self._written_at >= self.interval_seconds
+        ):
+            metrics.write_openmetrics(self.path)
+            self._written_at = now
+
+
+def run_report(
+    metrics: Metrics, statuses: Dict[str, Any], top: int = REPORT_TOP
+) -> Dict[str, Any]:
+    """
+    Summarise the metrics of a run.
+
+    :param metrics: The run's metrics, with a `repository` label on per-repository ones.
+    :param statuses: Outcome of each repository, by name; for runs of several
+        changesets, the outcome of each of its changesets, by changeset name.
+    :param top: How many of the slowest repositories and patterns to list.
+    :return: JSON serializable totals, per-repository totals, and the slowest
+        repositories and regex patterns.
+    """
+    totals: Dict[str, float] = {}
+    repositories: Dict[str, Dict[str, Any]] = {
+        name: {"status": status} for name, status in statuses.items()
+    }
+    patterns: Dict[str, float] = {}
+    for name, labels, value in metrics.samples():
+        totals[name] = totals.get(name, 0.0) + value
+        repository = labels.get("repository")
+        if repository is not None:
+            entry = repositories.setdefault(repository, {})
+            entry[name] = entry.get(name, 0.0) + value
+        if name == "regex_seconds":
+            patterns[labels["pattern"]] = patterns.get(labels["pattern"], 0.0) + value
+
+    def slowest(seconds: Dict[str, float], key: str) -> List[Dict[str, Any]]:
+        ranked = sorted(seconds.items(), key=lambda item: item[1], reverse=True)
+        return [{key: name, "seconds": value} for name, value in ranked[:top]]
+
+    return {
+        "totals": totals,
+        "repositories": repositories,
+        "slowest_repositories": slowest(
+            {
+                name: entry.get("stage_seconds", 0.0)
+                for name, entry in repositories.items()
+            },
+            "repository",
+        ),
+        "slowest_patterns": slowest(patterns, "pattern"),
+    }
@@ -0,0 +1,273 @@
+"""
+Keep a persistent cache of bare repository mirrors to check repositories out from.
+
+Each repository is mirrored once, as a bare repository that is brought up to date
+with an incremental fetch, and every run gets its own cheap local clone of the
+mirror, with objects hardlinked rather than copied. Runs never share a working
+tree, so concurrent runs do not collide. A fork can borrow the objects of the
+repository it was forked from through git alternates.
+
+Mirrors are evicted least recently used first when they exceed the disk budget.
+Locks are POSIX advisory locks on files next to each mirror:
+
+- `<mirror>.lock` is held exclusively while a mirror is created or fetched
+- `<mirror>.use` is held shared by every checkout of a mirror, or of a fork that
+  borrows its objects, and exclusively while a mirror is evicted
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional, Union
+
+from git import Repo
+
+from gator.pre_process import CloneStrategy, apply_sparse_checkout
+from gator.resources.util import scrub_url
+
+_logger = logging.getLogger(__name__)
+
+MIRRORS_DIRECTORY = "mirrors"
+METADATA_SUFFIX = ".json"
+UPDATE_LOCK_SUFFIX = ".lock"
+USE_LOCK_SUFFIX = ".use"
+
+
+def _directory_size(path: Path) -> int:
+    total = 0
+    for directory, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                total += os.lstat(os.path.join(directory, file_name)).st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def _lock(path: Path, operation: int) -> Optional[IO]:
+    """
+    Open and lock `path`, creating it if needed.
+
+    :param operation: `fcntl.LOCK_SH` or `fcntl.LOCK_EX`, optionally with `fcntl.LOCK_NB`.
+    :return: The open lock file, which holds the lock until closed, or None if
+        `fcntl.LOCK_NB` was given and the lock is held elsewhere.
+    """
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, operation)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class MirrorCache:
+    """
+    A persistent cache of bare mirrors, shared by concurrent runs.
+
+    :param cache_dir: Directory holding the mirrors; created if missing.
+    :param disk_budget_bytes: Size the mirrors may take up in total before the least
+        recently used ones are evicted, or None for no limit. Mirrors in use are
+        never evicted, so the budget may be exceeded while they are.
+    """
+
+    def __init__(
+        self, cache_dir: Union[str, Path], disk_budget_bytes: Optional[int] = None
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.mirrors_dir = self.cache_dir / MIRRORS_DIRECTORY
+        self.disk_budget_bytes = disk_budget_bytes
+        self.mirrors_dir.mkdir(parents=True, exist_ok=True)
+        # lock files held by each checkout, closed when it is released
+        self._checkout_locks: Dict[Path, List[Optional[IO]]] = {}
+
+    def mirror_path(self, repo_url: str) -> Path:
+        """Where the mirror of `repo_url` is kept; credentials do not affect it."""
+        scrubbed = scrub_url(repo_url)
+        name = re.sub(r"\.git$", "", scrubbed.rstrip("/").rsplit("/", 1)[-1])
+        digest = hashlib.sha1(scrubbed.encode("utf-8")).hexdigest()[:12]  # nosec
+        return (
+            self.mirrors_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}-{digest}.git"
+        )
+
+    def update_mirror(self, repo_url: str, fork_of: Optional[str] = None) -> Path:
+        """
+        Create the mirror of a repository, or fetch what changed since the last update.
+
+        :param repo_url: URL of the repository.
+        :param fork_of: URL of the repository it was forked from. The fork's mirror
+            borrows that repository's objects, which are mirrored first, through
+            alternates. Only used when the fork's mirror is created.
+        :raises GitCommandError: There was an error cloning or fetching.
+        :return: The filepath of the bare mirror.
+        """
+        mirror = self.mirror_path(repo_url)
+        alternate = self.update_mirror(fork_of) if fork_of else None
+        lock = _lock(mirror.with_suffix(UPDATE_LOCK_SUFFIX), fcntl.LOCK_EX)
+        try:
+            if mirror.is_dir():
+                Repo(mirror).git.fetch(
+                    "--prune", "--quiet", repo_url, "+refs/heads/*:refs/heads/*"
+                )
+                # objects are only borrowed if they were when the mirror was created
+                alternate = None
+            else:
+                alternate = self._create_mirror(repo_url, mirror, alternate)
+            self._write_metadata(mirror, repo_url, alternate)
+        finally:
+            assert lock is not None  # nosec
+            lock.close()
+        return mirror
+
+    def _create_mirror(
+        self, repo_url: str, mirror: Path, alternate: Optional[Path]
+    ) -> Optional[Path]:
+        partial = mirror.with_name(mirror.name + ".partial")
+        shutil.rmtree(partial, ignore_errors=True)
+        options = []
+        if alternate:
+            options = ["--reference-if-able", str(alternate.resolve())]
+        repo = Repo.clone_from(repo_url, partial, bare=True, multi_options=options)
+        # the URL may contain credentials, and fetches pass it explicitly anyway
+        repo.git.remote("set-url", "origin", scrub_url(repo_url))
+        # objects unreachable here may still be reachable from forks borrowing them
+        repo.git.config("gc.pruneExpire", "never")
+        os.replace(partial, mirror)
+        if (mirror / "objects" / "info" / "alternates").is_file():
+            return alternate
+        return None
+
+    def _write_metadata(
+        self, mirror: Path, repo_url: str, alternate: Optional[Path]
+    ) -> None:
+        metadata_path = mirror.with_suffix(METADATA_SUFFIX)
+        previous = self._read_metadata(metadata_path) or {}
+        metadata = {
+            "url": scrub_url(repo_url),
+            "alternate": str(alternate) if alternate else previous.get("alternate"),
+            "last_used": time.time(),
+            "size": _directory_size(mirror),
+        }
+        temporary = metadata_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(metadata))
+        os.replace(temporary, metadata_path)
+
+    @staticmethod
+    def _read_metadata(metadata_path: Path) -> Optional[Dict]:
+        try:
+            return json.loads(metadata_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def checkout(
+        self,
+        repo_url: str,
+        checkout_path: Union[str, Path],
+        fork_of: Optional[str] = None,
+        strategy: Optional[CloneStrategy] = None,
+        mirror_filter: Optional[Callable[[Path], bool]] = None,
+    ) -> Optional[Path]:
+        """
+        Update the mirror of a repository and make a local clone of it to work in.
+
+        The clone's `origin` is `repo_url`, so branches are pushed to the repository
+        itself. Call `release` once done with it, even if nothing was checked out.
+        :param repo_url: URL of the repository.
+        :param checkout_path: Empty directory to clone to; replaced if it exists.
+        :param fork_of: URL of the repository it was forked from, see `update_mirror`.
+        :param strategy: Only its sparse-checkout directories apply, since history
+            and file contents are already local.
+        :param mirror_filter: Called with the updated mirror; the repository is only
+            checked out if it returns True.
+        :raises GitCommandError: There was an error updating or cloning the mirror.
+        :return: The filepath where the repository content is located, or None if
+            `mirror_filter` rejected the mirror.
+        """
+        checkout_path = Path(checkout_path)
+        self.release(checkout_path)
+        # taken before updating, so that the mirrors cannot be evicted in between
+        self._checkout_locks[checkout_path] = [
+            _lock(self.mirror_path(url).with_suffix(USE_LOCK_SUFFIX), fcntl.LOCK_SH)
+            for url in (repo_url, fork_of)
+            if url
+        ]
+        mirror = self.update_mirror(repo_url, fork_of)
+        if mirror_filter is not None and not mirror_filter(mirror):
+            return None
+
+        strategy = strategy or CloneStrategy()
+        options = ["--local"]
+        if strategy.sparse_directories is not None:
+            options.append("--sparse")
+        repo = Repo.clone_from(str(mirror), checkout_path, multi_options=options)
+        repo.git.remote("set-url", "origin", repo_url)
+        apply_sparse_checkout(repo, strategy)
+        return checkout_path
+
+    def release(self, checkout_path: Union[str, Path]) -> None:
+        """Delete a checkout, allowing the mirrors it used to be evicted again."""
+        checkout_path = Path(checkout_path)
+        shutil.rmtree(checkout_path, ignore_errors=True)
+        for lock in self._checkout_locks.pop(checkout_path, []):
+            if lock is not None:
+                lock.close()
+
+    def evict(self) -> List[str]:
+        """
+        Evict the least recently used mirrors until the cache fits its disk budget.
+
+        Mirrors in use, by this or any other process, are skipped, as are mirrors
+        whose objects are borrowed by a fork, until that fork is evicted.
+        :return: The URLs of the evicted mirrors.
+        """
+        if self.disk_budget_bytes is None:
+            return []
+        entries = {}
+        for metadata_path in self.mirrors_dir.glob(f"*{METADATA_SUFFIX}"):
+            metadata = self._read_metadata(metadata_path)
+            if metadata is not None:
+                entries[metadata_path.with_suffix(".git")] = metadata
+        total = sum(metadata["size"] for metadata in entries.values())
+
+        evicted: List[str] = []
+        evicted_any = True
+        while total > self.disk_budget_bytes and evicted_any:
+            borrowed = {
+                Path(m["alternate"]) for m in entries.values() if m["alternate"]
+            }
+            evicted_any = False
+            for mirror in sorted(entries, key=lambda m: entries[m]["last_used"]):
+                if mirror in borrowed or not self._evict_mirror(mirror):
+                    continue
+                metadata = entries.pop(mirror)
+                total -= metadata["size"]
+                evicted.append(metadata["url"])
+                evicted_any = True
+                break
+        return evicted
+
+    def _evict_mirror(self, mirror: Path) -> bool:
+        use_lock = _lock(
+            mirror.with_suffix(USE_LOCK_SUFFIX), fcntl.LOCK_EX | fcntl.LOCK_NB
+        )
+        if use_lock is None:
+            return False
+        update_lock = _lock(
+            mirror.with_suffix(UPDATE_LOCK_SUFFIX), fcntl.LOCK_EX | fcntl.LOCK_NB
+        )
+        try:
+            if update_lock is None:
+                return False
+            _logger.info(f"Evicting mirror {mirror}")
+            mirror.with_suffix(METADATA_SUFFIX).unlink()
+            shutil.rmtree(mirror)
+            return True
+        finally:
+            if update_lock is not None:
+                update_lock.close()
+            use_lock.close()
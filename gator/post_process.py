@@ -3,4 +3,375 @@ Define all of the logic for post-processing a repository.
 
 A repository is ready for post processing after
 pre-process and process have both been run.
+
+1. Commit the code changes to a feature branch and push it
+2. Open a pull request for the feature branch, paced by `gator.rate_limit`
 """
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from io import BytesIO
+from pathlib import Path
+from stat import S_ISLNK, S_IXUSR
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+)
+from urllib.parse import urlencode
+
+from git import Actor, Repo
+from git.objects import Blob, Commit
+from gitdb.base import IStream
+from github import Github, GithubException
+from github.Repository import Repository
+
+from gator.rate_limit import RateLimiter
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+GITHUB_PUBLIC_DOMAIN_NAME = "github.com"
+
+
+# paths per git command, to stay well within command line length limits
+_PATHS_PER_COMMAND = 1000
+# changed paths are file names, not patterns
+_LITERAL_PATHSPECS = {"GIT_LITERAL_PATHSPECS": "1"}
+
+
+def postprocess_repository(
+    repo_path: Path,
+    branch_name: str,
+    commit_message: str,
+    actor: Actor,
+    changed_paths: Optional[Sequence[str]] = None,
+) -> Optional[str]:
+    """
+    Commit the changes in the working tree at `repo_path` to a feature branch, and push it.
+
+    The branch is force-pushed, since it only ever contains Gator's commit on top of
+    the default branch. The clone is returned to its default branch, without the
+    changes, afterwards, so that it can be reused.
+    :param repo_path: The filepath where the repository content is located.
+    :param branch_name: Feature branch to commit to; replaced if it already exists locally.
+    :param commit_message: Text to be used as the commit message.
+    :param actor: Author and committer of the commit.
+    :param changed_paths: The files the code changes wrote or removed, relative to
+        `repo_path`, see `gator.process.apply_changeset`. If given, the commit is
+        built from HEAD's tree and these files alone, without scanning the working
+        tree with `git status` and `git add`.
+    :raises GitCommandError: There was an error committing or pushing.
+    :return: The default branch the feature branch is based on, or None if there
+        was nothing to commit.
+    """
+    repo = Repo(repo_path)
+    if changed_paths is not None and not any(
+        (repo_path / path).is_dir() for path in changed_paths
+    ):
+        return _commit_changed_paths(
+            repo, changed_paths, branch_name, commit_message, actor
+        )
+
+    if not repo.is_dirty(untracked_files=True):
+        _logger.info(f"No changes to commit in {repo_path}")
+        return None
+
+    default_branch = repo.active_branch.name
+    repo.git.checkout("-B", branch_name)
+    try:
+        repo.git.add("--all")
+        repo.index.commit(commit_message, author=actor, committer=actor)
+        repo.git.push("--force", "origin", f"{branch_name}:{branch_name}")
+    finally:
+        repo.git.checkout("-f", default_branch)
+        repo.git.clean("-df")
+        repo.git.branch("-D", branch_name)
+    return default_branch
+
+
+def _chunks(paths: Sequence[str]) -> Iterator[Sequence[str]]:
+    for start in range(0, len(paths), _PATHS_PER_COMMAND):
+        yield paths[start : start + _PATHS_PER_COMMAND]
+
+
+def _commit_changed_paths(
+    repo: Repo,
+    changed_paths: Sequence[str],
+    branch_name: str,
+    commit_message: str,
+    actor: Actor,
+) -> Optional[str]:
+    if not changed_paths:
+        _logger.info(f"No changes to commit in {repo.working_tree_dir}")
+        return None
+
+    delta = _TreeDelta(repo, changed_paths)
+    try:
+        tree = delta.write_tree()
+        if tree == repo.head.commit.tree.hexsha:
+            _logger.info(f"No changes to commit in {repo.working_tree_dir}")
+            return None
+        commit = Commit.create_from_tree(
+            repo,
+            tree,
+            commit_message,
+            parent_commits=[repo.head.commit],
+            author=actor,
+            committer=actor,
+        )
+        ref = f"refs/heads/{branch_name}"
+        repo.git.update_ref(ref, commit.hexsha)
+        try:
+            repo.git.push("--force", "origin", f"{ref}:{ref}")
+        finally:
+            repo.git.update_ref("-d", ref)
+        return repo.active_branch.name
+    finally:
+        delta.restore()
+
+
+class _TreeDelta:
+    """
+    Files changed in a working tree, relative to HEAD.
+
+    Only the given paths are ever listed, hashed or restored, so the cost does not
+    depend on the size of the working tree.
+    :param repo: The repository.
+    :param changed_paths: Paths of the files that changed, relative to the root.
+    """
+
+    def __init__(self, repo: Repo, changed_paths: Sequence[str]):
+        self.repo = repo
+        self.root = Path(str(repo.working_tree_dir))
+        paths = sorted(set(changed_paths))
+        # blobs of HEAD among the changed paths
+        self.tracked = [
+            path
+            for chunk in _chunks(paths)
+            for path in repo.git.ls_tree(
+                "-r", "-z", "--name-only", "HEAD", "--", *chunk, env=_LITERAL_PATHSPECS
+            ).split("\0")
+            if path
+        ]
+        tracked = set(self.tracked)
+        written = [path for path in paths if os.path.lexists(self.root / path)]
+        # new files that `git add --all` would leave out
+        ignored = self._ignored([path for path in written if path not in tracked])
+        self.written = [path for path in written if path not in ignored]
+        self.created = [path for path in self.written if path not in tracked]
+        written_set = set(written)
+        self.removed = [path for path in self.tracked if path not in written_set]
+
+    def _ignored(self, paths: Sequence[str]) -> Set[str]:
+        if not paths:
+            return set()
+        with tempfile.TemporaryFile() as stdin:
+            stdin.write(b"".join(os.fsencode(path) + b"\0" for path in paths))
+            stdin.seek(0)
+            output = self.repo.git.check_ignore(
+                "-z", "--stdin", istream=stdin, with_exceptions=False
+            )
+        return {path for path in output.split("\0") if path}
+
+    def _mode(self, path: str) -> str:
+        mode = os.lstat(self.root / path).st_mode
+        if S_ISLNK(mode):
+            return "120000"
+        return "100755" if mode & S_IXUSR else "100644"
+
+    def _hash(self, paths: Sequence[str]) -> Dict[str, str]:
+        """Write the content of each file to the object database, returning the blob SHAs."""
+        shas = {}
+        regular = []
+        for path in paths:
+            if not os.path.islink(self.root / path):
+                regular.append(path)
+                continue
+            target = os.fsencode(os.readlink(self.root / path))
+            stream = self.repo.odb.store(
+                IStream(Blob.type, len(target), BytesIO(target))
+            )
+            shas[path] = stream.hexsha.decode("ascii")
+        for chunk in _chunks(regular):
+            # clean filters, e.g. line ending conversion, apply as for `git add`
+            output = self.repo.git.hash_object("-w", "--", *chunk)
+            shas.update(zip(chunk, output.split()))
+        return shas
+
+    def write_tree(self) -> str:
+        """
+        Write HEAD's tree, with the changed files, to the object database.
+
+        A temporary index is read from HEAD's tree, without the stat information
+        that would need refreshing, and only the changed files are updated in it.
+        :return: The SHA of the new tree.
+        """
+        entries = [
+            f"{self._mode(path)},{sha},{path}"
+            for path, sha in self._hash(self.written).items()
+        ]
+        index_dir = tempfile.mkdtemp(prefix="gator-index-", dir=self.repo.git_dir)
+        try:
+            with self.repo.git.custom_environment(
+                GIT_INDEX_FILE=os.path.join(index_dir, "index")
+            ):
+                self.repo.git.read_tree("HEAD")
+                for start in range(0, len(entries), _PATHS_PER_COMMAND):
+                    cacheinfo = entries[start : start + _PATHS_PER_COMMAND]
+                    self.repo.git.update_index(
+                        "--add",
+                        *(arg for entry in cacheinfo for arg in ("--cacheinfo", entry)),
+                    )
+                for chunk in _chunks(self.removed):
+                    self.repo.git.update_index("--force-remove", "--", *chunk)
+                return self.repo.git.write_tree()
+        finally:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+    def restore(self) -> None:
+        """Return the changed files to their content at HEAD."""
+        for chunk in _chunks(self.tracked):
+            self.repo.git.checkout("HEAD", "--", *chunk, env=_LITERAL_PATHSPECS)
+        for path in self.created:
+            created = self.root / path
+            if os.path.lexists(created):
+                created.unlink()
+            # like `git clean -d`, remove the directories left empty
+            directory = created.parent
+            while directory != self.root and not any(directory.iterdir()):
+                directory.rmdir()
+                directory = directory.parent
+
+
+def _requester(repo: Repository) -> Any:
+    # makes the requests of PyGithub objects, and keeps the last rate limit headers;
+    # not part of the type stubs
+    return repo._requester  # type: ignore
+
+
+class PullRequestOpener:
+    """
+    Open pull requests on GitHub, within its rate limits.
+
+    Safe to share between threads. PyGithub connections are not, so every thread
+    gets its own client, which keeps its connection alive between requests. All
+    requests are paced by a shared `RateLimiter`, and lookups of existing pull
+    requests are conditional requests, which do not count against the rate limit
+    when nothing changed.
+    :param github_token: Token of the account to open pull requests as.
+    :param github_domain: GitHub domain; the API of GitHub Enterprise instances is
+        served under `/api/v3`.
+    :param rate_limiter: Paces requests; a default `RateLimiter` if not given.
+    :param api_url: URL of the API, instead of the one derived from `github_domain`.
+    """
+
+    def __init__(
+        self,
+        github_token: str,
+        github_domain: Optional[str] = GITHUB_PUBLIC_DOMAIN_NAME,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_url: Optional[str] = None,
+    ):
+        if api_url is None and github_domain not in (None, GITHUB_PUBLIC_DOMAIN_NAME):
+            api_url = f"https://{github_domain}/api/v3"
+        self._github_token = github_token
+        self._api_url = api_url
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._local = threading.local()
+        # ETag and content of each pull request lookup, by URL
+        self._lookups: Dict[str, Tuple[str, Any]] = {}
+        self._lookups_lock = threading.Lock()
+
+    def _github(self) -> Github:
+        github = getattr(self._local, "github", None)
+        if github is None:
+            if self._api_url is None:
+                github = Github(self._github_token)
+            else:
+                github = Github(self._github_token, base_url=self._api_url)
+            self._local.github = github
+        return github
+
+    def _call(
+        self, repo: Repository, request: Callable[[], T], write: bool = False
+    ) -> T:
+        requester = _requester(repo)
+
+        def rate_limiting() -> Tuple[int, float]:
+            # as of the last response, `Github.rate_limiting` may make a request
+            return requester.rate_limiting[0], requester.rate_limiting_resettime
+
+        return self.rate_limiter.call(request, rate_limiting, write)
+
+    def find_pull_request(self, full_name: str, head: str) -> Optional[Dict]:
+        """
+        Look up the open pull request for a branch.
+
+        :param full_name: Repository, as `org/name`.
+        :param head: Branch containing the changes.
+        :return: The pull request, as returned by the API, or None if there is none.
+        """
+        repo = self._github().get_repo(full_name, lazy=True)
+        parameters = {"head": f"{full_name.split('/')[0]}:{head}", "state": "open"}
+        url = f"{repo.url}/pulls"
+        key = f"{url}?{urlencode(parameters)}"
+        with self._lookups_lock:
+            cached = self._lookups.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        response_headers, output = self._call(
+            repo,
+            lambda: _requester(repo).requestJsonAndCheck(
+                "GET", url, parameters, headers
+            ),
+        )
+        pulls = cast(Optional[List[Dict]], output)
+        if pulls is None and cached is not None:
+            # 304 Not Modified
+            pulls = cached[1]
+        elif "etag" in response_headers:
+            with self._lookups_lock:
+                self._lookups[key] = (response_headers["etag"], pulls)
+        return pulls[0] if pulls else None
+
+    def open_pull_request(
+        self, full_name: str, head: str, base: str, title: str, body: str
+    ) -> None:
+        """
+        Open a pull request, unless one is already open for `head`.
+
+        :param full_name: Repository, as `org/name`.
+        :param head: Branch containing the changes.
+        :param base: Branch the changes should be merged into.
+        :param title: Pull request title.
+        :param body: Pull request body.
+        """
+        if self.find_pull_request(full_name, head) is not None:
+            # the push updated it
+            _logger.info(f"Pull request for {full_name}:{head} already exists")
+            return
+
+        repo = self._github().get_repo(full_name, lazy=True)
+        try:
+            self._call(
+                repo,
+                lambda: repo.create_pull(title=title, body=body, head=head, base=base),
+                write=True,
+            )
+        except GithubException as e:
+            if e.status != 422:
+                raise
+            # opened since the lookup
+            _logger.info(f"Pull request for {full_name}:{head} already exists: {e}")
@@ -5,13 +5,154 @@ Define all of the logic for setting a repository up for code modifications.
 2. Checkout an appropriate branch name
 3. Queue repository for processing
 """
+import posixpath
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from git import Repo
+from pydantic import BaseModel
 from pygitops.operations import get_updated_repo
 from pygitops.remote_git_utils import build_github_repo_url
 
+from gator.constants import CLONED_REPOS_DIRECTORY, GIT_INTERNALS_DIRECTORY
+from gator.resources.patterns import literal_root, normalize_spec_paths
+from gator.resources.plan import ChangesetPlan
+
+
+class CloneStrategy(BaseModel):
+    """
+    How much of a repository to clone.
+
+    The defaults clone the full history and tree. Shallow and blobless clones only
+    work against remotes that support them, such as GitHub or `file://` URLs.
+    :param shallow: Only fetch the latest commit of the default branch (`--depth 1`).
+    :param blobless: Fetch file contents on demand, when they are checked out
+        (`--filter=blob:none`).
+    :param sparse_directories: Only check out these paths, recursively, and the files
+        directly inside their parents (cone mode), e.g. as computed by
+        `sparse_checkout_cone`. Paths to files select their parent directory. None
+        checks out the whole tree.
+    """
+
+    shallow: bool = False
+    blobless: bool = False
+    sparse_directories: Optional[List[str]] = None
+
+    class Config:
+        frozen = True
+
+    def clone_options(self) -> Dict[str, Any]:
+        """Options for `git clone`, as keyword arguments to `Repo.clone_from`."""
+        options: Dict[str, Any] = {}
+        if self.shallow:
+            options["depth"] = 1
+        if self.blobless:
+            options["filter"] = "blob:none"
+        if self.sparse_directories is not None:
+            options["sparse"] = True
+        return options
+
+
+def sparse_checkout_cone(plan: ChangesetPlan) -> Optional[List[str]]:
+    """
+    Compute the sparse-checkout directories a changeset needs.
+
+    The literal part of every spec path is used as a cone directory. Paths that turn
+    out to be files, or do not exist yet, are replaced by their parent directory when
+    the checkout is set up.
+    :param plan: The changeset to check out the repository for.
+    :return: The directories, or None if the changeset needs the whole tree.
+    """
+    paths = plan.touched_paths()
+    if paths is None:
+        return None
+
+    directories = []
+    for path in paths:
+        root = posixpath.normpath(literal_root(path) or ".")
+        if root == "." or root.startswith("../") or posixpath.isabs(root):
+            return None
+        directories.append(root)
+    return normalize_spec_paths(directories, drop_nested=True)
+
+
+def _cone_directories(repo: Repo, paths: List[str]) -> List[str]:
+    """Replace paths to files, or to nothing yet, by their parent directory."""
+    tree = repo.head.commit.tree
+    directories = []
+    for path in paths:
+        try:
+            is_directory = (tree / path).type == "tree"
+        except KeyError:
+            is_directory = False
+        directory = path if is_directory else posixpath.dirname(path)
+        # files directly in the repository root are always checked out
+        if directory and directory not in directories:
+            directories.append(directory)
+    return directories
+
+
+def apply_sparse_checkout(repo: Repo, strategy: CloneStrategy) -> None:
+    if strategy.sparse_directories is not None:
+        directories = _cone_directories(repo, strategy.sparse_directories)
+        repo.git.sparse_checkout("set", "--cone", *directories)
+    # read through git, since the setting may live in the worktree config
+    elif (
+        repo.git.config("--type=bool", "--default=false", "core.sparseCheckout")
+        == "true"
+    ):
+        repo.git.sparse_checkout("disable")
+
+
+def clone_repository(
+    repo_url: str,
+    clone_path: Union[str, Path],
+    strategy: Optional[CloneStrategy] = None,
+) -> Path:
+    """
+    Clone a repository, or update an existing clone to the latest default branch.
+
+    Changes left in an existing clone, e.g. by an interrupted run, are discarded first.
+    The sparse-checkout directories of an existing clone are replaced by those of
+    `strategy`; its history and blob filter are kept as they are.
+
+    :param repo_url: URL of the repository, e.g. a GitHub URL or `file:///path/to/repo.git`.
+    :param clone_path: Directory to clone the repository content to.
+    :param strategy: How much of the repository to clone; everything by default.
+    :raises PyGitOpsError: There was an error cloning the repository.
+    :raises GitCommandError: There was an error setting up the sparse checkout.
+    :return: The filepath where the repository content is located.
+    """
+    strategy = strategy or CloneStrategy()
+    if (Path(clone_path) / GIT_INTERNALS_DIRECTORY).is_dir():
+        existing = Repo(clone_path)
+        existing.git.reset("--hard")
+        existing.git.clean("-df")
+        repo = get_updated_repo(repo_url, clone_path)
+    else:
+        repo = get_updated_repo(repo_url, clone_path, **strategy.clone_options())
+    apply_sparse_checkout(repo, strategy)
+    return Path(repo.working_dir)
+
+
+def object_store_bytes(repo_path: Union[str, Path]) -> int:
+    """Return the size on disk of the objects of a clone, loose and packed."""
+    counts = dict(
+        line.split(": ", 1)
+        for line in Repo(repo_path).git.count_objects("-v").splitlines()
+    )
+    # reported in KiB
+    return (int(counts.get("size", 0)) + int(counts.get("size-pack", 0))) * 1024
+
 
 def preprocess_repository(
-    github_username, github_access_token, repo_org, repo_name, github_domain
-):
+    github_username,
+    github_access_token,
+    repo_org,
+    repo_name,
+    github_domain,
+    strategy: Optional[CloneStrategy] = None,
+) -> Path:
 
     repo_url = build_github_repo_url(
         github_username,
@@ -21,4 +162,6 @@ def preprocess_repository(
         github_domain,
     )
 
-    get_updated_repo(repo_url, "cloned_repos")
+    return clone_repository(
+        repo_url, Path(CLONED_REPOS_DIRECTORY) / repo_org / repo_name, strategy
+    )
@@ -0,0 +1,172 @@
+"""
+Define all of the logic for processing a repository.
+
+A repository is ready for processing after pre-process has been run.
+
+1. Evaluate the changeset's filters against the repository content
+2. Apply the changeset's code changes if every filter matched, or record them in
+   memory and render them as a diff when previewing
+
+The filters of several changesets can be evaluated together, see
+`changesets_match`, and each matching changeset then applied with `skip_filters`.
+"""
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Sequence, Union
+
+from gator.hooks import MAKE_CODE_CHANGES, observed
+from gator.resources.filters.evaluation import filter_sets_match, filters_match
+from gator.resources.index import RepositoryIndex, repository_index
+from gator.resources.plan import ChangesetPlan
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.build import Changeset
+    from gator.resources.filters.store import FilterResultStore
+
+
+_logger = logging.getLogger(__name__)
+
+
+def process_repository(
+    changeset: Union["Changeset", ChangesetPlan],
+    repo_path: Path,
+    workers: int = 1,
+    use_processes: bool = True,
+    filter_store: Optional["FilterResultStore"] = None,
+) -> bool:
+    """
+    Apply a changeset to the repository content present at `repo_path`.
+
+    All filters and code changes share a single `RepositoryIndex`, so the
+    repository is listed and read at most once regardless of how many resources
+    the changeset contains, and all `RegexFilter`s are evaluated in one pass.
+    :param changeset: The changeset, or its plan, to apply.
+    :param repo_path: The filepath where the repository content is located.
+    :param workers: Number of workers to process the repository's files on, for large
+        repositories. Results are identical to processing files serially.
+    :param use_processes: Whether the workers are processes or threads.
+    :param filter_store: Previous filter results, so that only the files changed
+        since are re-scanned.
+    :return: Whether or not the changeset's filters matched and code changes were applied.
+    """
+    return apply_changeset(
+        changeset, repo_path, workers, use_processes, filter_store
+    ).matched
+
+
+class ProcessResult(NamedTuple):
+    """
+    Outcome of applying a changeset to a repository.
+
+    :param matched: Whether or not the changeset's filters matched and code changes
+        were applied.
+    :param changed_paths: `/` separated paths, relative to the repository root, of
+        every file the code changes wrote or removed, or None if a code change
+        modified the repository without going through the `RepositoryIndex`.
+    """
+
+    matched: bool
+    changed_paths: Optional[List[str]]
+
+
+def apply_changeset(
+    changeset: Union["Changeset", ChangesetPlan],
+    repo_path: Path,
+    workers: int = 1,
+    use_processes: bool = True,
+    filter_store: Optional["FilterResultStore"] = None,
+    skip_filters: bool = False,
+) -> ProcessResult:
+    """
+    Apply a changeset as `process_repository` does, keeping track of the files it changed.
+
+    The changed paths let the changes be committed without scanning the working tree.
+    :param skip_filters: Apply the code changes without evaluating the filters, e.g.
+        because `changesets_match` already did.
+    """
+    with repository_index(repo_path, workers, use_processes) as index:
+        if not _apply_changeset(
+            changeset, repo_path, index, filter_store, skip_filters
+        ):
+            return ProcessResult(False, [])
+        return ProcessResult(True, index.changed_files())
+
+
+def preview_repository(
+    changeset: Union["Changeset", ChangesetPlan],
+    repo_path: Path,
+    workers: int = 1,
+    filter_store: Optional["FilterResultStore"] = None,
+    skip_filters: bool = False,
+) -> Optional[str]:
+    """
+    Determine the changes a changeset would make, without modifying the repository.
+
+    Code changes are recorded in an in-memory `Overlay`, so the repository is
+    only read. Custom code changes that write to disk directly are skipped.
+    :param changeset: The changeset, or its plan, to preview.
+    :param repo_path: The filepath where the repository content is located.
+    :param workers: Number of workers to process the repository's files on.
+    :param filter_store: Previous filter results, see `process_repository`.
+    :param skip_filters: Preview the code changes without evaluating the filters.
+    :return: A unified diff of the changes, or None if the changeset's filters did not match.
+    """
+    with repository_index(repo_path, workers, dry_run=True) as index:
+        if not _apply_changeset(
+            changeset, repo_path, index, filter_store, skip_filters
+        ):
+            return None
+        return index.overlay.diff()  # type: ignore
+
+
+def changesets_match(
+    changesets: Sequence[Union["Changeset", ChangesetPlan]],
+    repo_path: Path,
+    filter_store: Optional["FilterResultStore"] = None,
+) -> List[bool]:
+    """
+    Determine which of several changesets' filters all match the repository.
+
+    The filters of every changeset are evaluated together, so the content is scanned
+    once for all of them, see `filter_sets_match`. Run within `repository_index` to
+    share the content read with the code changes applied next.
+    :param changesets: The changesets, or their plans.
+    :param repo_path: The filepath where the repository content is located.
+    :param filter_store: Previous filter results, see `process_repository`.
+    :return: Whether or not every filter of each changeset matched, in order.
+    """
+    plans = [_plan(changeset) for changeset in changesets]
+    return filter_sets_match([plan.filters for plan in plans], repo_path, filter_store)
+
+
+def _plan(changeset: Union["Changeset", ChangesetPlan]) -> ChangesetPlan:
+    if isinstance(changeset, ChangesetPlan):
+        return changeset
+    return ChangesetPlan.from_changeset(changeset)
+
+
+def _apply_changeset(
+    changeset: Union["Changeset", ChangesetPlan],
+    repo_path: Path,
+    index: RepositoryIndex,
+    filter_store: Optional["FilterResultStore"] = None,
+    skip_filters: bool = False,
+) -> bool:
+    plan = _plan(changeset)
+    if not skip_filters and not filters_match(plan.filters, repo_path, filter_store):
+        _logger.info(f"Filters did not match {repo_path}, skipping")
+        return False
+
+    for code_change in plan.code_changes:
+        if index.overlay is not None and not code_change.uses_repository_index:
+            _logger.warning(
+                f"{type(code_change).__name__} writes to disk directly and cannot be "
+                f"previewed, skipping"
+            )
+            continue
+        with observed([code_change], MAKE_CODE_CHANGES, repo_path):
+            code_change.make_code_changes(repo_path)
+        if not code_change.uses_repository_index:
+            index.invalidate()
+
+    return True
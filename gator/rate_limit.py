@@ -0,0 +1,193 @@
+"""
+Schedule GitHub API requests within GitHub's rate limits.
+
+GitHub enforces two kinds of limits:
+
+- the primary limit, a number of requests per hour, reported on every response by
+  the `X-RateLimit-Remaining` and `X-RateLimit-Reset` headers
+- secondary limits on bursts of requests, and of content-creating requests in
+  particular, reported by a 403 or 429 response, usually with a `Retry-After` header
+
+Content-creating requests go through a token bucket, so that bursts of pull
+requests stay under the secondary limits. Once the primary limit runs low, or a
+secondary limit is hit, every request waits until the limit resets, instead of
+each worker finding out on its own. Failed requests are retried with jittered
+exponential backoff.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Callable, Mapping, Optional, Tuple, TypeVar
+
+from github import GithubException, RateLimitExceededException
+
+from gator import metrics
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# GitHub asks to wait at least this long after a secondary limit without `Retry-After`
+SECONDARY_LIMIT_WAIT_SECONDS = 60
+_THROTTLED = (403, 429)
+_RETRIED_SERVER_ERRORS = (500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Allow `rate` operations per second on average, in bursts of up to `capacity`.
+
+    :param rate: Tokens added per second.
+    :param capacity: Tokens the bucket holds; the bucket starts full.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive, and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, going into debt if none is left.
+
+        :return: Seconds to wait before the token may be used.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        """Take a token, waiting until one is available."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class RateLimiter:
+    """
+    Pace GitHub API requests, shared by every thread making them.
+
+    :param writes_per_second: Content-creating requests allowed per second on average.
+    :param write_burst: Content-creating requests allowed back to back.
+    :param reserve: Requests of the primary limit left for other clients; once no more
+        than this many remain, requests wait until the limit resets.
+    :param max_attempts: Attempts per request, including the first one.
+    :param backoff_seconds: Base delay of the exponential backoff between attempts.
+    """
+
+    def __init__(
+        self,
+        writes_per_second: float = 1.0,
+        write_burst: float = 1.0,
+        reserve: int = 0,
+        max_attempts: int = 5,
+        backoff_seconds: float = 1.0,
+    ):
+        self.writes = TokenBucket(writes_per_second, write_burst)
+        self.reserve = reserve
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._lock = threading.Lock()
+        # wall clock time before which no request may be made
+        self._resume_at = 0.0
+
+    def pause_until(self, resume_at: float) -> None:
+        """Hold every request until the wall clock time `resume_at`."""
+        with self._lock:
+            self._resume_at = max(self._resume_at, resume_at)
+
+    def wait(self, write: bool = False) -> None:
+        """Wait until a request may be made."""
+        if write:
+            self.writes.acquire()
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.time()
+            if delay <= 0:
+                return
+            _logger.info(f"Waiting {delay:.0f}s for the GitHub rate limit to reset")
+            time.sleep(delay)
+
+    def update(self, remaining: int, reset_at: float) -> None:
+        """
+        Record the primary rate limit reported by a response.
+
+        :param remaining: Requests left, from `X-RateLimit-Remaining`, or a negative
+            number if unknown.
+        :param reset_at: When the limit resets, in seconds since the epoch, from
+            `X-RateLimit-Reset`.
+        """
+        if 0 <= remaining <= self.reserve:
+            self.pause_until(reset_at)
+
+    def retry_delay(self, error: GithubException, attempt: int) -> Optional[float]:
+        """
+        Determine how long to wait before retrying a failed request.
+
+        :param error: What the request failed with.
+        :param attempt: Number of attempts made so far, starting at 1.
+        :return: Seconds to wait, or None if the request should not be retried.
+        """
+        headers: Mapping[str, str] = error.headers or {}
+        backoff = random.uniform(0, self.backoff_seconds * 2 ** (attempt - 1))  # nosec
+        if error.status in _THROTTLED:
+            if "retry-after" in headers:
+                return float(headers["retry-after"]) + backoff
+            if (
+                isinstance(error, RateLimitExceededException)
+                or headers.get("x-ratelimit-remaining") == "0"
+            ):
+                reset_at = float(headers.get("x-ratelimit-reset", 0))
+                return max(0.0, reset_at - time.time()) + backoff
+            if "secondary rate limit" in str(error.data).lower():
+                return SECONDARY_LIMIT_WAIT_SECONDS + backoff
+            return None
+        if error.status in _RETRIED_SERVER_ERRORS:
+            return backoff
+        return None
+
+    def call(
+        self,
+        request: Callable[[], T],
+        rate_limiting: Callable[[], Tuple[int, float]],
+        write: bool = False,
+    ) -> T:
+        """
+        Make a request once the rate limits allow it, retrying it if it is throttled.
+
+        :param request: Makes the request.
+        :param rate_limiting: Returns the requests remaining and the reset time of the
+            primary limit, as last reported, see `update`.
+        :param write: Whether the request creates content.
+        :raises GithubException: The request failed for good.
+        :return: The result of `request`.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.wait(write)
+            metrics.add("github_api_calls", write=str(write).lower())
+            try:
+                return request()
+            except GithubException as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None or attempt >= self.max_attempts:
+                    raise
+                _logger.info(f"GitHub request failed with {e.status}, retrying")
+                if e.status in _THROTTLED:
+                    # every other request would be throttled too
+                    self.pause_until(time.time() + delay)
+                else:
+                    time.sleep(delay)
+            finally:
+                self.update(*rate_limiting())
@@ -3,26 +3,27 @@ from typing import Dict, List, Optional, Type
 import yaml
 from pydantic import ValidationError
 
-from gator.exceptions import InvalidResourceError, InvalidSpecificationError
-from gator.resources.code_changes import (
-    NewFileCodeChangeV1Alpha,
-    RegexReplaceCodeChangeV1Alpha,
-    RemoveFileCodeChangeV1Alpha,
-)
-from gator.resources.filters.regex_filter import RegexFilterV1Alpha
-from gator.resources.models import (
+from gator.exceptions import InvalidSpecificationError
+from gator.resources.changeset_cache import ChangesetCache
+from gator.resources.models import (  # noqa: F401
     BaseModelForbidExtra,
     CodeChangeResource,
     FilterResource,
     GatorResource,
 )
+from gator.resources.plan import ChangesetPlan
+from gator.resources.registry import (
+    BUILTIN_RESOURCES,
+    ENTRY_POINT_GROUP,
+    ResourceRegistry,
+    resource_kind,
+)
+
+# resource classes are imported when their kind is first looked up
+ACTIVE_RESOURCES = ResourceRegistry(BUILTIN_RESOURCES, ENTRY_POINT_GROUP)
 
-ACTIVE_RESOURCES = {
-    "NewFileCodeChange": NewFileCodeChangeV1Alpha,
-    "RemoveFileCodeChange": RemoveFileCodeChangeV1Alpha,
-    "RegexReplaceCodeChange": RegexReplaceCodeChangeV1Alpha,
-    "RegexFilter": RegexFilterV1Alpha,
-}
+# libyaml's loader, when PyYAML was built with it, is several times faster
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 class _ResourceWithValidation(GatorResource):
@@ -40,6 +41,9 @@ class _ResourceWithValidation(GatorResource):
 
     @classmethod
     def return_kind(cls, values):
+        if isinstance(values, GatorResource):
+            # already built, e.g. the filters of a composite filter made in Python
+            return values
         try:
             kind = values["kind"]
         except KeyError:
@@ -68,24 +72,96 @@ class Changeset(BaseModelForbidExtra):
     spec: ChangesetSpecV1AlphaSpec
 
 
-def build_changeset(spec: str) -> Changeset:
+def build_changeset(spec: str, cache: Optional[ChangesetCache] = None) -> Changeset:
     """
     Given a string containing raw yaml, build a Changeset object.
 
     :param spec: A raw yaml string containing the changeset definition
+    :param cache: Changesets validated before, to reuse if the spec is unchanged.
     :raises InvalidSpecificationError: If anything went wrong.
     :return Changeset: The fully constructed pydantic model representing a
     """
+    changesets = build_changesets(spec, cache)
+    if len(changesets) != 1:
+        raise InvalidSpecificationError(
+            f"Expected a single changeset, found {len(changesets)}"
+        )
+    return changesets[0]
+
+
+def build_changesets(
+    spec: str, cache: Optional[ChangesetCache] = None
+) -> List[Changeset]:
+    """
+    Build a Changeset object from every document of a yaml stream.
+
+    Documents are separated by `---` lines; empty documents are skipped.
+    :param spec: A raw yaml string containing any number of changeset definitions
+    :param cache: Changesets validated before, to reuse if the spec is unchanged.
+    :raises InvalidSpecificationError: If anything went wrong.
+    :return: The changesets, in the order of the stream.
+    """
+    if cache is not None:
+        cached = cache.get(spec)
+        if cached is not None and all(_uses_active_resources(c) for c in cached):
+            return cached
+
     try:
-        changeset_dict = yaml.safe_load(spec)
+        documents = [
+            document
+            for document in yaml.load_all(spec, Loader=_SafeLoader)  # nosec
+            if document is not None
+        ]
     except yaml.YAMLError as e:
         raise InvalidSpecificationError from e
 
     try:
-        return Changeset.parse_obj(changeset_dict)
+        changesets = [Changeset.parse_obj(document) for document in documents]
     except ValidationError as e:
         raise InvalidSpecificationError from e
 
+    if cache is not None:
+        cache.put(spec, changesets)
+    return changesets
+
+
+def _uses_active_resources(changeset: Changeset) -> bool:
+    """Whether every resource is still of the class registered for its kind."""
+    resources = (changeset.spec.filters or []) + (changeset.spec.code_changes or [])
+    return all(
+        ACTIVE_RESOURCES.get(resource.kind) is type(resource)  # type: ignore
+        for resource in resources
+    )
+
+
+def build_changeset_plan(
+    spec: str, cache: Optional[ChangesetCache] = None
+) -> ChangesetPlan:
+    """
+    Given a string containing raw yaml, build an executable ChangesetPlan.
+
+    The plan pickles cheaply, so it can be built once and sent to worker processes.
+    :param spec: A raw yaml string containing the changeset definition
+    :param cache: Changesets validated before, to reuse if the spec is unchanged.
+    :raises InvalidSpecificationError: If anything went wrong.
+    :return ChangesetPlan: The changeset's compiled resources, in execution order
+    """
+    return ChangesetPlan.from_changeset(build_changeset(spec, cache))
+
+
+def build_changeset_plans(
+    spec: str, cache: Optional[ChangesetCache] = None
+) -> List[ChangesetPlan]:
+    """
+    Given a string containing raw yaml, build a ChangesetPlan for each changeset.
+
+    :param spec: A raw yaml string containing any number of changeset documents.
+    :param cache: Changesets validated before, to reuse if the spec is unchanged.
+    :raises InvalidSpecificationError: If anything went wrong.
+    :return: The plan of each changeset, in order.
+    """
+    return [ChangesetPlan.from_changeset(c) for c in build_changesets(spec, cache)]
+
 
 def build_gator_resource(resource_dict: Dict) -> GatorResource:
     """
@@ -117,24 +193,11 @@ def register_custom_resource(resource_class: Type) -> None:
     """
     Register a custom Gator resource.
 
-    Use this function to register a custom resource with Gator.
+    Use this function to register a custom resource with Gator. Resources of
+    installed packages can instead be declared as entry points, see
+    `gator.resources.registry`, and are then only imported when used.
     :param resource_class: Pydantic class, extending CodeChangeResource or FilterResource,
         that contains the business logic for executing the resource
+    :raises InvalidResourceError: The class is not a valid resource.
     """
-    global ACTIVE_RESOURCES
-
-    if not issubclass(resource_class, CodeChangeResource) or issubclass(
-        resource_class, FilterResource
-    ):
-        raise InvalidResourceError(
-            "Resource must subclass either CodeChangeResource or FilterResource"
-        )
-
-    try:
-        ACTIVE_RESOURCES[
-            resource_class.schema()["properties"]["kind"]["const"]
-        ] = resource_class
-    except KeyError:
-        raise InvalidResourceError(
-            "Custom resource must define a class variable 'kind'"
-        )
+    ACTIVE_RESOURCES[resource_kind(resource_class)] = resource_class
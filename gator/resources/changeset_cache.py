@@ -0,0 +1,100 @@
+"""
+Keep validated changesets, so that unchanged specs are not parsed and validated again.
+
+Entries are keyed by the SHA-256 of the spec's text, and kept in memory and, when
+given a directory, on disk, so that later runs over the same catalogue of
+changesets reuse them too. Entries on disk are pickles: the directory must only be
+writable by the users running Gator.
+"""
+import hashlib
+import logging
+import os
+import pickle  # nosec
+import tempfile
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from cachetools import LRUCache
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.build import Changeset
+
+_logger = logging.getLogger(__name__)
+
+# bumped whenever cached changesets are no longer compatible
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MEMORY_ENTRIES = 1024
+_SUFFIX = ".pickle"
+
+
+class ChangesetCache:
+    """
+    Validated changesets, by the content of their spec.
+
+    Safe to share between threads and processes: entries on disk are replaced
+    atomically. Cached changesets are shared, and must not be modified.
+    :param directory: Where to keep the changesets across runs, if given.
+    :param memory_entries: Number of specs kept in memory, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+    ):
+        self.directory = Path(directory) if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._memory: LRUCache = LRUCache(maxsize=memory_entries)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(spec: str) -> str:
+        """Return the key of a spec."""
+        content = f"{CACHE_FORMAT_VERSION}\0{spec}".encode("utf-8")
+        return hashlib.sha256(content).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None  # nosec
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def get(self, spec: str) -> Optional[List["Changeset"]]:
+        """Return the changesets cached for `spec`, or None if there are none."""
+        key = self.key(spec)
+        with self._lock:
+            changesets = self._memory.get(key)
+        if changesets is not None or self.directory is None:
+            return changesets
+
+        try:
+            with open(self._path(key), "rb") as f:
+                changesets = pickle.load(f)  # nosec
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # e.g. cut short, or pickled with resource classes that no longer exist
+            _logger.warning(
+                f"Ignoring unreadable cached changeset {key}", exc_info=True
+            )
+            return None
+        with self._lock:
+            self._memory[key] = changesets
+        return changesets
+
+    def put(self, spec: str, changesets: List["Changeset"]) -> None:
+        """Cache the changesets validated from `spec`."""
+        key = self.key(spec)
+        with self._lock:
+            self._memory[key] = changesets
+        if self.directory is None:
+            return
+
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(changesets, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
@@ -1,9 +1,9 @@
 import logging
-import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from gator.constants import VERSION_V1_ALPHA
+from gator.resources.index import get_repository_index
 from gator.resources.models import BaseModelForbidExtra, CodeChangeResource
 
 _logger = logging.getLogger(__name__)
@@ -23,6 +23,10 @@ class NewFileCodeChangeV1Alpha(CodeChangeResource):
     kind = "NewFileCodeChange"
     version = VERSION_V1_ALPHA
     spec: NewFileCodeChangeV1AlphaSpec
+    uses_repository_index = True
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return [file_details.file_path for file_details in self.spec.files]
 
     def make_code_changes(self, repo_path: Path) -> None:
         """
@@ -30,12 +34,10 @@ class NewFileCodeChangeV1Alpha(CodeChangeResource):
 
         :param repo_path: The filepath where the repository content is located.
         """
+        index = get_repository_index(repo_path)
         for file_details in self.spec.files:
-            head, tail = os.path.split(file_details.file_path)
-            file_location = repo_path / Path(head)
-            file_location.mkdir(parents=True, exist_ok=True)
-            full_path = file_location / tail
-            if full_path.exists():
+            full_path = repo_path / Path(file_details.file_path)
+            if index.exists(full_path):
                 _logger.info(f"Skipping {full_path} because file already exists")
             else:
-                full_path.write_text(file_details.file_content)
+                index.write_text(full_path, file_details.file_content)
@@ -1,11 +1,16 @@
 import logging
 import re
 from pathlib import Path
-from typing import List, Pattern
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
 
-from gator.constants import VERSION_V1_ALPHA
+from pydantic import validator
+
+from gator.constants import DEFAULT_REGEX_MODES, VERSION_V1_ALPHA
+from gator.resources.content import apply_replacements, compile_content_pattern
+from gator.resources.index import RepositoryIndex, get_repository_index
 from gator.resources.models import BaseModelForbidExtra, CodeChangeResource
-from gator.resources.util import get_recursive_path_contents
+from gator.resources.patterns import normalize_spec_paths
+from gator.resources.util import normalize_path
 
 _logger = logging.getLogger(__name__)
 
@@ -15,6 +20,17 @@ class RegexReplacementDetails(BaseModelForbidExtra):
     paths: List[str]
     replace_term: str
 
+    @validator("regex")
+    def prepare_regex(cls, regex: Pattern) -> Pattern:
+        # use the same flags as RegexFilter, and extract prefilter literals once
+        regex = re.compile(regex.pattern, flags=regex.flags | DEFAULT_REGEX_MODES)
+        compile_content_pattern(regex)
+        return regex
+
+    @validator("paths")
+    def normalize_paths(cls, paths: List[str]) -> List[str]:
+        return normalize_spec_paths(paths)
+
 
 class RegexReplaceCodeChangeV1AlphaSpec(BaseModelForbidExtra):
     replacement_details: List[RegexReplacementDetails]
@@ -24,26 +40,78 @@ class RegexReplaceCodeChangeV1Alpha(CodeChangeResource):
     kind = "RegexReplaceCodeChange"
     version = VERSION_V1_ALPHA
     spec: RegexReplaceCodeChangeV1AlphaSpec
+    uses_repository_index = True
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return [
+            path
+            for replacement_detail in self.spec.replacement_details
+            for path in replacement_detail.paths
+        ]
 
     def make_code_changes(self, repo_path: Path) -> None:
         """
         Code change logic for `RegexReplaceCodeChangeV1Alpha` resource.
 
+        Every file is read once, has all of the replacement details that apply to it
+        applied in memory in spec order, and is written once if its content changed.
         :param repo_path: The filepath where the repository content is located
         """
-        for replacement_detail in self.spec.replacement_details:
+        index = get_repository_index(repo_path)
+        plan = self._plan_replacements(index, repo_path)
+        replacements = [
+            (replacement_detail.regex, replacement_detail.replace_term)
+            for replacement_detail in self.spec.replacement_details
+        ]
+        if index.pool is not None:
+            changed: Iterable[Tuple[Path, bytes]] = index.pool.replace(
+                plan.values(), replacements, reader=index.read_content
+            )
+        else:
+            changed = self._apply_replacements(index, plan.values(), replacements)
+
+        for subpath, replaced in changed:
+            index.write_bytes(subpath, replaced)
+
+    def _plan_replacements(
+        self, index: RepositoryIndex, repo_path: Path
+    ) -> Dict[str, Tuple[Path, List[int]]]:
+        """
+        Group the replacement details that apply to each file.
+
+        A detail applies to a file at most once, even if several of its paths cover
+        the file, e.g. `.` and `app1/`.
+        :return: Files, keyed by normalised path in the order they are first reached,
+            and the indices of the replacement details that apply to them, in spec order.
+        """
+        plan: Dict[str, Tuple[Path, List[int]]] = {}
+        for detail_index, replacement_detail in enumerate(
+            self.spec.replacement_details
+        ):
             for specpath in replacement_detail.paths:
-                subpath_root = repo_path / specpath
                 try:
-                    for subpath, content in get_recursive_path_contents(subpath_root):
-                        replaced = re.sub(
-                            replacement_detail.regex,
-                            replacement_detail.replace_term,
-                            content,
-                        )
-                        if replaced != content:
-                            subpath.write_text(replaced)
+                    for subpath in index.iter_spec_path(specpath):
+                        detail_indices = plan.setdefault(
+                            normalize_path(subpath), (subpath, [])
+                        )[1]
+                        if detail_indices[-1:] != [detail_index]:
+                            detail_indices.append(detail_index)
                 except FileNotFoundError:
                     _logger.warning(
-                        f"Provided spec path does not exist in repo: {subpath_root}"
+                        f"Provided spec path does not exist in repo: {repo_path / specpath}"
                     )
+        return plan
+
+    @staticmethod
+    def _apply_replacements(
+        index: RepositoryIndex,
+        plan: Iterable[Tuple[Path, List[int]]],
+        replacements: List[Tuple[Pattern, str]],
+    ) -> Iterator[Tuple[Path, bytes]]:
+        for subpath, detail_indices in plan:
+            replaced = apply_replacements(
+                index.read_content(subpath),
+                [replacements[detail_index] for detail_index in detail_indices],
+            )
+            if replaced is not None:
+                yield subpath, replaced
@@ -1,9 +1,9 @@
 import logging
-import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from gator.constants import VERSION_V1_ALPHA
+from gator.resources.index import RepositoryIndex, get_repository_index
 from gator.resources.models import BaseModelForbidExtra, CodeChangeResource
 
 _logger = logging.getLogger(__name__)
@@ -18,6 +18,10 @@ class RemoveFileCodeChangeV1Alpha(CodeChangeResource):
     kind = "RemoveFileCodeChange"
     version = VERSION_V1_ALPHA
     spec: RemoveFileCodeChangeV1AlphaSpec
+    uses_repository_index = True
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return self.spec.files
 
     def make_code_changes(self, repo_path: Path) -> None:
         """
@@ -25,18 +29,20 @@ class RemoveFileCodeChangeV1Alpha(CodeChangeResource):
 
         :param repo_path: The filepath where the repository content is located.
         """
+        index = get_repository_index(repo_path)
         for file in self.spec.files:
             file_path = repo_path / Path(file)
             try:
-                file_path.unlink()
+                index.unlink(file_path)
             except FileNotFoundError:
                 _logger.info(f"Skipping {file_path} because file does not exist")
                 continue
-            self._remove_parent_directory_if_empty(file_path)
+            self._remove_parent_directory_if_empty(index, file_path)
 
     @staticmethod
-    def _remove_parent_directory_if_empty(file_path: Path) -> None:
-        head, _ = os.path.split(file_path)
-        head_path = Path(head)
-        if not list(head_path.iterdir()):
-            head_path.rmdir()
+    def _remove_parent_directory_if_empty(
+        index: RepositoryIndex, file_path: Path
+    ) -> None:
+        head_path = file_path.parent
+        if index.is_empty_dir(head_path):
+            index.rmdir(head_path)
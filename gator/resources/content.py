@@ -0,0 +1,302 @@
+"""
+Byte-oriented access to file content.
+
+Files are read as raw bytes, memory-mapped when they are large, and are only
+decoded when a pattern cannot be evaluated against the bytes directly. An
+ASCII-only pattern behaves identically on bytes and on decoded text as long as
+the content does not contain bytes that Unicode patterns treat specially, so
+most files are matched without ever being decoded or copied.
+
+Patterns are matched as if the content had universal newlines, as when files were
+read as text: `\r\n` and `\r` line endings are matched as `\n`, so that `$` matches
+before them. Replacements keep the original line endings around what they replace.
+"""
+import bisect
+import codecs
+import logging
+import mmap
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Pattern, Sequence, Tuple, Union
+
+from gator import metrics
+from gator.constants import BINARY_SNIFF_BYTES, MMAP_THRESHOLD_BYTES
+from gator.resources.prefilter import LiteralPrefilter
+
+_logger = logging.getLogger(__name__)
+
+Buffer = Union[bytes, mmap.mmap]
+
+# longest pattern label of regex metrics
+_PATTERN_LABEL_LENGTH = 100
+# \x1c-\x1f are whitespace for Unicode `\s` but not for bytes `\s`, and `\r` line
+# endings are only translated on the text path
+_NOT_BYTE_SAFE = re.compile(rb"[\r\x1c-\x1f\x80-\xff]")
+
+
+class FileContent:
+    """
+    Raw content of a single file, decoded to text only when required.
+
+    Text is decoded as UTF-8 without translating newlines, and `encode` restores the
+    byte order mark if the original content had one, so that content written back
+    keeps the original encoding and newlines. Patterns are matched against
+    `matched_text`, which has universal newlines.
+    """
+
+    def __init__(self, path: Path, data: Buffer):
+        self.path = path
+        self.data = data
+        self._is_binary: Optional[bool] = None
+        self._is_byte_safe: Optional[bool] = None
+        self._text: Optional[str] = None
+        self._matched_text: Optional[str] = None
+        self._decode_error: Optional[UnicodeDecodeError] = None
+
+    @classmethod
+    def read(cls, path: Path) -> "FileContent":
+        """
+        Read the content of the file at `path`, memory-mapping it if it is large.
+
+        :param path: File to read.
+        """
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            metrics.add("bytes_read", size)
+            if size >= MMAP_THRESHOLD_BYTES:
+                return cls(path, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            f.seek(0)
+            return cls(path, f.read())
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def has_bom(self) -> bool:
+        return self.data[: len(codecs.BOM_UTF8)] == codecs.BOM_UTF8
+
+    @property
+    def is_binary(self) -> bool:
+        """Whether the content looks binary, judged by a NUL byte in its first block."""
+        if self._is_binary is None:
+            self._is_binary = b"\x00" in self.data[:BINARY_SNIFF_BYTES]
+            if self._is_binary:
+                metrics.add("files_skipped", reason="binary")
+        return self._is_binary
+
+    @property
+    def is_byte_safe(self) -> bool:
+        """Whether ASCII patterns match this content as bytes exactly as they would as text."""
+        if self._is_byte_safe is None:
+            self._is_byte_safe = _NOT_BYTE_SAFE.search(self.data) is None
+        return self._is_byte_safe
+
+    def decode(self) -> str:
+        """
+        Decode the content to text.
+
+        :raises UnicodeDecodeError: If the content is not valid UTF-8.
+        """
+        if self._text is None:
+            if self._decode_error is not None:
+                raise self._decode_error
+            try:
+                self._text = codecs.decode(self.data, "utf-8-sig")
+            except UnicodeDecodeError as e:
+                self._decode_error = e
+                metrics.add("files_skipped", reason="undecodable")
+                raise
+        return self._text
+
+    @property
+    def text(self) -> Optional[str]:
+        """The decoded content, or None if it cannot be decoded (logged once)."""
+        if self._decode_error is not None:
+            return None
+        try:
+            return self.decode()
+        except UnicodeDecodeError as e:
+            _logger.warning(f"We could not decode text at path {self.path}: {e}")
+            return None
+
+    @property
+    def matched_text(self) -> Optional[str]:
+        """The decoded content with universal newlines, as patterns are matched against."""
+        if self._matched_text is None:
+            text = self.text
+            if text is None:
+                return None
+            self._matched_text = _universal_newlines(text)
+        return self._matched_text
+
+    def encode(self, text: str) -> bytes:
+        """
+        Encode `text` the same way the original content was encoded.
+
+        :param text: Replacement text for this file.
+        """
+        return codecs.encode(text, "utf-8-sig" if self.has_bom else "utf-8")
+
+
+class ContentPattern:
+    """
+    A compiled regular expression that can be evaluated against `FileContent`.
+
+    Content that does not contain any of the literals the pattern requires is
+    rejected by a substring search before the regex engine runs.
+
+    :param expression: The compiled text pattern.
+    """
+
+    def __init__(self, expression: Pattern):
+        self.expression = expression
+        # identifies the pattern in metrics
+        self.label = expression.pattern[:_PATTERN_LABEL_LENGTH]
+        self.prefilter = LiteralPrefilter.for_expression(expression)
+        self.binary_expression: Optional[Pattern] = None
+        if expression.pattern.isascii():
+            try:
+                self.binary_expression = re.compile(
+                    expression.pattern.encode("ascii"), expression.flags & ~re.UNICODE
+                )
+            except re.error:
+                # e.g. inline flags that are only valid for text patterns
+                pass
+
+    def _may_match(self, content: FileContent) -> bool:
+        return self.prefilter is None or self.prefilter.may_match(content.data)
+
+    def _use_bytes(self, content: FileContent) -> bool:
+        return self.binary_expression is not None and content.is_byte_safe
+
+    def search(self, content: FileContent) -> bool:
+        """
+        Determine if the pattern is present in `content`.
+
+        Binary and undecodable content never matches.
+        :param content: Content to search.
+        """
+        if content.is_binary or not self._may_match(content):
+            return False
+        # regex matching is CPU-bound, its wall time is enough
+        start = time.perf_counter()
+        try:
+            if self._use_bytes(content):
+                return (
+                    self.binary_expression.search(content.data)  # type: ignore
+                    is not None
+                )
+            text = content.matched_text
+            return text is not None and self.expression.search(text) is not None
+        finally:
+            metrics.add(
+                "regex_seconds", time.perf_counter() - start, pattern=self.label
+            )
+
+    def sub(self, replace_term: str, content: FileContent) -> Optional[bytes]:
+        """
+        Replace every occurrence of the pattern in `content`.
+
+        :param replace_term: Replacement template, as accepted by `re.sub`.
+        :param content: Content to replace in.
+        :return: The new, encoded content, or None if it would not change.
+        """
+        if content.is_binary or not self._may_match(content):
+            return None
+        start = time.perf_counter()
+        try:
+            return self._sub(replace_term, content)
+        finally:
+            metrics.add(
+                "regex_seconds", time.perf_counter() - start, pattern=self.label
+            )
+
+    def _sub(self, replace_term: str, content: FileContent) -> Optional[bytes]:
+        if self._use_bytes(content) and replace_term.isascii():
+            replaced, count = self.binary_expression.subn(  # type: ignore
+                replace_term.encode("ascii"), content.data
+            )
+            if not count or replaced == content.data[:]:
+                return None
+            return replaced
+
+        text = content.text
+        if text is None:
+            return None
+        if "\r" in text:
+            replaced_text, count = _sub_keeping_newlines(
+                self.expression, replace_term, text
+            )
+        else:
+            replaced_text, count = self.expression.subn(replace_term, text)
+        if not count or replaced_text == text:
+            return None
+        return content.encode(replaced_text)
+
+
+def _universal_newlines(text: str) -> str:
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _sub_keeping_newlines(
+    expression: Pattern, replace_term: str, text: str
+) -> Tuple[str, int]:
+    """
+    Replace as if `text` had universal newlines, keeping its line endings elsewhere.
+
+    Newlines within the replacements are written as the file's `\r\n` or `\r`.
+    :return: The new text, and the number of replacements made.
+    """
+    newline = "\r\n" if "\r\n" in text else "\r"
+    # position, in the translated text, of the `\n` each `\r\n` was shortened to
+    shortened = [
+        match.start() - count for count, match in enumerate(re.finditer("\r\n", text))
+    ]
+
+    def original(offset: int) -> int:
+        return offset + bisect.bisect_left(shortened, offset)
+
+    parts: List[str] = []
+    position = count = 0
+    for match in expression.finditer(_universal_newlines(text)):
+        start, end = original(match.start()), original(match.end())
+        parts.append(text[position:start])
+        parts.append(match.expand(replace_term).replace("\n", newline))
+        position = end
+        count += 1
+    parts.append(text[position:])
+    return "".join(parts), count
+
+
+@lru_cache(maxsize=512)
+def compile_content_pattern(expression: Pattern) -> ContentPattern:
+    """
+    Return the (cached) `ContentPattern` for a compiled text pattern.
+
+    :param expression: The compiled text pattern.
+    """
+    return ContentPattern(expression)
+
+
+def apply_replacements(
+    content: FileContent, replacements: Sequence[Tuple[Pattern, str]]
+) -> Optional[bytes]:
+    """
+    Apply replacements to `content` one after the other, in memory.
+
+    :param content: Original content of the file.
+    :param replacements: (pattern, replace term) pairs, in the order to apply them.
+    :return: The new, encoded content, or None if the content would not change.
+    """
+    current = content
+    for expression, replace_term in replacements:
+        replaced = compile_content_pattern(expression).sub(replace_term, current)
+        if replaced is not None:
+            current = FileContent(content.path, replaced)
+    if current is content or current.data == content.data[:]:
+        return None
+    return bytes(current.data)
@@ -0,0 +1,168 @@
+"""
+Combine filters with boolean logic.
+
+`AndFilter`, `OrFilter` and `NotFilter` hold other filters, of any kind, including
+other composite filters and custom filters, e.g.
+
+    kind: OrFilter
+    version: v1alpha
+    spec:
+      filters:
+        - kind: PathExistsFilter
+          version: v1alpha
+          spec:
+            paths: [setup.py]
+        - kind: RegexFilter
+          version: v1alpha
+          spec:
+            regex: python3\\.8
+            paths: [Dockerfile]
+
+Their filters are evaluated cheapest first, by estimated cost and the share of
+repositories each was seen to match, and evaluation stops as soon as the result is
+known, see `gator.resources.filters.selectivity`.
+"""
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+from pydantic import validator
+
+from gator.constants import VERSION_V1_ALPHA
+from gator.resources.build import _ResourceWithValidation
+from gator.resources.filters.evaluation import (
+    all_match,
+    any_match,
+    match_filter,
+    match_filter_tree,
+)
+from gator.resources.models import BaseModelForbidExtra, FilterResource
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.git_tree import GitTree
+
+
+def _check_filter(resource: object) -> FilterResource:
+    if not isinstance(resource, FilterResource):
+        raise ValueError(f"{type(resource).__name__} is not a filter")
+    return resource
+
+
+def _touched_paths(filters: Sequence[FilterResource]) -> Optional[List[str]]:
+    paths: List[str] = []
+    for filter_resource in filters:
+        filter_paths = filter_resource.touched_paths()
+        if filter_paths is None:
+            return None
+        paths.extend(filter_paths)
+    return paths
+
+
+class CompositeFilterV1AlphaSpec(BaseModelForbidExtra):
+    filters: List[_ResourceWithValidation]
+
+    @validator("filters")
+    def check_filters(cls, filters: List[FilterResource]) -> List[FilterResource]:
+        if not filters:
+            raise ValueError("At least one filter is required")
+        return [_check_filter(filter_resource) for filter_resource in filters]
+
+
+class AndFilterV1Alpha(FilterResource):
+
+    kind = "AndFilter"
+    version = VERSION_V1_ALPHA
+    spec: CompositeFilterV1AlphaSpec
+    supports_git_tree = True
+
+    @property
+    def filters(self) -> List[FilterResource]:
+        return self.spec.filters  # type: ignore
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return _touched_paths(self.filters)
+
+    def estimated_cost(self) -> float:
+        return sum(filter_resource.estimated_cost() for filter_resource in self.filters)
+
+    def matches(self, repo_path: Path) -> bool:
+        """
+        Determine if every one of the specified filters matches.
+
+        :param repo_path: The filepath where the repository content is located.
+        :return: Whether or not all of the filters matched
+        """
+        return all_match(self.filters, lambda f: match_filter(f, repo_path))
+
+    def matches_tree(self, tree: "GitTree") -> bool:
+        # filters that do not support trees are left to the checkout
+        return all_match(
+            [f for f in self.filters if f.supports_git_tree],
+            lambda f: match_filter_tree(f, tree),
+        )
+
+
+class OrFilterV1Alpha(FilterResource):
+
+    kind = "OrFilter"
+    version = VERSION_V1_ALPHA
+    spec: CompositeFilterV1AlphaSpec
+    supports_git_tree = True
+
+    @property
+    def filters(self) -> List[FilterResource]:
+        return self.spec.filters  # type: ignore
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return _touched_paths(self.filters)
+
+    def estimated_cost(self) -> float:
+        return sum(filter_resource.estimated_cost() for filter_resource in self.filters)
+
+    def matches(self, repo_path: Path) -> bool:
+        """
+        Determine if any of the specified filters matches.
+
+        :param repo_path: The filepath where the repository content is located.
+        :return: Whether or not any of the filters matched
+        """
+        return any_match(self.filters, lambda f: match_filter(f, repo_path))
+
+    def matches_tree(self, tree: "GitTree") -> bool:
+        if not all(f.supports_git_tree for f in self.filters):
+            # any filter left to the checkout may match
+            return True
+        return any_match(self.filters, lambda f: match_filter_tree(f, tree))
+
+
+class NotFilterV1AlphaSpec(BaseModelForbidExtra):
+    filter: _ResourceWithValidation
+
+    @validator("filter")
+    def check_filter(cls, filter_resource: FilterResource) -> FilterResource:
+        return _check_filter(filter_resource)
+
+
+class NotFilterV1Alpha(FilterResource):
+
+    kind = "NotFilter"
+    version = VERSION_V1_ALPHA
+    spec: NotFilterV1AlphaSpec
+
+    @property
+    def filter(self) -> FilterResource:
+        return self.spec.filter  # type: ignore
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return self.filter.touched_paths()
+
+    def estimated_cost(self) -> float:
+        return self.filter.estimated_cost()
+
+    def matches(self, repo_path: Path) -> bool:
+        """
+        Determine if the specified filter does not match.
+
+        :param repo_path: The filepath where the repository content is located.
+        :return: Whether or not the filter did not match
+        """
+        return not match_filter(self.filter, repo_path)
@@ -0,0 +1,299 @@
+"""
+Evaluate all of the filters of a changeset against a repository.
+
+Every built-in `RegexFilter` is evaluated in a single fused pass over the
+repository content, rather than one pass per filter, or answered from a
+`FilterResultStore` of previous results when one is given. Other filters,
+including custom filters, are evaluated through their own `matches`.
+
+Filters that support it can also be evaluated against a `GitTree`, so that
+repositories are filtered before they are checked out.
+
+Filters are evaluated cheapest first, by their `estimated_cost` and the share of
+repositories they were seen to match, so that content is only scanned when
+metadata filters do not already rule a repository out. Composite filters use
+`all_match` and `any_match` to order their own filters the same way.
+
+The filters of several changesets can be evaluated together, with
+`filter_sets_match`, so that a repository's content is scanned once for all of them.
+
+Every evaluation is observed by the registered resource hooks, see `gator.hooks`.
+"""
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, cast
+
+from gator.constants import CONTENT_FILTER_COST
+from gator.hooks import MATCHES, MATCHES_TREE, observed
+from gator.resources.filters.regex_filter import RegexFilterV1Alpha
+from gator.resources.filters.scan import scan_for_matches, scan_tree
+from gator.resources.filters.selectivity import FILTER_SELECTIVITY, rank
+from gator.resources.models import FilterResource
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.filters.store import FilterResultStore
+    from gator.resources.git_tree import GitTree
+
+
+def is_fusable(filter_resource: FilterResource) -> bool:
+    # subclasses may override `matches`, so only fuse the built-in class itself
+    return type(filter_resource) is RegexFilterV1Alpha
+
+
+def evaluate_filters(
+    filters: Sequence[FilterResource],
+    repo_path: Path,
+    store: Optional["FilterResultStore"] = None,
+) -> List[bool]:
+    """
+    Determine which of the given filters match the repository.
+
+    :param filters: Filters to evaluate.
+    :param repo_path: The filepath where the repository content is located.
+    :param store: Previous results of the built-in regex filters, to only re-scan
+        the files that changed since; updated with the new results.
+    :return: Whether or not each filter matched, in the order of `filters`.
+    """
+    results = [False] * len(filters)
+
+    fused_positions = [
+        position
+        for position, filter_resource in enumerate(filters)
+        if is_fusable(filter_resource)
+    ]
+    fused_filters = [
+        cast(RegexFilterV1Alpha, filters[position]) for position in fused_positions
+    ]
+    if fused_filters:
+        with observed(fused_filters, MATCHES, repo_path):
+            if store is not None:
+                fused_results = store.evaluate(fused_filters, repo_path)
+            else:
+                fused_results = scan_for_matches(
+                    repo_path,
+                    [
+                        (regex_filter.expression, regex_filter.spec.paths)
+                        for regex_filter in fused_filters
+                    ],
+                )
+        for position, matched in zip(fused_positions, fused_results):
+            results[position] = matched
+            FILTER_SELECTIVITY.record(filters[position], matched)
+
+    for position, filter_resource in enumerate(filters):
+        if not is_fusable(filter_resource):
+            results[position] = match_filter(filter_resource, repo_path)
+
+    return results
+
+
+def filters_match(
+    filters: Sequence[FilterResource],
+    repo_path: Path,
+    store: Optional["FilterResultStore"] = None,
+) -> bool:
+    """
+    Determine whether every one of the given filters matches the repository.
+
+    Stops evaluating as soon as the result is known.
+    :param filters: Filters to evaluate.
+    :param repo_path: The filepath where the repository content is located.
+    :param store: Previous results of the built-in regex filters, see `evaluate_filters`.
+    """
+    return filter_sets_match([filters], repo_path, store)[0]
+
+
+def filter_sets_match(
+    filter_sets: Sequence[Sequence[FilterResource]],
+    repo_path: Path,
+    store: Optional["FilterResultStore"] = None,
+) -> List[bool]:
+    """
+    Determine, for each set of filters, whether every one of its filters matches.
+
+    The built-in regex filters of every set are evaluated in a single fused pass, and
+    filters shared by several sets only once. Filters cheaper than a content scan are
+    evaluated first, so that sets they rule out are not scanned for, and other filters
+    of a set are only evaluated while its result is not known yet, see `_match_sets`.
+    :param filter_sets: Filters to evaluate, e.g. those of several changesets.
+    :param repo_path: The filepath where the repository content is located.
+    :param store: Previous results of the built-in regex filters, see `evaluate_filters`.
+    :return: Whether or not every filter of each set matched, in the order of
+        `filter_sets`.
+    """
+    unique: List[FilterResource] = []
+    positions = [[_position(unique, f) for f in filters] for filters in filter_sets]
+    return _match_sets(
+        unique,
+        positions,
+        lambda filter_resource: match_filter(filter_resource, repo_path),
+        lambda fused: evaluate_filters(fused, repo_path, store),
+    )
+
+
+def _match_sets(
+    unique: List[FilterResource],
+    positions: List[List[int]],
+    evaluate: Callable[[FilterResource], bool],
+    evaluate_fused: Callable[[List[FilterResource]], List[bool]],
+) -> List[bool]:
+    """
+    Determine, for each set of positions in `unique`, whether all of its filters match.
+
+    Filters cheaper than a content scan are evaluated first, in rank order, then the
+    fused regex filters of every set they did not rule out in a single pass, then
+    the remaining filters of each set, in rank order, until one does not match.
+    :param unique: The filters of every set, each only once.
+    :param positions: Positions in `unique` of the filters of each set.
+    :param evaluate: Evaluate a filter that is not fused.
+    :param evaluate_fused: Evaluate the fused filters in a single pass.
+    """
+    results: Dict[int, bool] = {}
+
+    def matched(position: int) -> bool:
+        if position not in results:
+            results[position] = evaluate(unique[position])
+        return results[position]
+
+    def all_matched(set_positions: List[int]) -> bool:
+        ranked = rank(set_positions, unique.__getitem__, deciding=False)
+        return all(matched(p) for p in ranked)
+
+    ruled_out = [
+        not all_matched(
+            [
+                p
+                for p in set_positions
+                if unique[p].estimated_cost() < CONTENT_FILTER_COST
+            ]
+        )
+        for set_positions in positions
+    ]
+    fused = sorted(
+        {
+            p
+            for set_positions, out in zip(positions, ruled_out)
+            if not out
+            for p in set_positions
+            if is_fusable(unique[p])
+        }
+    )
+    if fused:
+        results.update(zip(fused, evaluate_fused([unique[p] for p in fused])))
+
+    # fused results are known already, so check them before evaluating other filters
+    return [
+        not out
+        and all(results.get(p, True) for p in set_positions)
+        and all_matched(set_positions)
+        for set_positions, out in zip(positions, ruled_out)
+    ]
+
+
+def all_match(
+    filters: Sequence[FilterResource], evaluate: Callable[[FilterResource], bool]
+) -> bool:
+    """
+    Determine whether every one of the filters matches, evaluating them in rank order.
+
+    Stops at the first filter that does not match, see `gator.resources.filters.selectivity`.
+    :param filters: Filters to evaluate.
+    :param evaluate: Evaluate a filter, e.g. with `match_filter`.
+    """
+    return all(evaluate(f) for f in rank(filters, lambda f: f, deciding=False))
+
+
+def any_match(
+    filters: Sequence[FilterResource], evaluate: Callable[[FilterResource], bool]
+) -> bool:
+    """
+    Determine whether any of the filters matches, evaluating them in rank order.
+
+    Stops at the first filter that matches, see `gator.resources.filters.selectivity`.
+    :param filters: Filters to evaluate.
+    :param evaluate: Evaluate a filter, e.g. with `match_filter`.
+    """
+    return any(evaluate(f) for f in rank(filters, lambda f: f, deciding=True))
+
+
+def _position(unique: List[FilterResource], filter_resource: FilterResource) -> int:
+    """Return the position of `filter_resource` in `unique`, appending it if it is new."""
+    for position, seen in enumerate(unique):
+        # resources are pydantic models, which compare equal if their fields do
+        if type(seen) is type(filter_resource) and seen == filter_resource:
+            return position
+    unique.append(filter_resource)
+    return len(unique) - 1
+
+
+def match_filter(filter_resource: FilterResource, repo_path: Path) -> bool:
+    """
+    Determine whether a single filter matches the repository.
+
+    The evaluation is observed by the registered resource hooks, and recorded in
+    `FILTER_SELECTIVITY`.
+    """
+    with observed([filter_resource], MATCHES, repo_path):
+        matched = filter_resource.matches(repo_path)
+    FILTER_SELECTIVITY.record(filter_resource, matched)
+    return matched
+
+
+def match_filter_tree(filter_resource: FilterResource, tree: "GitTree") -> bool:
+    """
+    Determine whether a single filter that supports git trees matches the tree.
+
+    As for `match_filter`, the evaluation is observed and recorded.
+    """
+    with observed([filter_resource], MATCHES_TREE, tree.root):
+        matched = filter_resource.matches_tree(tree)
+    FILTER_SELECTIVITY.record(filter_resource, matched)
+    return matched
+
+
+def filters_match_tree(filters: Sequence[FilterResource], tree: "GitTree") -> bool:
+    """
+    Determine whether the filters that support git trees all match the tree.
+
+    Filters that do not set `supports_git_tree` are skipped, so a repository that
+    passes must still be checked out and evaluated against every filter.
+    :param filters: Filters to evaluate.
+    :param tree: The repository's tree, read from the object database.
+    :return: False if any filter evaluated against the tree did not match.
+    """
+    return filter_sets_match_tree([filters], tree)[0]
+
+
+def filter_sets_match_tree(
+    filter_sets: Sequence[Sequence[FilterResource]], tree: "GitTree"
+) -> List[bool]:
+    """
+    Determine, for each set of filters, whether its filters that support git trees all match.
+
+    As for `filter_sets_match`, the built-in regex filters of every set are scanned
+    for in a single pass over the tree, and shared filters are only evaluated once.
+    :param filter_sets: Filters to evaluate, e.g. those of several changesets.
+    :param tree: The repository's tree, read from the object database.
+    :return: False for each set with a filter evaluated against the tree that did
+        not match, in the order of `filter_sets`.
+    """
+    unique: List[FilterResource] = []
+    positions = [
+        [_position(unique, f) for f in filters if f.supports_git_tree]
+        for filters in filter_sets
+    ]
+
+    def evaluate_fused(fused: List[FilterResource]) -> List[bool]:
+        regex_filters = cast(List[RegexFilterV1Alpha], fused)
+        scans = [(f.expression, f.spec.paths) for f in regex_filters]
+        with observed(regex_filters, MATCHES_TREE, tree.root):
+            fused_results = scan_tree(tree, scans)
+        for regex_filter, matched in zip(regex_filters, fused_results):
+            FILTER_SELECTIVITY.record(regex_filter, matched)
+        return fused_results
+
+    return _match_sets(
+        unique,
+        positions,
+        lambda filter_resource: match_filter_tree(filter_resource, tree),
+        evaluate_fused,
+    )
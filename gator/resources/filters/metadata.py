@@ -0,0 +1,263 @@
+"""
+Filters that only look at the paths and sizes of a repository's files.
+
+None of them read file content, so they are much cheaper to evaluate than a
+`RegexFilter`, and are evaluated before it, see `gator.resources.filters.evaluation`.
+Like other filters, they list files through the repository's shared
+`RepositoryIndex`, honouring its ignore files, or through a `GitTree`.
+"""
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Union
+
+from pydantic import root_validator, validator
+
+from gator.constants import LISTING_FILTER_COST, STAT_FILTER_COST, VERSION_V1_ALPHA
+from gator.resources.index import RepositoryIndex, get_repository_index
+from gator.resources.models import BaseModelForbidExtra, FilterResource
+from gator.resources.patterns import SpecPath, has_glob, normalize_spec_paths
+from gator.resources.util import normalize_path
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.git_tree import GitTree
+
+_logger = logging.getLogger(__name__)
+
+# file extensions of each language a LanguageFilter recognises
+LANGUAGE_EXTENSIONS: Dict[str, List[str]] = {
+    "c": [".c", ".h"],
+    "cpp": [".cc", ".cpp", ".cxx", ".hh", ".hpp", ".hxx"],
+    "csharp": [".cs"],
+    "css": [".css", ".less", ".sass", ".scss"],
+    "go": [".go"],
+    "html": [".htm", ".html"],
+    "java": [".java"],
+    "javascript": [".cjs", ".js", ".jsx", ".mjs"],
+    "json": [".json"],
+    "kotlin": [".kt", ".kts"],
+    "markdown": [".md", ".markdown"],
+    "php": [".php"],
+    "python": [".py", ".pyi"],
+    "ruby": [".rb"],
+    "rust": [".rs"],
+    "scala": [".scala", ".sc"],
+    "shell": [".bash", ".sh", ".zsh"],
+    "sql": [".sql"],
+    "swift": [".swift"],
+    "terraform": [".tf", ".tfvars"],
+    "typescript": [".ts", ".tsx"],
+    "yaml": [".yaml", ".yml"],
+}
+
+# a repository's working tree, or its tree read from the object database
+FileSource = Union[RepositoryIndex, "GitTree"]
+
+
+def _selected_files(source: FileSource, root: Path, spec_path: str) -> Iterator[Path]:
+    """Generate the files selected by a spec path, which may contain globs."""
+    spec = SpecPath(root, spec_path)
+    try:
+        for path in source.iter_files(spec.root):
+            if spec.covers(normalize_path(path)):
+                yield path
+    except FileNotFoundError:
+        _logger.debug(f"Provided spec path {spec.root} does not exist")
+
+
+class PathExistsFilterV1AlphaSpec(BaseModelForbidExtra):
+    paths: List[str]
+
+    @validator("paths")
+    def normalize_paths(cls, paths: List[str]) -> List[str]:
+        for path in paths:
+            if has_glob(path):
+                raise ValueError(
+                    f"Path {path!r} is a glob, use a GlobFilter to match globs"
+                )
+        return normalize_spec_paths(paths)
+
+
+class PathExistsFilterV1Alpha(FilterResource):
+
+    kind = "PathExistsFilter"
+    version = VERSION_V1_ALPHA
+    spec: PathExistsFilterV1AlphaSpec
+    supports_git_tree = True
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return self.spec.paths
+
+    def estimated_cost(self) -> float:
+        return STAT_FILTER_COST
+
+    def matches(self, repo_path: Path) -> bool:
+        """
+        Determine if any of the specified files or directories exists.
+
+        :param repo_path: The filepath where the repository content is located.
+        :return: Whether or not any of the paths exists
+        """
+        index = get_repository_index(repo_path)
+        return any(index.exists(repo_path / path) for path in self.spec.paths)
+
+    def matches_tree(self, tree: "GitTree") -> bool:
+        return any(tree.exists(tree.root / path) for path in self.spec.paths)
+
+
+class GlobFilterV1AlphaSpec(BaseModelForbidExtra):
+    paths: List[str]
+
+    @validator("paths")
+    def normalize_paths(cls, paths: List[str]) -> List[str]:
+        return normalize_spec_paths(paths)
+
+
+class GlobFilterV1Alpha(FilterResource):
+
+    kind = "GlobFilter"
+    version = VERSION_V1_ALPHA
+    spec: GlobFilterV1AlphaSpec
+    supports_git_tree = True
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return self.spec.paths
+
+    def estimated_cost(self) -> float:
+        return LISTING_FILTER_COST
+
+    def matches(self, repo_path: Path) -> bool:
+        """
+        Determine if any file is selected by the specified paths, which may contain globs.
+
+        :param repo_path: The filepath where the repository content is located.
+        :return: Whether or not any file was selected
+        """
+        return self._matches(get_repository_index(repo_path), repo_path)
+
+    def matches_tree(self, tree: "GitTree") -> bool:
+        return self._matches(tree, tree.root)
+
+    def _matches(self, source: FileSource, root: Path) -> bool:
+        return any(
+            next(_selected_files(source, root, path), None) is not None
+            for path in self.spec.paths
+        )
+
+
+class FileSizeFilterV1AlphaSpec(BaseModelForbidExtra):
+    paths: List[str]
+    min_bytes: Optional[int]
+    max_bytes: Optional[int]
+
+    @validator("paths")
+    def normalize_paths(cls, paths: List[str]) -> List[str]:
+        return normalize_spec_paths(paths)
+
+    @validator("min_bytes", "max_bytes")
+    def check_not_negative(cls, size: Optional[int]) -> Optional[int]:
+        if size is not None and size < 0:
+            raise ValueError(f"Size must not be negative, got {size}")
+        return size
+
+    @root_validator(skip_on_failure=True)
+    def check_bounds(cls, values):
+        min_bytes, max_bytes = values.get("min_bytes"), values.get("max_bytes")
+        if min_bytes is None and max_bytes is None:
+            raise ValueError("At least one of min_bytes and max_bytes is required")
+        if min_bytes is not None and max_bytes is not None and min_bytes > max_bytes:
+            raise ValueError(f"min_bytes {min_bytes} is greater than max_bytes")
+        return values
+
+
+class FileSizeFilterV1Alpha(FilterResource):
+
+    kind = "FileSizeFilter"
+    version = VERSION_V1_ALPHA
+    spec: FileSizeFilterV1AlphaSpec
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return self.spec.paths
+
+    def estimated_cost(self) -> float:
+        return LISTING_FILTER_COST
+
+    def matches(self, repo_path: Path) -> bool:
+        """
+        Determine if any file selected by the specified paths is within the size bounds.
+
+        Bounds are inclusive. Sizes are read from the files' stat info only.
+        :param repo_path: The filepath where the repository content is located.
+        :return: Whether or not any selected file was within the bounds
+        """
+        index = get_repository_index(repo_path)
+        return any(
+            self._within_bounds(index, file_path)
+            for path in self.spec.paths
+            for file_path in _selected_files(index, repo_path, path)
+        )
+
+    def _within_bounds(self, index: RepositoryIndex, file_path: Path) -> bool:
+        result = index.stat(file_path)
+        if result is None:
+            return False
+        return (
+            self.spec.min_bytes is None or result.st_size >= self.spec.min_bytes
+        ) and (self.spec.max_bytes is None or result.st_size <= self.spec.max_bytes)
+
+
+class LanguageFilterV1AlphaSpec(BaseModelForbidExtra):
+    languages: List[str]
+    paths: List[str] = ["."]
+
+    @validator("languages", each_item=True)
+    def check_language(cls, language: str) -> str:
+        language = language.lower()
+        if language not in LANGUAGE_EXTENSIONS:
+            raise ValueError(
+                f"Unknown language {language!r}, expected one of "
+                f"{', '.join(LANGUAGE_EXTENSIONS)}"
+            )
+        return language
+
+    @validator("paths")
+    def normalize_paths(cls, paths: List[str]) -> List[str]:
+        return normalize_spec_paths(paths)
+
+
+class LanguageFilterV1Alpha(FilterResource):
+
+    kind = "LanguageFilter"
+    version = VERSION_V1_ALPHA
+    spec: LanguageFilterV1AlphaSpec
+    supports_git_tree = True
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return self.spec.paths
+
+    def estimated_cost(self) -> float:
+        return LISTING_FILTER_COST
+
+    def matches(self, repo_path: Path) -> bool:
+        """
+        Determine if any file of the specified languages is present.
+
+        Languages are recognised by file extension, see `LANGUAGE_EXTENSIONS`.
+        :param repo_path: The filepath where the repository content is located.
+        :return: Whether or not a file of any of the languages was present
+        """
+        return self._matches(get_repository_index(repo_path), repo_path)
+
+    def matches_tree(self, tree: "GitTree") -> bool:
+        return self._matches(tree, tree.root)
+
+    def _matches(self, source: FileSource, root: Path) -> bool:
+        extensions = {
+            extension
+            for language in self.spec.languages
+            for extension in LANGUAGE_EXTENSIONS[language]
+        }
+        return any(
+            file_path.suffix.lower() in extensions
+            for path in self.spec.paths
+            for file_path in _selected_files(source, root, path)
+        )
@@ -1,25 +1,55 @@
-import logging
 import re
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Pattern
+
+from pydantic import PrivateAttr, validator
 
 from gator.constants import DEFAULT_REGEX_MODES
+from gator.resources.content import compile_content_pattern
+from gator.resources.filters.scan import scan_for_matches, scan_tree
 from gator.resources.models import BaseModelForbidExtra, FilterResource
-from gator.resources.util import get_recursive_path_contents
+from gator.resources.patterns import normalize_spec_paths
 
-_logger = logging.getLogger(__name__)
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.git_tree import GitTree
 
 
 class RegexFilterV1AlphaSpec(BaseModelForbidExtra):
     regex: str
     paths: List[str]
 
+    @validator("regex")
+    def compile_regex(cls, regex: str) -> str:
+        # compile, and extract prefilter literals, once when the spec is built
+        try:
+            compile_content_pattern(re.compile(regex, flags=DEFAULT_REGEX_MODES))
+        except re.error as e:
+            raise ValueError(f"Invalid regex {regex!r}: {e}")
+        return regex
+
+    @validator("paths")
+    def normalize_paths(cls, paths: List[str]) -> List[str]:
+        return normalize_spec_paths(paths)
+
 
 class RegexFilterV1Alpha(FilterResource):
 
     kind = "RegexFilter"
     version = "v1alpha"
     spec: RegexFilterV1AlphaSpec
+    supports_git_tree = True
+    _expression: Pattern = PrivateAttr()
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._expression = re.compile(self.spec.regex, flags=DEFAULT_REGEX_MODES)
+
+    @property
+    def expression(self) -> Pattern:
+        return self._expression
+
+    def touched_paths(self) -> Optional[List[str]]:
+        return self.spec.paths
 
     def matches(self, path: Path) -> bool:
         """
@@ -31,15 +61,7 @@ class RegexFilterV1Alpha(FilterResource):
         :param path: The Github repository to perform the match against.
         :return: Whether or not the match was present
         """
+        return scan_for_matches(path, [(self.expression, self.spec.paths)])[0]
 
-        expression = re.compile(self.spec.regex, flags=DEFAULT_REGEX_MODES)
-        for search_path in [path / spec_path for spec_path in self.spec.paths]:
-            try:
-                for _, content in get_recursive_path_contents(search_path):
-                    # short circuit if there is a single match
-                    if expression.search(content):
-                        return True
-            except FileNotFoundError:
-                _logger.debug(f"Provided spec path {search_path} does not exist")
-
-        return False
+    def matches_tree(self, tree: "GitTree") -> bool:
+        return scan_tree(tree, [(self.expression, self.spec.paths)])[0]
@@ -0,0 +1,272 @@
+"""
+Scan repository content for many regular expressions in a single pass.
+
+Every file covered by the spec paths of any pattern is read at most once, and
+only the patterns that cover the file and have not matched yet are run against
+its raw content. Binary files are never matched. Content is read from a working
+tree through a `RepositoryIndex`, or straight from the object database through a
+`GitTree`.
+"""
+import logging
+import os
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from gator.resources.content import ContentPattern, FileContent, compile_content_pattern
+from gator.resources.index import RepositoryIndex, get_repository_index
+from gator.resources.patterns import SpecPath
+from gator.resources.util import normalize_path
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.git_tree import GitTree
+
+
+_logger = logging.getLogger(__name__)
+
+# A compiled pattern and the spec paths, relative to the repository, it applies to
+PatternScan = Tuple[Pattern, Sequence[str]]
+
+
+class _Coverage:
+    """
+    Group scans by the spec paths they cover.
+
+    :param repo_path: The filepath where the repository content is located.
+    :param scans: Scans to group.
+    """
+
+    def __init__(self, repo_path: Path, scans: Sequence[PatternScan]):
+        self.literal: Dict[str, List[int]] = {}
+        self.globs: List[Tuple[SpecPath, int]] = []
+        roots: Dict[str, Path] = {}
+        for scan_index, (_, spec_paths) in enumerate(scans):
+            for spec_path in spec_paths:
+                spec = SpecPath(repo_path, spec_path)
+                roots.setdefault(spec.root_key, spec.root)
+                if spec.is_glob:
+                    self.globs.append((spec, scan_index))
+                    continue
+                scan_indices = self.literal.setdefault(spec.root_key, [])
+                if scan_index not in scan_indices:
+                    scan_indices.append(scan_index)
+
+        # a search root nested under another one is walked after it, for the files
+        # the outer walk leaves out, e.g. those of an explicitly listed ignored directory
+        self.roots = sorted(roots.values(), key=lambda path: len(path.parts))
+        self.nested = any(
+            other != key and key.startswith(other.rstrip(os.sep) + os.sep)
+            for key in roots
+            for other in roots
+        )
+
+    def covering_scans(self, file_path: Path, root_key: str) -> List[int]:
+        """Return the indices of the scans that cover a file found under `root_key`."""
+        key = file_key = normalize_path(file_path)
+        scan_indices: List[int] = []
+        walked: Set[str] = set()
+        while True:
+            walked.add(key)
+            scan_indices.extend(self.literal.get(key, ()))
+            parent = os.path.dirname(key)
+            if key == root_key or parent == key:
+                break
+            key = parent
+        # like literal paths, globs only cover files their own root's walk reaches
+        scan_indices.extend(
+            scan_index
+            for spec, scan_index in self.globs
+            if spec.root_key in walked and spec.covers(file_key)
+        )
+        return scan_indices
+
+
+def _covered_files(
+    iter_files: Callable[[Path], Iterable[Path]], coverage: _Coverage
+) -> Iterator[Tuple[Path, str]]:
+    """
+    Generate the files under every coverage root, with the key of the root walked.
+
+    A file under nested roots is generated once, for the outermost root listing it.
+    """
+    generated: Set[str] = set()
+    for root in coverage.roots:
+        root_key = normalize_path(root)
+        try:
+            for file_path in iter_files(root):
+                if coverage.nested:
+                    key = normalize_path(file_path)
+                    if key in generated:
+                        continue
+                    generated.add(key)
+                yield file_path, root_key
+        except FileNotFoundError:
+            _logger.debug(f"Provided spec path {root} does not exist")
+
+
+def scan_for_matches(
+    repo_path: Path,
+    scans: Sequence[PatternScan],
+    matched_files: Optional[List[Optional[Path]]] = None,
+) -> List[bool]:
+    """
+    Determine which patterns are present in the content under their spec paths.
+
+    :param repo_path: The filepath where the repository content is located.
+    :param scans: (pattern, spec paths) pairs to evaluate. Spec paths may contain globs.
+    :param matched_files: If given, one entry per scan, which is set to a file the
+        scan's pattern matched in.
+    :return: Whether or not each pattern matched, in the order of `scans`.
+    """
+    results = [False] * len(scans)
+    if not scans:
+        return results
+
+    index = get_repository_index(repo_path)
+    coverage = _Coverage(repo_path, scans)
+    if index.pool is not None:
+        index.pool.search(
+            _candidates(index, coverage, results),
+            [expression for expression, _ in scans],
+            results,
+            reader=index.read_content,
+            matched_files=matched_files,
+        )
+        return results
+
+    patterns = [compile_content_pattern(expression) for expression, _ in scans]
+    _scan_files(
+        index.read_content,
+        _covered_files(index.iter_files, coverage),
+        patterns,
+        coverage,
+        results,
+        matched_files,
+    )
+    return results
+
+
+def scan_files(
+    repo_path: Path, scans: Sequence[PatternScan], file_paths: Iterable[Path]
+) -> List[Optional[Path]]:
+    """
+    Search only the given files for patterns, as `scan_for_matches` would.
+
+    A file is only searched if a full scan would have found it: it exists, is
+    covered by a scan's spec paths, and is not ignored.
+    :param repo_path: The filepath where the repository content is located.
+    :param scans: (pattern, spec paths) pairs to evaluate. Spec paths may contain globs.
+    :param file_paths: Files to search, e.g. those changed since a previous scan.
+    :return: A file each scan's pattern matched in, or None, in the order of `scans`.
+    """
+    matched_files: List[Optional[Path]] = [None] * len(scans)
+    if not scans:
+        return matched_files
+
+    index = get_repository_index(repo_path)
+    coverage = _Coverage(repo_path, scans)
+    patterns = [compile_content_pattern(expression) for expression, _ in scans]
+    results = [False] * len(scans)
+    file_paths = list(file_paths)
+
+    def iter_listed(root: Path) -> List[Path]:
+        return [path for path in file_paths if index.is_listed(path, root)]
+
+    _scan_files(
+        index.read_content,
+        _covered_files(iter_listed, coverage),
+        patterns,
+        coverage,
+        results,
+        matched_files,
+    )
+    return matched_files
+
+
+def scan_tree(tree: "GitTree", scans: Sequence[PatternScan]) -> List[bool]:
+    """
+    Determine which patterns are present in a git tree, as `scan_for_matches` would.
+
+    :param tree: The tree to scan, read from the object database.
+    :param scans: (pattern, spec paths) pairs to evaluate. Spec paths may contain globs.
+    :return: Whether or not each pattern matched, in the order of `scans`.
+    """
+    results = [False] * len(scans)
+    if not scans:
+        return results
+
+    coverage = _Coverage(tree.root, scans)
+    patterns = [compile_content_pattern(expression) for expression, _ in scans]
+    _scan_files(
+        tree.read_content,
+        _covered_files(tree.iter_files, coverage),
+        patterns,
+        coverage,
+        results,
+        None,
+    )
+    return results
+
+
+def _candidates(
+    index: RepositoryIndex, coverage: _Coverage, results: List[bool]
+) -> Iterator[Tuple[Path, List[int]]]:
+    """
+    Generate the files to scan, and the scans that still need to be run against them.
+
+    Scans are filtered against `results` as files are generated, so scans that
+    matched in the meantime are not handed out again.
+    """
+    for file_path, root_key in _covered_files(index.iter_files, coverage):
+        scan_indices = [
+            scan_index
+            for scan_index in coverage.covering_scans(file_path, root_key)
+            if not results[scan_index]
+        ]
+        if scan_indices:
+            yield file_path, scan_indices
+
+
+def _scan_files(
+    read_content: Callable[[Path], FileContent],
+    file_paths: Iterable[Tuple[Path, str]],
+    patterns: Sequence[ContentPattern],
+    coverage: _Coverage,
+    results: List[bool],
+    matched_files: Optional[List[Optional[Path]]],
+) -> None:
+    """
+    Scan files found under coverage roots, recording matches in `results`.
+
+    :param file_paths: Files, and the key of the coverage root they were found under.
+    """
+    for file_path, root_key in file_paths:
+        scan_indices = [
+            scan_index
+            for scan_index in coverage.covering_scans(file_path, root_key)
+            if not results[scan_index]
+        ]
+        if not scan_indices:
+            continue
+
+        content = read_content(file_path)
+        for scan_index in scan_indices:
+            # a scan may cover the file through more than one spec path
+            if not results[scan_index] and patterns[scan_index].search(content):
+                results[scan_index] = True
+                if matched_files is not None:
+                    matched_files[scan_index] = file_path
+        if all(results):
+            # short circuit once every pattern has matched
+            return
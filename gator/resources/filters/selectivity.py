@@ -0,0 +1,83 @@
+"""
+Order filters by how cheaply they are expected to decide a result.
+
+Every filter evaluation is recorded in `FILTER_SELECTIVITY`, so that the share of
+repositories each filter matches is learned over a run. Filters that must all
+match are evaluated cheapest first per chance of not matching, and filters of
+which any must match cheapest first per chance of matching, so that expensive
+content scans only run when cheaper filters do not already decide the result.
+
+Observations are kept per process: each process stage worker learns from the
+repositories it evaluates.
+"""
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple, TypeVar
+
+from gator.resources.models import FilterResource
+
+_T = TypeVar("_T")
+
+
+def filter_key(filter_resource: FilterResource) -> Tuple[str, str]:
+    """Identify a filter by its class and definition, across equal instances."""
+    return type(filter_resource).__qualname__, filter_resource.json(sort_keys=True)
+
+
+class FilterSelectivity:
+    """Counts of the repositories each filter was evaluated against, and matched."""
+
+    def __init__(self) -> None:
+        # key -> (evaluated, matched)
+        self._counts: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, filter_resource: FilterResource, matched: bool) -> None:
+        key = filter_key(filter_resource)
+        with self._lock:
+            evaluated, matches = self._counts.get(key, (0, 0))
+            self._counts[key] = (evaluated + 1, matches + matched)
+
+    def match_rate(self, filter_resource: FilterResource) -> float:
+        """
+        Estimate the chance of the filter matching a repository.
+
+        Smoothed, so that filters never evaluated yet are given even chances, and
+        no filter is ever considered certain to match or not to.
+        """
+        with self._lock:
+            evaluated, matches = self._counts.get(filter_key(filter_resource), (0, 0))
+        return (matches + 1) / (evaluated + 2)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+# aggregated over every filter evaluated in the process
+FILTER_SELECTIVITY = FilterSelectivity()
+
+
+def expected_cost(filter_resource: FilterResource, deciding: bool) -> float:
+    """
+    Estimate the cost of evaluating the filter, per chance of it deciding a result.
+
+    :param filter_resource: The filter.
+    :param deciding: The result that decides: False when all filters must match,
+        True when any filter must.
+    """
+    rate = FILTER_SELECTIVITY.match_rate(filter_resource)
+    return filter_resource.estimated_cost() / (rate if deciding else 1 - rate)
+
+
+def rank(
+    items: Sequence[_T], filter_of: Callable[[_T], FilterResource], deciding: bool
+) -> List[_T]:
+    """
+    Order items by the expected cost of their filter, see `expected_cost`.
+
+    Items of equal expected cost keep their order.
+    :param items: e.g. filters, or their positions in a list of filters.
+    :param filter_of: Return the filter of an item.
+    :param deciding: The result that decides, see `expected_cost`.
+    """
+    return sorted(items, key=lambda item: expected_cost(filter_of(item), deciding))
@@ -0,0 +1,292 @@
+"""
+Persist `RegexFilter` results across runs, to re-scan only what changed.
+
+Results are stored in SQLite, per repository and per filter, together with the
+git tree they were computed against and a file the filter matched in. When a
+repository is evaluated again:
+
+- a filter whose tree is HEAD's tree is answered from the store, without scanning
+- otherwise, only the files in `git diff-tree` between the stored tree and HEAD's
+  are scanned. A filter that did not match before matches now if, and only if, one
+  of those files matches. A filter that matched before still matches if the file
+  it matched in did not change, or one of the changed files matches.
+- a filter is scanned in full if it is not in the store, if the file it matched in
+  changed and no changed file matches, if the stored tree is no longer available,
+  or if an ignore file changed
+
+The store only applies to clean working trees at the root of a git repository,
+since the diff is taken between commits. Other repositories are scanned in full
+and nothing is stored.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Union
+
+from git import GitCommandError, InvalidGitRepositoryError, NoSuchPathError, Repo
+
+from gator.constants import DEFAULT_REGEX_MODES, IGNORE_FILE_NAMES
+from gator.resources.filters.regex_filter import RegexFilterV1Alpha
+from gator.resources.filters.scan import scan_files, scan_for_matches
+from gator.resources.util import normalize_path, scrub_url
+
+_logger = logging.getLogger(__name__)
+
+# bumped whenever stored results may no longer be valid, e.g. scan semantics change
+STORE_FORMAT = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS filter_results (
+    repository TEXT NOT NULL,
+    filter_hash TEXT NOT NULL,
+    tree TEXT NOT NULL,
+    matched_file TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (repository, filter_hash)
+)
+"""
+
+
+class FilterRecord(NamedTuple):
+    """
+    A stored filter result.
+
+    :param tree: SHA of the git tree the result was computed against.
+    :param matched_file: Path, relative to the repository root, of a file the
+        filter matched in, or None if it did not match.
+    """
+
+    tree: str
+    matched_file: Optional[str]
+
+
+def filter_hash(regex_filter: RegexFilterV1Alpha) -> str:
+    """
+    Identify a filter by its definition.
+
+    Equal filters of different changesets therefore share results.
+    """
+    definition = (
+        f"{STORE_FORMAT}:{int(DEFAULT_REGEX_MODES)}:{regex_filter.json(sort_keys=True)}"
+    )
+    return hashlib.sha256(definition.encode("utf-8")).hexdigest()
+
+
+def _is_ignore_file(path: str) -> bool:
+    return path.rsplit("/", 1)[-1] in IGNORE_FILE_NAMES
+
+
+class FilterResultStore:
+    """
+    SQLite store of `RegexFilter` results.
+
+    Safe to share between threads and processes: each thread opens its own
+    connection, and a store pickles as its path.
+    :param path: Database file; created if missing.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def __getstate__(self) -> Dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state["path"])  # type: ignore
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=60)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def load(self, repository: str, hashes: Sequence[str]) -> Dict[str, FilterRecord]:
+        """
+        Look up stored results.
+
+        :param repository: Identifies the repository, e.g. its remote URL.
+        :param hashes: `filter_hash` of each filter to look up.
+        :return: The stored results, by filter hash.
+        """
+        records: Dict[str, FilterRecord] = {}
+        for filter_key in set(hashes):
+            row = self._connection.execute(
+                "SELECT tree, matched_file FROM filter_results "
+                "WHERE repository = ? AND filter_hash = ?",
+                (repository, filter_key),
+            ).fetchone()
+            if row is not None:
+                records[filter_key] = FilterRecord(*row)
+        return records
+
+    def save(self, repository: str, records: Dict[str, FilterRecord]) -> None:
+        """
+        Store results, replacing any previous results of the same filters.
+
+        :param repository: Identifies the repository, e.g. its remote URL.
+        :param records: Results, by filter hash.
+        """
+        now = time.time()
+        with self._connection as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO filter_results "
+                "(repository, filter_hash, tree, matched_file, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (repository, key, record.tree, record.matched_file, now)
+                    for key, record in records.items()
+                ],
+            )
+
+    def evaluate(
+        self, filters: Sequence[RegexFilterV1Alpha], repo_path: Path
+    ) -> List[bool]:
+        """
+        Determine which filters match, scanning only what changed since the last run.
+
+        :param filters: Built-in regex filters to evaluate.
+        :param repo_path: The filepath where the repository content is located.
+        :return: Whether or not each filter matched, in the order of `filters`.
+        """
+        repo = _clean_repository(repo_path)
+        if repo is None:
+            return scan_for_matches(repo_path, _scans(filters))
+
+        tree = repo.git.rev_parse("HEAD^{tree}")
+        repository = _repository_key(repo, repo_path)
+        hashes = [filter_hash(f) for f in filters]
+        evaluation = _Evaluation(repo, repo_path, filters, tree)
+        evaluation.update(self.load(repository, hashes), hashes)
+        self.save(repository, evaluation.records(hashes))
+        return [matched_file is not None for matched_file in evaluation.matched_files]
+
+
+def _scans(filters: Sequence[RegexFilterV1Alpha]):
+    return [(f.expression, f.spec.paths) for f in filters]
+
+
+def _clean_repository(repo_path: Path) -> Optional[Repo]:
+    """Return the repository at `repo_path`, if it is the root of a clean working tree."""
+    try:
+        # not searching parent directories, so `repo_path` is the root
+        repo = Repo(repo_path)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        return None
+    if repo.bare or not repo.head.is_valid():
+        return None
+    if repo.is_dirty(untracked_files=True):
+        return None
+    return repo
+
+
+def _repository_key(repo: Repo, repo_path: Path) -> str:
+    # per-run checkouts of the same repository share results through its remote URL
+    if "origin" in repo.remotes:
+        return scrub_url(repo.remotes.origin.url)
+    return normalize_path(repo_path)
+
+
+class _Evaluation:
+    """Results of evaluating filters against HEAD's tree, filled in from stored results first."""
+
+    def __init__(
+        self,
+        repo: Repo,
+        repo_path: Path,
+        filters: Sequence[RegexFilterV1Alpha],
+        tree: str,
+    ):
+        self.repo = repo
+        self.repo_path = repo_path
+        self.filters = filters
+        self.tree = tree
+        self.matched_files: List[Optional[str]] = [None] * len(filters)
+
+    def update(self, stored: Dict[str, FilterRecord], hashes: List[str]) -> None:
+        full_scan: List[int] = []
+        by_tree: Dict[str, List[int]] = {}
+        for position, key in enumerate(hashes):
+            record = stored.get(key)
+            if record is None:
+                full_scan.append(position)
+            elif record.tree == self.tree:
+                self.matched_files[position] = record.matched_file
+            else:
+                by_tree.setdefault(record.tree, []).append(position)
+
+        for old_tree, positions in by_tree.items():
+            full_scan.extend(self._rescan_changed(old_tree, positions, stored, hashes))
+        self._scan(full_scan)
+
+    def _rescan_changed(
+        self,
+        old_tree: str,
+        positions: List[int],
+        stored: Dict[str, FilterRecord],
+        hashes: List[str],
+    ) -> List[int]:
+        """Re-scan the files changed since `old_tree`, returning the filters still unknown."""
+        changed = self._changed_paths(old_tree)
+        if changed is None or any(_is_ignore_file(path) for path in changed):
+            return positions
+
+        _logger.debug(f"Re-scanning {len(changed)} changed files of {self.repo_path}")
+        matched_files = scan_files(
+            self.repo_path,
+            _scans([self.filters[position] for position in positions]),
+            [self.repo_path / path for path in sorted(changed)],
+        )
+        unknown = []
+        for position, matched_file in zip(positions, matched_files):
+            previous = stored[hashes[position]].matched_file
+            if matched_file is not None:
+                self.matched_files[position] = self._relative(matched_file)
+            elif previous is not None and previous not in changed:
+                self.matched_files[position] = previous
+            elif previous is not None:
+                # the only known match changed, others may exist among unchanged files
+                unknown.append(position)
+        return unknown
+
+    def _changed_paths(self, old_tree: str) -> Optional[Set[str]]:
+        try:
+            output = self.repo.git.diff_tree(
+                "-r", "-z", "--name-only", "--no-renames", old_tree, self.tree
+            )
+        except GitCommandError:
+            # e.g. a shallow clone, which does not have the old tree
+            return None
+        return {path for path in output.split("\0") if path}
+
+    def _scan(self, positions: List[int]) -> None:
+        if not positions:
+            return
+        matched_files: List[Optional[Path]] = [None] * len(positions)
+        scan_for_matches(
+            self.repo_path,
+            _scans([self.filters[position] for position in positions]),
+            matched_files,
+        )
+        for position, matched_file in zip(positions, matched_files):
+            if matched_file is not None:
+                self.matched_files[position] = self._relative(matched_file)
+
+    def _relative(self, path: Path) -> str:
+        relative = os.path.relpath(normalize_path(path), normalize_path(self.repo_path))
+        return relative.replace(os.sep, "/")
+
+    def records(self, hashes: List[str]) -> Dict[str, FilterRecord]:
+        return {
+            key: FilterRecord(self.tree, matched_file)
+            for key, matched_file in zip(hashes, self.matched_files)
+        }
@@ -0,0 +1,221 @@
+"""
+Read repository content straight from the git object database, without a checkout.
+
+A `GitTree` lists every file of a commit's tree with a single `git ls-tree`, and
+reads blobs through a long-lived `git cat-file --batch` process, so one process
+serves every read. Listings follow `RepositoryIndex.iter_files`: the tree's
+`.gitignore` and `.gatorignore` files are honoured, symlinks to files within the
+tree are followed, and other symlinks and submodules are left out.
+"""
+import bisect
+import logging
+import posixpath
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from git import GitCommandError, Repo
+
+from gator.constants import IGNORE_FILE_NAMES
+from gator.resources.content import FileContent
+from gator.resources.ignore import IgnoreRules
+from gator.resources.util import normalize_path
+
+_logger = logging.getLogger(__name__)
+
+_SYMLINK_MODE = "120000"
+
+
+class GitTree:
+    """
+    Read-only view of the files of a commit, read from a repository's objects.
+
+    Paths are presented as if the tree were checked out at `root`, so that spec
+    paths resolve the same way they do against a working tree. Use as a context
+    manager, or call `close`, to stop the `git cat-file` process.
+    :param git_dir: The repository, bare or not, e.g. a mirror.
+    :param treeish: The commit or tree to read.
+    """
+
+    def __init__(self, git_dir: Union[str, Path], treeish: str = "HEAD"):
+        self.root = Path(git_dir)
+        self.treeish = treeish
+        self._root_key = normalize_path(git_dir)
+        self._repo = Repo(git_dir)
+        # the cat-file process is shared, so reads must not interleave
+        self._lock = threading.Lock()
+        self._blobs: Optional[Dict[str, str]] = None
+        self._paths: List[str] = []
+        self._rules: Dict[str, Optional[IgnoreRules]] = {}
+        self._ignored_dirs: Dict[str, bool] = {}
+
+    def __enter__(self) -> "GitTree":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the `git cat-file` process."""
+        self._repo.close()
+
+    def _relative_path(self, path: Union[str, Path]) -> Optional[str]:
+        key = normalize_path(path)
+        if key == self._root_key:
+            return ""
+        prefix = self._root_key.rstrip("/") + "/"
+        if key.startswith(prefix):
+            return key[len(prefix) :]
+        return None
+
+    def _read_blob(self, sha: str) -> bytes:
+        with self._lock:
+            return self._repo.git.get_object_data(sha)[3]
+
+    @property
+    def blobs(self) -> Dict[str, str]:
+        """Object SHA of every file in the tree, by `/` separated relative path."""
+        return self._load()
+
+    def _load(self) -> Dict[str, str]:
+        if self._blobs is None:
+            self._blobs = self._list_blobs()
+            self._paths = sorted(self._blobs)
+        return self._blobs
+
+    def _list_blobs(self) -> Dict[str, str]:
+        try:
+            output = self._repo.git.ls_tree("-r", "-z", "--full-tree", self.treeish)
+        except GitCommandError:
+            # e.g. an empty repository, without any commit
+            _logger.debug(f"No tree to read at {self.treeish} in {self.root}")
+            return {}
+
+        blobs: Dict[str, str] = {}
+        symlinks: List[Tuple[str, str]] = []
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            info, path = entry.split("\t", 1)
+            mode, object_type, sha = info.split(" ")
+            if object_type != "blob":
+                continue
+            if mode == _SYMLINK_MODE:
+                symlinks.append((path, sha))
+            else:
+                blobs[path] = sha
+
+        self._resolve_symlinks(blobs, symlinks)
+        return blobs
+
+    def _resolve_symlinks(
+        self, blobs: Dict[str, str], symlinks: List[Tuple[str, str]]
+    ) -> None:
+        """List symlinks to files as those files; symlinks to directories are not followed."""
+        for path, sha in symlinks:
+            target = self._read_blob(sha).decode("utf-8", errors="replace")
+            resolved = posixpath.normpath(
+                posixpath.join(posixpath.dirname(path), target)
+            )
+            if resolved in blobs:
+                blobs[path] = blobs[resolved]
+
+    def exists(self, path: Union[str, Path]) -> bool:
+        """Determine whether `path` is a file or directory of the tree."""
+        relative = self._relative_path(path)
+        if relative is None:
+            return False
+        if relative in self.blobs or not relative:
+            return True
+        return self._first_below(relative + "/") is not None
+
+    def _first_below(self, prefix: str) -> Optional[int]:
+        self._load()
+        position = bisect.bisect_left(self._paths, prefix)
+        if position < len(self._paths) and self._paths[position].startswith(prefix):
+            return position
+        return None
+
+    def iter_files(self, target_path: Union[str, Path]) -> Iterator[Path]:
+        """
+        Generate all file paths recursively present in provided target_path.
+
+        :param target_path: File or directory to list.
+        :raises FileNotFoundError: If target_path is not in the tree.
+        :return: Generate file paths, rooted at `root`.
+        """
+        relative = self._relative_path(target_path)
+        if relative is not None and relative in self.blobs:
+            yield self.root / relative
+            return
+        prefix = f"{relative}/" if relative else ""
+        position = self._first_below(prefix) if relative is not None else None
+        if position is None:
+            raise FileNotFoundError(f"No such file or directory: '{target_path}'")
+
+        depth = prefix.count("/")
+        for path in self._paths[position:]:
+            if not path.startswith(prefix):
+                break
+            if not self._is_ignored(path, depth):
+                yield self.root / path
+
+    def _is_ignored(self, path: str, depth: int) -> bool:
+        """Whether `path` is ignored, when listing from the directory `depth` levels down."""
+        segments = path.split("/")
+        # like a walk, only directories below where the listing starts are pruned
+        for end in range(depth + 1, len(segments)):
+            if self._is_ignored_dir("/".join(segments[:end])):
+                return True
+        rules = self._ignore_rules(posixpath.dirname(path))
+        return rules is not None and rules.is_ignored(path, is_dir=False)
+
+    def _is_ignored_dir(self, directory: str) -> bool:
+        try:
+            return self._ignored_dirs[directory]
+        except KeyError:
+            pass
+        rules = self._ignore_rules(posixpath.dirname(directory))
+        ignored = rules is not None and rules.is_ignored(directory, is_dir=True)
+        self._ignored_dirs[directory] = ignored
+        return ignored
+
+    def _ignore_rules(self, directory: str) -> Optional[IgnoreRules]:
+        try:
+            return self._rules[directory]
+        except KeyError:
+            pass
+        parent = None
+        if directory:
+            parent = self._ignore_rules(posixpath.dirname(directory))
+        contents = {}
+        for file_name in IGNORE_FILE_NAMES:
+            path = posixpath.join(directory, file_name)
+            sha = self.blobs.get(path)
+            if sha is not None:
+                contents[path] = self._read_blob(sha).decode("utf-8", errors="replace")
+        rules = IgnoreRules.for_contents(contents, directory, parent)
+        self._rules[directory] = rules
+        return rules
+
+    def read_content(self, path: Union[str, Path]) -> FileContent:
+        """
+        Return the raw content of the file at `path`.
+
+        :param path: File to read, rooted at `root`.
+        :raises FileNotFoundError: If there is no such file in the tree.
+        """
+        relative = self._relative_path(path)
+        sha = self.blobs.get(relative) if relative is not None else None
+        if sha is None:
+            raise FileNotFoundError(f"No such file: '{path}'")
+        return FileContent(Path(path), self._read_blob(sha))
+
+    def read_text(self, path: Union[str, Path]) -> str:
+        """
+        Return the decoded content of the file at `path`.
+
+        :param path: File to read, rooted at `root`.
+        :raises UnicodeDecodeError: If the file content is not valid text.
+        """
+        return self.read_content(path).decode()
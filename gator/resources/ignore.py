@@ -0,0 +1,145 @@
+"""
+Honour `.gitignore` and `.gatorignore` files while walking a repository.
+
+Rules follow gitignore semantics: the last matching pattern wins, patterns in
+deeper directories take precedence over those in their parents, `!` negates a
+pattern, and a trailing `/` only matches directories.
+"""
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Pattern
+
+from gator.constants import IGNORE_FILE_NAMES
+from gator.resources.patterns import translate_glob
+
+_logger = logging.getLogger(__name__)
+
+
+class _IgnorePattern(NamedTuple):
+    regex: Pattern
+    negated: bool
+    directory_only: bool
+
+
+def _parse_line(line: str) -> Optional[_IgnorePattern]:
+    line = line.rstrip("\r\n")
+    # trailing spaces are ignored unless they are escaped
+    while line.endswith(" ") and not line.endswith("\\ "):
+        line = line[:-1]
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    directory_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    anchored = "/" in line
+    prefix = "" if anchored else "(?:.*/)?"
+    regex = re.compile(f"{prefix}{translate_glob(line.lstrip('/'))}")
+    return _IgnorePattern(regex, negated, directory_only)
+
+
+def _read_patterns(ignore_file: Path) -> List[_IgnorePattern]:
+    try:
+        content = ignore_file.read_text(errors="replace")
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return []
+    return _parse_patterns(content, str(ignore_file))
+
+
+def _parse_patterns(content: str, source: str) -> List[_IgnorePattern]:
+    patterns = []
+    for line in content.splitlines():
+        try:
+            pattern = _parse_line(line)
+        except re.error:
+            _logger.warning(f"Invalid pattern {line!r} in {source}")
+            continue
+        if pattern is not None:
+            patterns.append(pattern)
+    return patterns
+
+
+class IgnoreRules:
+    """
+    Ignore patterns that apply within a directory, including inherited ones.
+
+    :param base: The directory the patterns were read from, as a `/` separated
+        path relative to the root of the walk ("" for the root itself).
+    :param patterns: Patterns read from the ignore files in `base`.
+    :param parent: Rules inherited from the parent directories.
+    """
+
+    def __init__(
+        self,
+        base: str = "",
+        patterns: Optional[List[_IgnorePattern]] = None,
+        parent: Optional["IgnoreRules"] = None,
+    ):
+        self.base = base
+        self.patterns = patterns or []
+        self.parent = parent
+
+    @classmethod
+    def for_directory(
+        cls, directory: Path, base: str, parent: Optional["IgnoreRules"]
+    ) -> Optional["IgnoreRules"]:
+        """
+        Build the rules that apply within `directory`.
+
+        :param directory: Directory that may contain ignore files.
+        :param base: `directory` relative to the root of the walk.
+        :param parent: Rules that apply within the parent directory.
+        :return: The new rules, or `parent` if `directory` has no ignore files.
+        """
+        patterns = []
+        for file_name in IGNORE_FILE_NAMES:
+            patterns.extend(_read_patterns(directory / file_name))
+        if not patterns:
+            return parent
+        return cls(base, patterns, parent)
+
+    @classmethod
+    def for_contents(
+        cls, contents: Dict[str, str], base: str, parent: Optional["IgnoreRules"]
+    ) -> Optional["IgnoreRules"]:
+        """
+        Build the rules that apply within a directory from its ignore files' content.
+
+        Used where there is no directory on disk, e.g. when reading a git tree.
+        :param contents: Content of each ignore file of the directory, by file path.
+        :param base: The directory relative to the root of the walk.
+        :param parent: Rules that apply within the parent directory.
+        :return: The new rules, or `parent` if there are no patterns.
+        """
+        patterns = []
+        for source, content in contents.items():
+            patterns.extend(_parse_patterns(content, source))
+        if not patterns:
+            return parent
+        return cls(base, patterns, parent)
+
+    def is_ignored(self, relative_path: str, is_dir: bool) -> bool:
+        """
+        Determine whether a path is ignored.
+
+        :param relative_path: `/` separated path relative to the root of the walk.
+        :param is_dir: Whether the path is a directory.
+        """
+        rules: Optional[IgnoreRules] = self
+        while rules is not None:
+            path = relative_path
+            if rules.base:
+                path = relative_path[len(rules.base) + 1 :]
+            for pattern in reversed(rules.patterns):
+                if pattern.directory_only and not is_dir:
+                    continue
+                if pattern.regex.fullmatch(path):
+                    return not pattern.negated
+            rules = rules.parent
+        return False
@@ -0,0 +1,494 @@
+"""
+Define a per-repository index of file paths, stat info and file content.
+
+A single `RepositoryIndex` is shared by every filter and code change that runs
+against a repository, so that the directory tree is listed and each file is
+read at most once per run, no matter how many resources query it.
+"""
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from stat import S_IMODE, S_ISDIR
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from cachetools import LRUCache
+
+from gator import metrics
+from gator.constants import DEFAULT_CONTENT_CACHE_BYTES, IGNORE_FILE_NAMES
+from gator.resources.content import FileContent
+from gator.resources.ignore import IgnoreRules
+from gator.resources.overlay import Overlay
+from gator.resources.parallel import FileWorkerPool
+from gator.resources.patterns import SpecPath
+from gator.resources.util import list_directory, normalize_path, stat_path
+
+_logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+_ACTIVE_INDEXES: Dict[str, "RepositoryIndex"] = {}
+_ACTIVE_INDEXES_LOCK = threading.Lock()
+
+
+def _replace_file(path: Path, content: bytes, mode: int) -> None:
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.chmod(temp_path, S_IMODE(mode))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class _DirectoryListing:
+    __slots__ = ("dirs", "files")
+
+    def __init__(self, dirs: List[str], files: List[str]):
+        self.dirs = dirs
+        self.files = files
+
+
+class RepositoryIndex:
+    """
+    Snapshot of a repository's file tree with lazily loaded, cached content.
+
+    Directory listings and stat results are cached the first time they are
+    requested, and file content is cached in a size-bounded LRU. Writes and
+    deletions made through the index keep these caches coherent; changes made
+    behind its back must be reported with `invalidate`. With an `Overlay`, writes
+    and deletions are recorded in memory instead of being made on disk.
+    """
+
+    def __init__(
+        self,
+        root: PathLike,
+        content_cache_bytes: int = DEFAULT_CONTENT_CACHE_BYTES,
+        respect_ignore_files: bool = True,
+        pool: Optional[FileWorkerPool] = None,
+        overlay: Optional[Overlay] = None,
+    ):
+        self.root = Path(root)
+        self.respect_ignore_files = respect_ignore_files
+        # when set, resources process this repository's files on the pool's workers
+        self.pool = pool
+        # when set, changes are recorded in the overlay and disk is never written
+        self.overlay = overlay
+        self._root_key = normalize_path(root)
+        self._rules: Dict[str, Optional[IgnoreRules]] = {}
+        self._listings: Dict[str, _DirectoryListing] = {}
+        self._stats: Dict[str, Optional[os.stat_result]] = {}
+        self._content: LRUCache = LRUCache(maxsize=content_cache_bytes, getsizeof=len)
+        self._lock = threading.RLock()
+        # keys of the paths written, removed or invalidated through the index, or
+        # None once everything was invalidated and the changed paths are unknown
+        self._changed_paths: Optional[Set[str]] = set()
+
+    def stat(self, path: PathLike) -> Optional[os.stat_result]:
+        """
+        Return the (cached) stat result for `path`, or None if it does not exist.
+
+        :param path: Path to stat.
+        """
+        key = normalize_path(path)
+        try:
+            return self._stats[key]
+        except KeyError:
+            pass
+        if self.overlay is not None:
+            result = self.overlay.stat(key)
+        else:
+            result = stat_path(key)
+        self._stats[key] = result
+        return result
+
+    def exists(self, path: PathLike) -> bool:
+        return self.stat(path) is not None
+
+    def is_dir(self, path: PathLike) -> bool:
+        result = self.stat(path)
+        return result is not None and S_ISDIR(result.st_mode)
+
+    def _relative_path(self, key: str) -> Optional[str]:
+        if key == self._root_key:
+            return ""
+        if key.startswith(self._root_key.rstrip(os.sep) + os.sep):
+            return key[len(self._root_key.rstrip(os.sep)) + 1 :].replace(os.sep, "/")
+        return None
+
+    def _ignore_rules(self, key: str) -> Optional[IgnoreRules]:
+        try:
+            return self._rules[key]
+        except KeyError:
+            pass
+        relative_path = self._relative_path(key)
+        rules = None
+        if relative_path is not None:
+            parent_rules = None
+            if relative_path:
+                parent_rules = self._ignore_rules(os.path.dirname(key))
+            rules = IgnoreRules.for_directory(Path(key), relative_path, parent_rules)
+        self._rules[key] = rules
+        return rules
+
+    def _listing(self, key: str) -> _DirectoryListing:
+        try:
+            return self._listings[key]
+        except KeyError:
+            pass
+        rules = self._ignore_rules(key) if self.respect_ignore_files else None
+        relative_path = self._relative_path(key)
+        list_fn = (
+            list_directory if self.overlay is None else self.overlay.list_directory
+        )
+        dirs, files = list_fn(
+            Path(key), "" if relative_path is None else relative_path, rules
+        )
+        metrics.add("files_walked", len(files))
+        listing = _DirectoryListing(dirs, files)
+        self._listings[key] = listing
+        return listing
+
+    def iter_files(self, target_path: PathLike) -> Iterator[Path]:
+        """
+        Generate all file paths recursively present in provided target_path.
+
+        Note: ignores contents of the `.git` directory, and paths ignored by the
+        `.gitignore` and `.gatorignore` files of the repository.
+        :param target_path: File or directory to list.
+        :raises FileNotFoundError: If target_path does not exist.
+        :return: Generate file paths, rooted at target_path.
+        """
+        target_path = Path(target_path)
+        if not self.exists(target_path):
+            raise FileNotFoundError(f"No such file or directory: '{target_path}'")
+        if not self.is_dir(target_path):
+            yield target_path
+            return
+
+        stack = [target_path]
+        while stack:
+            directory = stack.pop()
+            listing = self._listing(normalize_path(directory))
+            for name in listing.files:
+                yield directory / name
+            stack.extend(directory / name for name in reversed(listing.dirs))
+
+    def is_listed(self, path: PathLike, target_path: PathLike) -> bool:
+        """
+        Determine whether `iter_files(target_path)` generates the file at `path`.
+
+        Only the directories between `target_path` and the file are listed.
+        :param path: File to look for.
+        :param target_path: File or directory that would be listed.
+        """
+        key, target_key = normalize_path(path), normalize_path(target_path)
+        if key == target_key:
+            return self.exists(key) and not self.is_dir(key)
+        if not key.startswith(target_key.rstrip(os.sep) + os.sep):
+            return False
+        if not self.is_dir(target_key):
+            return False
+
+        segments = key[len(target_key.rstrip(os.sep)) + 1 :].split(os.sep)
+        directory = target_key
+        for segment in segments[:-1]:
+            if segment not in self._listing(directory).dirs:
+                return False
+            directory = os.path.join(directory, segment)
+        return segments[-1] in self._listing(directory).files
+
+    def iter_spec_path(self, spec_path: str) -> Iterator[Path]:
+        """
+        Generate all file paths selected by a spec path, which may contain globs.
+
+        :param spec_path: Path relative to the repository root, e.g. `**/requirements*.txt`.
+        :raises FileNotFoundError: If the literal part of spec_path does not exist.
+        :return: Generate file paths, rooted at the repository root.
+        """
+        spec = SpecPath(self.root, spec_path)
+        for path in self.iter_files(spec.root):
+            if not spec.is_glob or spec.covers(normalize_path(path)):
+                yield path
+
+    def read_content(self, path: PathLike) -> FileContent:
+        """
+        Return the raw content of the file at `path`, reading it from disk at most once.
+
+        :param path: File to read.
+        """
+        key = normalize_path(path)
+        with self._lock:
+            # looking up an LRU entry reorders it, so this must not race other threads
+            content = self._content.get(key)
+        if content is not None:
+            return content
+        if self.overlay is not None:
+            content = self.overlay.read(key, Path(path))
+        else:
+            content = FileContent.read(Path(path))
+        with self._lock:
+            try:
+                self._content[key] = content
+            except ValueError:
+                # larger than the whole cache, don't keep it around
+                pass
+        return content
+
+    def read_text(self, path: PathLike) -> str:
+        """
+        Return the decoded content of the file at `path`.
+
+        :param path: File to read.
+        :raises UnicodeDecodeError: If the file content is not valid text.
+        """
+        return self.read_content(path).decode()
+
+    def get_text(self, path: PathLike) -> Optional[str]:
+        """
+        Return the content of the file at `path`, or None if it is binary or cannot be decoded.
+
+        :param path: File to read.
+        """
+        content = self.read_content(path)
+        if content.is_binary:
+            _logger.debug(f"Skipping binary file at path {path}")
+            return None
+        return content.text
+
+    def iter_contents(self, target_path: PathLike) -> Iterator[Tuple[Path, str]]:
+        """
+        Generate file content for all files recursively present in provided target_path.
+
+        Files that cannot be decoded are skipped.
+        :param target_path: Path to recursively scan for content.
+        :raises FileNotFoundError: If target_path does not exist.
+        :return: Generate (Path, str) tuples containing path and content at path.
+        """
+        for path in self.iter_files(target_path):
+            content = self.get_text(path)
+            if content is not None:
+                yield path, content
+
+    def write_text(self, path: PathLike, content: str) -> None:
+        """
+        Write `content` to `path` as UTF-8, creating parent directories as needed.
+
+        :param path: File to write.
+        :param content: New file content.
+        """
+        self.write_bytes(path, content.encode("utf-8"))
+
+    def write_bytes(self, path: PathLike, content: bytes) -> None:
+        """
+        Write `content` to `path`, creating parent directories as needed.
+
+        Existing files are replaced atomically, so that readers, including memory
+        mappings of the previous content, never observe a partially written file.
+        :param path: File to write.
+        :param content: New file content.
+        """
+        path = Path(path)
+        with self._lock:
+            missing_dirs = []
+            parent = path.parent
+            while not self.exists(parent):
+                missing_dirs.append(parent)
+                parent = parent.parent
+            existing = self.stat(path)
+            if self.overlay is not None:
+                for created_dir in reversed(missing_dirs):
+                    self.overlay.make_dir(normalize_path(created_dir))
+                self.overlay.write(normalize_path(path), content, existing)
+            elif existing is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(content)
+                metrics.add("files_written")
+            else:
+                _replace_file(path, content, existing.st_mode)
+                metrics.add("files_written")
+
+            for created_dir in reversed(missing_dirs):
+                self._stats.pop(normalize_path(created_dir), None)
+                self._add_to_listing(created_dir, is_dir=True)
+                self._listings[normalize_path(created_dir)] = _DirectoryListing([], [])
+            if existing is None:
+                self._add_to_listing(path, is_dir=False)
+            self.invalidate(path)
+
+    def unlink(self, path: PathLike) -> None:
+        """
+        Remove the file at `path`.
+
+        :param path: File to remove.
+        :raises FileNotFoundError: If there is no file at `path`.
+        """
+        path = Path(path)
+        with self._lock:
+            if self.overlay is None:
+                path.unlink()
+                metrics.add("files_removed")
+            elif self.exists(path):
+                self.overlay.remove_file(normalize_path(path))
+            else:
+                raise FileNotFoundError(f"No such file or directory: '{path}'")
+            self._remove_from_listing(path)
+            self.invalidate(path)
+
+    def rmdir(self, path: PathLike) -> None:
+        """
+        Remove the empty directory at `path`.
+
+        :param path: Directory to remove.
+        """
+        path = Path(path)
+        with self._lock:
+            if self.overlay is None:
+                path.rmdir()
+            else:
+                self.overlay.remove_dir(normalize_path(path))
+            self._remove_from_listing(path)
+            self._listings.pop(normalize_path(path), None)
+            self.invalidate(path)
+
+    def is_empty_dir(self, path: PathLike) -> bool:
+        """
+        Determine whether `path` is a directory without any entries.
+
+        Unlike the cached listings, this also takes `.git` into account.
+        """
+        if self.overlay is not None:
+            return self.overlay.is_empty_dir(normalize_path(path))
+        with os.scandir(normalize_path(path)) as entries:
+            return next(entries, None) is None
+
+    def invalidate(self, path: Optional[PathLike] = None) -> None:
+        """
+        Drop cached information about `path`, or about everything if no path is given.
+
+        Code changes that modify files without going through this index must call
+        this so that later resources do not observe stale content. `path` is
+        recorded as changed, see `changed_files`; without a path, which files
+        changed is no longer known.
+        :param path: The file or directory that changed.
+        """
+        with self._lock:
+            if path is None:
+                self._changed_paths = None
+                self._listings.clear()
+                self._rules.clear()
+                self._stats.clear()
+                self._content.clear()
+                return
+            key = normalize_path(path)
+            if self._changed_paths is not None:
+                self._changed_paths.add(key)
+            self._stats.pop(key, None)
+            self._content.pop(key, None)
+            if os.path.basename(key) in IGNORE_FILE_NAMES:
+                # ignore rules changed, listings may now include or exclude anything
+                self._listings.clear()
+                self._rules.clear()
+                return
+            if key in self._listings:
+                # a directory changed underneath us, forget everything below it
+                prefix = key + os.sep
+                for cached_key in [k for k in self._listings if k.startswith(prefix)]:
+                    del self._listings[cached_key]
+                del self._listings[key]
+                self._stats.pop(os.path.dirname(key), None)
+
+    def changed_files(self) -> Optional[List[str]]:
+        """
+        Return the paths written, removed or invalidated through the index.
+
+        :return: `/` separated paths relative to the root, sorted, or None if the
+            whole index was invalidated, see `invalidate`.
+        """
+        with self._lock:
+            if self._changed_paths is None:
+                return None
+            return sorted(
+                relative
+                for relative in map(self._relative_path, self._changed_paths)
+                if relative
+            )
+
+    def _add_to_listing(self, path: Path, is_dir: bool) -> None:
+        listing = self._listings.get(normalize_path(path.parent))
+        if listing is None:
+            return
+        names = listing.dirs if is_dir else listing.files
+        if path.name not in names:
+            names.append(path.name)
+
+    def _remove_from_listing(self, path: Path) -> None:
+        listing = self._listings.get(normalize_path(path.parent))
+        if listing is None:
+            return
+        for names in (listing.dirs, listing.files):
+            if path.name in names:
+                names.remove(path.name)
+
+
+def get_repository_index(repo_path: PathLike) -> RepositoryIndex:
+    """
+    Return the index shared by all resources running against `repo_path`.
+
+    Outside of `repository_index`, a fresh, unshared index is returned, so that
+    resources behave the same whether or not they are run as part of a Gator run.
+    :param repo_path: The filepath where the repository content is located.
+    """
+    index = _ACTIVE_INDEXES.get(normalize_path(repo_path))
+    if index is None:
+        index = RepositoryIndex(repo_path)
+    return index
+
+
+@contextmanager
+def repository_index(
+    repo_path: PathLike,
+    workers: int = 1,
+    use_processes: bool = True,
+    dry_run: bool = False,
+) -> Iterator[RepositoryIndex]:
+    """
+    Share a single `RepositoryIndex` for `repo_path` for the duration of the context.
+
+    :param repo_path: The filepath where the repository content is located.
+    :param workers: Number of workers to process the repository's files on. Files are
+        processed serially unless this is greater than one.
+    :param use_processes: Whether the workers are processes or threads. Threads are
+        always used for a dry run, since worker processes cannot see the overlay.
+    :param dry_run: Record changes in an `Overlay` instead of writing them to disk.
+    """
+    key = normalize_path(repo_path)
+    with _ACTIVE_INDEXES_LOCK:
+        if key in _ACTIVE_INDEXES:
+            index = _ACTIVE_INDEXES[key]
+            owner = False
+            if dry_run and index.overlay is None:
+                raise ValueError(
+                    f"{repo_path} is being modified on disk and cannot be previewed"
+                )
+        else:
+            pool = None
+            if workers > 1:
+                pool = FileWorkerPool(workers, use_processes and not dry_run)
+            overlay = Overlay(Path(repo_path)) if dry_run else None
+            index = _ACTIVE_INDEXES[key] = RepositoryIndex(
+                repo_path, pool=pool, overlay=overlay
+            )
+            owner = True
+    try:
+        yield index
+    finally:
+        if owner:
+            with _ACTIVE_INDEXES_LOCK:
+                _ACTIVE_INDEXES.pop(key, None)
+            if index.pool is not None:
+                index.pool.shutdown()
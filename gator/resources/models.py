@@ -1,8 +1,14 @@
 from abc import abstractmethod
 from pathlib import Path
+from typing import TYPE_CHECKING, ClassVar, List, Optional
 
 from pydantic import BaseModel
 
+from gator.constants import CONTENT_FILTER_COST
+
+if TYPE_CHECKING:
+    from gator.resources.git_tree import GitTree
+
 
 class BaseModelForbidExtra(BaseModel):
     """
@@ -22,14 +28,52 @@ class GatorResource(BaseModel):
         fields = {"kind": dict(const=True)}
         extra = "forbid"
 
+    def touched_paths(self) -> Optional[List[str]]:
+        """
+        Spec paths, relative to the repository root, that this resource reads or writes.
+
+        Used to only clone the parts of a repository a changeset needs. Resources
+        that may touch any path, including custom resources by default, return None.
+        """
+        return None
+
 
 class FilterResource(GatorResource):
+    # Set to True by filters that implement `matches_tree`. Repositories are then
+    # filtered straight from their git objects, and only checked out if they pass.
+    supports_git_tree: ClassVar[bool] = False
+
     @abstractmethod
     def matches(self, repo_path: Path) -> bool:
         ...
 
+    def matches_tree(self, tree: "GitTree") -> bool:
+        """
+        Determine if a match is present in a git tree, without checking it out.
+
+        Only called on filters that set `supports_git_tree`.
+        :param tree: The repository's HEAD tree.
+        :return: Whether or not the match was present, as `matches` would on a checkout.
+        """
+        raise NotImplementedError
+
+    def estimated_cost(self) -> float:
+        """
+        Estimate how expensive `matches` is, relative to the other filters.
+
+        Cheaper filters are evaluated first, so that content is only scanned when
+        they do not already decide the result. Filters that read file content,
+        including custom filters by default, return `CONTENT_FILTER_COST`.
+        """
+        return CONTENT_FILTER_COST
+
 
 class CodeChangeResource(GatorResource):
+    # Set to True by code changes that make all of their file modifications through
+    # the shared `RepositoryIndex`. The index is fully invalidated after running any
+    # other code change, since it cannot know which files were touched.
+    uses_repository_index: ClassVar[bool] = False
+
     @abstractmethod
     def make_code_changes(self, repo_path: Path) -> None:
         ...
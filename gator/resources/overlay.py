@@ -0,0 +1,208 @@
+"""
+Record changes to a repository in memory instead of writing them to disk.
+
+A `RepositoryIndex` with an `Overlay` records every file written or removed
+through it here, and its reads, listings and stat results reflect the overlaid
+tree. The working tree is never modified, so previewing a changeset only costs
+reads and the same clone can be reused for the next changeset without a reset.
+
+Ignore files are always read from disk, so editing a `.gitignore` in an overlay
+does not change which paths are ignored.
+"""
+import difflib
+import os
+from pathlib import Path
+from stat import S_IFDIR, S_IFREG, S_IMODE
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from gator.constants import BINARY_SNIFF_BYTES
+from gator.resources.content import FileContent
+from gator.resources.ignore import IgnoreRules
+from gator.resources.util import list_directory, normalize_path, stat_path
+
+_NEW_FILE_MODE = S_IFREG | 0o644
+_NEW_DIR_MODE = S_IFDIR | 0o755
+_NO_NEWLINE_MARKER = "\\ No newline at end of file\n"
+
+
+def _synthetic_stat(mode: int, size: int) -> os.stat_result:
+    return os.stat_result((mode, 0, 0, 1, 0, 0, size, 0, 0, 0))
+
+
+class Overlay:
+    """
+    In-memory changes on top of the directory tree at `root`.
+
+    Paths are identified by their normalised absolute form, see `normalize_path`.
+    :param root: The filepath where the repository content is located.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._root_key = normalize_path(root)
+        # new content of each written file, or None if the file was removed
+        self._files: Dict[str, Optional[bytes]] = {}
+        self._file_modes: Dict[str, int] = {}
+        # whether each directory was created (True) or removed (False)
+        self._dirs: Dict[str, bool] = {}
+        # names of the overlaid entries of each directory
+        self._children: Dict[str, Set[str]] = {}
+
+    def _record(self, key: str) -> None:
+        self._children.setdefault(os.path.dirname(key), set()).add(
+            os.path.basename(key)
+        )
+
+    def _exists(self, key: str) -> Optional[bool]:
+        """Whether the overlay says `key` exists, or None if it does not know."""
+        if key in self._files:
+            return self._files[key] is not None
+        if key in self._dirs:
+            return self._dirs[key]
+        return None
+
+    def stat(self, key: str) -> Optional[os.stat_result]:
+        """
+        Return the stat result for `key` in the overlaid tree, or None if it does not exist.
+
+        Overlaid entries get a synthetic result, only their mode and size are meaningful.
+        """
+        if key in self._files:
+            content = self._files[key]
+            if content is None:
+                return None
+            return _synthetic_stat(self._file_modes[key], len(content))
+        if key in self._dirs:
+            return _synthetic_stat(_NEW_DIR_MODE, 0) if self._dirs[key] else None
+        return stat_path(key)
+
+    def list_directory(
+        self, directory: Path, relative_path: str, rules: Optional[IgnoreRules]
+    ) -> Tuple[List[str], List[str]]:
+        """List a directory of the overlaid tree, see `util.list_directory`."""
+        key = normalize_path(directory)
+        try:
+            dirs, files = list_directory(directory, relative_path, rules)
+        except FileNotFoundError:
+            if not self._dirs.get(key):
+                raise
+            dirs, files = [], []
+        for name in sorted(self._children.get(key, ())):
+            child_key = os.path.join(key, name)
+            names = files if child_key in self._files else dirs
+            if self._exists(child_key):
+                if name not in names:
+                    names.append(name)
+            elif name in names:
+                names.remove(name)
+        return dirs, files
+
+    def is_empty_dir(self, key: str) -> bool:
+        try:
+            with os.scandir(key) as entries:
+                names = {entry.name for entry in entries}
+        except FileNotFoundError:
+            names = set()
+        for name in self._children.get(key, ()):
+            if self._exists(os.path.join(key, name)):
+                names.add(name)
+            else:
+                names.discard(name)
+        return not names
+
+    def read(self, key: str, path: Path) -> FileContent:
+        """
+        Return the content of the file at `path` in the overlaid tree.
+
+        :raises FileNotFoundError: If the file was removed.
+        """
+        if key in self._files:
+            content = self._files[key]
+            if content is None:
+                raise FileNotFoundError(f"No such file or directory: '{path}'")
+            return FileContent(path, content)
+        return FileContent.read(path)
+
+    def write(
+        self, key: str, content: bytes, existing: Optional[os.stat_result]
+    ) -> None:
+        """
+        Record new content for a file.
+
+        :param existing: The stat result of the file being replaced, if any.
+        """
+        if existing is not None:
+            mode = S_IFREG | S_IMODE(existing.st_mode)
+        else:
+            mode = self._file_modes.get(key, _NEW_FILE_MODE)
+        self._files[key] = content
+        self._file_modes[key] = mode
+        self._record(key)
+
+    def remove_file(self, key: str) -> None:
+        self._files[key] = None
+        self._record(key)
+
+    def make_dir(self, key: str) -> None:
+        self._dirs[key] = True
+        self._record(key)
+
+    def remove_dir(self, key: str) -> None:
+        self._dirs[key] = False
+        self._record(key)
+
+    def _relative_path(self, key: str) -> str:
+        return os.path.relpath(key, self._root_key).replace(os.sep, "/")
+
+    def diff(self) -> str:
+        """
+        Render the changes to files as a unified diff against the tree on disk.
+
+        Files whose content ends up identical to what is on disk are left out.
+        """
+        return "".join(
+            line for key in sorted(self._files) for line in self._diff_file(key)
+        )
+
+    def _diff_file(self, key: str) -> Iterator[str]:
+        new = self._files[key]
+        old: Optional[bytes] = None
+        if os.path.isfile(key):
+            with open(key, "rb") as f:
+                old = f.read()
+        if old == new:
+            return
+
+        relative_path = self._relative_path(key)
+        from_file = "/dev/null" if old is None else f"a/{relative_path}"
+        to_file = "/dev/null" if new is None else f"b/{relative_path}"
+        old_lines, new_lines = _diff_lines(key, old), _diff_lines(key, new)
+        if old_lines is None or new_lines is None:
+            yield f"Binary files {from_file} and {to_file} differ\n"
+            return
+
+        lines = list(
+            difflib.unified_diff(old_lines, new_lines, from_file, to_file)
+        ) or [f"--- {from_file}\n", f"+++ {to_file}\n"]
+        for line in lines:
+            yield line
+            if not line.endswith("\n"):
+                yield "\n" + _NO_NEWLINE_MARKER
+
+
+def _diff_lines(key: str, data: Optional[bytes]) -> Optional[List[str]]:
+    """Split content into lines for diffing, or return None if it is not text."""
+    if data is None:
+        return []
+    if b"\x00" in data[:BINARY_SNIFF_BYTES]:
+        return None
+    try:
+        text = FileContent(Path(key), data).decode()
+    except UnicodeDecodeError:
+        return None
+    # only split on "\n", like git, so that e.g. "\r\n" stays part of its line
+    lines = text.split("\n")
+    diff_lines = [line + "\n" for line in lines[:-1]]
+    if lines[-1]:
+        diff_lines.append(lines[-1])
+    return diff_lines
@@ -0,0 +1,216 @@
+"""
+Process the files of a single repository on several workers.
+
+Files are handed to workers in chunks, with only a bounded number of chunks in
+flight at a time, so that a filter can stop handing out work as soon as it has
+matched and so that memory does not grow with the size of the repository.
+"""
+import multiprocessing
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from gator.constants import DEFAULT_PARALLEL_CHUNK_SIZE
+from gator.resources.content import (
+    FileContent,
+    apply_replacements,
+    compile_content_pattern,
+)
+
+T = TypeVar("T")
+
+Reader = Callable[[Path], FileContent]
+# a file and the indices of the patterns (or replacements) that apply to it
+FileWork = Tuple[Path, List[int]]
+Replacement = Tuple[Pattern, str]
+
+
+def _chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _search_chunk(
+    files: List[FileWork], patterns: Dict[int, Pattern], reader: Optional[Reader]
+) -> Dict[int, Path]:
+    """Search files for patterns, returning the first file each pattern matched in."""
+    read = reader or FileContent.read
+    matched: Dict[int, Path] = {}
+    for path, pattern_indices in files:
+        remaining = [i for i in pattern_indices if i not in matched]
+        if not remaining:
+            continue
+        content = read(path)
+        for i in remaining:
+            if compile_content_pattern(patterns[i]).search(content):
+                matched[i] = path
+    return matched
+
+
+def _replace_chunk(
+    files: List[FileWork],
+    replacements: Sequence[Replacement],
+    reader: Optional[Reader],
+) -> List[Tuple[Path, bytes]]:
+    read = reader or FileContent.read
+    changed = []
+    for path, replacement_indices in files:
+        replaced = apply_replacements(
+            read(path), [replacements[i] for i in replacement_indices]
+        )
+        if replaced is not None:
+            changed.append((path, replaced))
+    return changed
+
+
+class FileWorkerPool:
+    """
+    Pool of workers that search and rewrite a repository's files in chunks.
+
+    :param workers: Number of workers.
+    :param use_processes: Use a process pool, which runs regexes on several cores.
+        A thread pool shares the repository index's content cache instead, but
+        only overlaps file I/O since regex matching holds the GIL.
+    :param chunk_size: Number of files handed to a worker at a time.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        use_processes: bool = True,
+        chunk_size: int = DEFAULT_PARALLEL_CHUNK_SIZE,
+    ):
+        self.workers = workers
+        self.use_processes = use_processes
+        self.chunk_size = chunk_size
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                # fork is unsafe once other threads are running, e.g. in a pipeline
+                method = (
+                    "forkserver"
+                    if "forkserver" in multiprocessing.get_all_start_methods()
+                    else "spawn"
+                )
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context(method)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(self.workers)
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def search(
+        self,
+        candidates: Iterable[FileWork],
+        patterns: Sequence[Pattern],
+        results: List[bool],
+        reader: Optional[Reader] = None,
+        matched_files: Optional[List[Optional[Path]]] = None,
+    ) -> None:
+        """
+        Search candidate files for patterns, recording matches in `results`.
+
+        `candidates` is consumed lazily, so a generator that drops the patterns that
+        have already matched avoids handing out work that is no longer needed. No
+        new work is handed out once every pattern has matched.
+        :param candidates: Files, and the indices of the patterns to search them for.
+        :param patterns: Compiled text patterns.
+        :param results: Whether or not each pattern has matched so far.
+        :param reader: How to read files; only used by thread pools.
+        :param matched_files: If given, records a file each pattern matched in.
+        """
+        reader = None if self.use_processes else reader
+        in_flight: Set[Future] = set()
+        try:
+            for chunk in _chunked(candidates, self.chunk_size):
+                chunk_patterns = {
+                    i: patterns[i] for _, indices in chunk for i in indices
+                }
+                in_flight.add(
+                    self.executor.submit(_search_chunk, chunk, chunk_patterns, reader)
+                )
+                if len(in_flight) >= 2 * self.workers:
+                    in_flight = self._collect_matches(in_flight, results, matched_files)
+                    if all(results):
+                        return
+            while in_flight and not all(results):
+                in_flight = self._collect_matches(in_flight, results, matched_files)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    @staticmethod
+    def _collect_matches(
+        in_flight: Set[Future],
+        results: List[bool],
+        matched_files: Optional[List[Optional[Path]]],
+    ) -> Set[Future]:
+        done, pending = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            for i, path in future.result().items():
+                results[i] = True
+                if matched_files is not None and matched_files[i] is None:
+                    matched_files[i] = path
+        return pending
+
+    def replace(
+        self,
+        plan: Iterable[FileWork],
+        replacements: Sequence[Replacement],
+        reader: Optional[Reader] = None,
+    ) -> Iterator[Tuple[Path, bytes]]:
+        """
+        Apply replacements to files, generating the new content of changed files.
+
+        Results are generated in the order of `plan`, regardless of which worker
+        finishes first, so that writes happen in a deterministic order.
+        :param plan: Files, and the indices of the replacements to apply, in order.
+        :param replacements: (pattern, replace term) pairs.
+        :param reader: How to read files; only used by thread pools.
+        """
+        reader = None if self.use_processes else reader
+        in_flight: List[Future] = []
+        try:
+            for chunk in _chunked(plan, self.chunk_size):
+                in_flight.append(
+                    self.executor.submit(_replace_chunk, chunk, replacements, reader)
+                )
+                if len(in_flight) >= 2 * self.workers:
+                    yield from in_flight.pop(0).result()
+            while in_flight:
+                yield from in_flight.pop(0).result()
+        finally:
+            for future in in_flight:
+                future.cancel()
@@ -0,0 +1,170 @@
+"""
+Translate glob patterns, as used in spec paths and ignore files, to regexes.
+
+Patterns follow gitignore conventions: `*` and `?` never match `/`, a `**`
+segment matches any number of directories, and a trailing `/**` matches
+everything inside a directory.
+"""
+import os
+import posixpath
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional, Pattern
+
+GLOB_CHARACTERS = "*?["
+
+
+def has_glob(path: str) -> bool:
+    """Determine whether `path` contains glob characters."""
+    return any(character in path for character in GLOB_CHARACTERS)
+
+
+def normalize_spec_paths(paths: Iterable[str], drop_nested: bool = False) -> List[str]:
+    """
+    Normalise spec paths, dropping duplicates.
+
+    e.g. `["./app1/", "app1", "."]` becomes `["app1", "."]`. A literal path inside
+    another one is kept, since it is searched even where the other one's search
+    skips ignored files, e.g. `vendor` with `.` when `vendor/` is ignored.
+    :param paths: Paths as written in a spec, relative to the repository root.
+    :param drop_nested: Also drop literal paths inside another literal path, e.g.
+        for sparse-checkout cones, which do not honour ignore files.
+    :return: The remaining paths, in their original order.
+    """
+    normalized: List[str] = []
+    for path in paths:
+        path = posixpath.normpath(path) if path else "."
+        if path not in normalized:
+            normalized.append(path)
+    if not drop_nested:
+        return normalized
+
+    literal = [path for path in normalized if not has_glob(path)]
+    return [
+        path
+        for path in normalized
+        if has_glob(path) or not any(_contains(other, path) for other in literal)
+    ]
+
+
+def literal_root(path: str) -> str:
+    """
+    Return the literal leading segments of a spec path, before any glob segment.
+
+    e.g. `app1/**/requirements*.txt` becomes `app1`, and `*.txt` becomes an empty string.
+    :param path: Path as written in a spec, relative to the repository root.
+    """
+    literal_segments = []
+    for segment in path.split("/"):
+        if has_glob(segment):
+            break
+        literal_segments.append(segment)
+    return "/".join(literal_segments)
+
+
+def _contains(directory: str, path: str) -> bool:
+    if directory == path:
+        return False
+    return directory == "." or path.startswith(directory.rstrip("/") + "/")
+
+
+def translate_glob(pattern: str) -> str:
+    """
+    Translate a glob into a regex matching `/` separated relative paths.
+
+    The returned regex is not anchored.
+    :param pattern: The glob to translate.
+    """
+    output: List[str] = []
+    i, length = 0, len(pattern)
+    while i < length:
+        character = pattern[i]
+        if character == "*":
+            i = _translate_star(pattern, i, output)
+        elif character == "?":
+            output.append("[^/]")
+            i += 1
+        elif character == "[":
+            i = _translate_class(pattern, i, output)
+        elif character == "\\" and i + 1 < length:
+            output.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            output.append(re.escape(character))
+            i += 1
+    return "".join(output)
+
+
+def _translate_star(pattern: str, i: int, output: List[str]) -> int:
+    length = len(pattern)
+    if pattern.startswith("**", i):
+        starts_segment = i == 0 or pattern[i - 1] == "/"
+        if starts_segment and i + 2 == length:
+            output.append(".*")
+            return i + 2
+        if starts_segment and pattern[i + 2] == "/":
+            output.append("(?:.*/)?")
+            return i + 3
+
+    output.append("[^/]*")
+    while i < length and pattern[i] == "*":
+        i += 1
+    return i
+
+
+def _translate_class(pattern: str, i: int, output: List[str]) -> int:
+    end = pattern.find("]", i + 2)
+    if end == -1:
+        output.append(re.escape("["))
+        return i + 1
+    body = pattern[i + 1 : end].replace("\\", "\\\\")
+    if body[0] in "!^":
+        body = "^" + body[1:]
+    output.append(f"[{body}]")
+    return end + 1
+
+
+class SpecPath:
+    """
+    A path from a resource spec, which may contain glob patterns.
+
+    The literal leading directories of the path form the `root` to search, and
+    the remainder selects files, or directories whose files are all selected,
+    relative to that root.
+    :param repo_path: The filepath where the repository content is located.
+    :param spec_path: The path as written in the spec, e.g. `**/requirements*.txt`.
+    """
+
+    def __init__(self, repo_path: Path, spec_path: str):
+        self.spec_path = spec_path
+        self.matcher: Optional[Pattern] = None
+
+        root = literal_root(spec_path)
+        glob = spec_path[len(root) :].lstrip("/")
+
+        self.root = repo_path / root
+        self.root_key = os.path.normpath(os.path.abspath(self.root))
+        if glob:
+            self.matcher = re.compile(translate_glob(glob))
+
+    @property
+    def is_glob(self) -> bool:
+        return self.matcher is not None
+
+    def covers(self, file_key: str) -> bool:
+        """
+        Determine whether the file is selected by this spec path.
+
+        :param file_key: Normalised absolute path of a file under `root`.
+        """
+        if self.matcher is None:
+            return True
+        if not file_key.startswith(self.root_key.rstrip(os.sep) + os.sep):
+            return False
+        relative = file_key[len(self.root_key.rstrip(os.sep)) + 1 :]
+        segments = relative.split(os.sep)
+        # a matching directory selects every file below it
+        return any(
+            self.matcher.fullmatch("/".join(segments[:depth]))
+            for depth in range(1, len(segments) + 1)
+        )
@@ -0,0 +1,118 @@
+"""
+Define the executable form of a changeset.
+
+A `ChangesetPlan` holds a changeset's validated resources, with their regexes
+compiled and their spec paths normalised, in the order they are executed. It
+pickles without the YAML or the pydantic validation, so it can be built once
+and sent to any number of worker processes.
+"""
+import hashlib
+import json
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple, cast
+
+from gator.resources.filters.evaluation import is_fusable
+from gator.resources.models import CodeChangeResource, FilterResource
+from gator.resources.patterns import normalize_spec_paths
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.build import Changeset
+
+
+class ChangesetPlan:
+    """
+    Filters and code changes of a changeset, ready to be executed.
+
+    :param name: Name of the changeset.
+    :param filters: Filters, all of which must match. Duplicates are dropped, and
+        filters evaluated in a single fused pass come first.
+    :param code_changes: Code changes, in the order they are applied.
+    :param issue_title: Title of the issue or pull request to open, if any.
+    :param issue_body: Body of the issue or pull request to open, if any.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        filters: Sequence[FilterResource] = (),
+        code_changes: Sequence[CodeChangeResource] = (),
+        issue_title: Optional[str] = None,
+        issue_body: Optional[str] = None,
+    ):
+        self.name = name
+        self.filters: Tuple[FilterResource, ...] = _order_filters(filters)
+        self.code_changes: Tuple[CodeChangeResource, ...] = tuple(code_changes)
+        self.issue_title = issue_title
+        self.issue_body = issue_body
+
+    @classmethod
+    def from_changeset(cls, changeset: "Changeset") -> "ChangesetPlan":
+        spec = changeset.spec
+        return cls(
+            name=spec.name,
+            filters=cast(List[FilterResource], spec.filters or []),
+            code_changes=cast(List[CodeChangeResource], spec.code_changes or []),
+            issue_title=spec.issue_title,
+            issue_body=spec.issue_body,
+        )
+
+    def touched_paths(self) -> Optional[List[str]]:
+        """
+        Normalised spec paths that the filters and code changes read or write.
+
+        Literal paths inside another literal path are dropped.
+        :return: The paths, or None if any resource may touch any path.
+        """
+        paths: List[str] = []
+        for resource in (*self.filters, *self.code_changes):
+            resource_paths = resource.touched_paths()
+            if resource_paths is None:
+                return None
+            paths.extend(resource_paths)
+        return normalize_spec_paths(paths, drop_nested=True)
+
+    def fingerprint(self) -> str:
+        """Identify the plan by its definition, e.g. to tell whether a run used it."""
+        definition = json.dumps(
+            {
+                "name": self.name,
+                "issue_title": self.issue_title,
+                "issue_body": self.issue_body,
+                "resources": [
+                    [type(resource).__qualname__, resource.json(sort_keys=True)]
+                    for resource in (*self.filters, *self.code_changes)
+                ],
+            }
+        )
+        return hashlib.sha256(definition.encode("utf-8")).hexdigest()
+
+    def __repr__(self) -> str:
+        return (
+            f"ChangesetPlan(name={self.name!r}, filters={len(self.filters)}, "
+            f"code_changes={len(self.code_changes)})"
+        )
+
+
+def fingerprint_plans(plans: Sequence[ChangesetPlan]) -> str:
+    """
+    Identify several plans, run together, by their definitions and order.
+
+    A single plan is identified by its own fingerprint, see `ChangesetPlan.fingerprint`.
+    """
+    if len(plans) == 1:
+        return plans[0].fingerprint()
+    fingerprints = ",".join(plan.fingerprint() for plan in plans)
+    return hashlib.sha256(fingerprints.encode("utf-8")).hexdigest()
+
+
+def _order_filters(filters: Sequence[FilterResource]) -> Tuple[FilterResource, ...]:
+    unique: List[FilterResource] = []
+    for filter_resource in filters:
+        # resources are pydantic models, which compare equal if their fields do
+        if not any(
+            type(filter_resource) is type(seen) and filter_resource == seen
+            for seen in unique
+        ):
+            unique.append(filter_resource)
+    return tuple(
+        [f for f in unique if is_fusable(f)] + [f for f in unique if not is_fusable(f)]
+    )
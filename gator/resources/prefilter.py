@@ -0,0 +1,181 @@
+"""
+Reject content cheaply before running a regular expression against it.
+
+Most patterns can only match content that contains some literal substring, e.g.
+`registry\\.company\\.com` or either of `22.1.0`/`21.` in `(22\\.1\\.0|21\\.\\w+)`.
+Those literals are extracted from the parsed pattern once, and content that
+contains none of them is rejected with a substring search instead of the
+backtracking regex engine.
+"""
+import re
+import threading
+from typing import FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+from gator.constants import MIN_PREFILTER_LITERAL_LENGTH
+
+try:
+    from re import _constants as sre_constants  # type: ignore
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:  # pragma: no cover - python < 3.11
+    import sre_constants  # type: ignore
+    import sre_parse  # type: ignore
+
+# at least one of these literals is present in any content the pattern matches
+Requirement = FrozenSet[str]
+
+_REPEATS = {
+    getattr(sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, name)
+}
+_NEWLINE = ord("\n")
+_ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+
+class PrefilterStats:
+    """Counts of the files checked, and rejected, by literal prefilters."""
+
+    def __init__(self):
+        self.files_checked = 0
+        self.files_rejected = 0
+        self._lock = threading.Lock()
+
+    def record(self, rejected: bool) -> None:
+        with self._lock:
+            self.files_checked += 1
+            if rejected:
+                self.files_rejected += 1
+
+    @property
+    def rejection_rate(self) -> float:
+        return self.files_rejected / self.files_checked if self.files_checked else 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.files_checked = 0
+            self.files_rejected = 0
+
+
+# aggregated over every prefilter in the process
+PREFILTER_STATS = PrefilterStats()
+
+
+def _best(candidates: Iterable[Optional[Requirement]]) -> Optional[Requirement]:
+    """Pick the most selective requirement, the one whose shortest literal is longest."""
+    best, best_score = None, 0
+    for candidate in candidates:
+        if not candidate:
+            continue
+        score = min(len(literal) for literal in candidate)
+        if score > best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def _sequence_requirement(items, ignore_case: bool) -> Optional[Requirement]:
+    candidates: List[Optional[Requirement]] = []
+    run: List[str] = []
+    for op, av in items:
+        # `\n` may be a `\r\n` or `\r` line ending in the raw content
+        if op is sre_constants.LITERAL and not ignore_case and av != _NEWLINE:
+            run.append(chr(av))
+            continue
+        if op is sre_constants.AT:
+            # zero-width, the literals on either side are still adjacent
+            continue
+        if run:
+            candidates.append(frozenset(["".join(run)]))
+            run = []
+        candidates.append(_item_requirement(op, av, ignore_case))
+    if run:
+        candidates.append(frozenset(["".join(run)]))
+    return _best(candidates)
+
+
+def _item_requirement(op, av, ignore_case: bool) -> Optional[Requirement]:
+    if op is sre_constants.SUBPATTERN:
+        _, add_flags, del_flags, items = av
+        ignore_case = bool(
+            (ignore_case or add_flags & re.IGNORECASE) and not del_flags & re.IGNORECASE
+        )
+        return _sequence_requirement(items, ignore_case)
+    if op in _REPEATS:
+        minimum, _, items = av
+        return _sequence_requirement(items, ignore_case) if minimum >= 1 else None
+    if op is sre_constants.BRANCH:
+        _, branches = av
+        requirements = [_sequence_requirement(items, ignore_case) for items in branches]
+        if all(requirements):
+            return frozenset().union(*requirements)  # type: ignore
+        return None
+    if op is sre_constants.ASSERT:
+        _, items = av
+        return _sequence_requirement(items, ignore_case)
+    if op is _ATOMIC_GROUP:
+        return _sequence_requirement(av, ignore_case)
+    return None
+
+
+def extract_required_literals(expression: Pattern) -> Optional[Requirement]:
+    """
+    Extract literals, at least one of which is present in any content `expression` matches.
+
+    :param expression: Compiled text pattern.
+    :return: The literals, or None if no useful literal is required.
+    """
+    try:
+        parsed = sre_parse.parse(expression.pattern, expression.flags)
+    except (re.error, TypeError):
+        return None
+    requirement = _sequence_requirement(
+        parsed, ignore_case=bool(expression.flags & re.IGNORECASE)
+    )
+    if requirement is None:
+        return None
+    if min(len(literal) for literal in requirement) < MIN_PREFILTER_LITERAL_LENGTH:
+        return None
+    return requirement
+
+
+class LiteralPrefilter:
+    """
+    Substring check for the literals required by a pattern.
+
+    :param literals: Literals, at least one of which must be present.
+    """
+
+    def __init__(self, literals: Requirement):
+        self.literals: Tuple[bytes, ...] = tuple(
+            sorted(literal.encode("utf-8") for literal in literals)
+        )
+        self._multi_literal: Optional[Pattern] = None
+        if len(self.literals) > 1:
+            self._multi_literal = re.compile(
+                b"|".join(re.escape(literal) for literal in self.literals)
+            )
+        self.stats = PrefilterStats()
+
+    @classmethod
+    def for_expression(cls, expression: Pattern) -> Optional["LiteralPrefilter"]:
+        """Build the prefilter for `expression`, or None if it requires no literal."""
+        literals = extract_required_literals(expression)
+        if not literals:
+            return None
+        try:
+            return cls(literals)
+        except UnicodeEncodeError:
+            return None
+
+    def may_match(self, data) -> bool:
+        """
+        Determine whether `data` contains any of the required literals.
+
+        :param data: Raw content, bytes or a memory map.
+        """
+        if self._multi_literal is not None:
+            found = self._multi_literal.search(data) is not None
+        else:
+            found = data.find(self.literals[0]) != -1
+        self.stats.record(rejected=not found)
+        PREFILTER_STATS.record(rejected=not found)
+        return found
@@ -0,0 +1,163 @@
+"""
+Look up resource classes by kind, importing each only when it is first needed.
+
+Built-in resources are known by the module and class that define them, and
+third-party resources by the package entry points they declare in the
+`gator.resources` group, named after the kind they define:
+
+    [options.entry_points]
+    gator.resources =
+        SomeKind = some_package.resources:SomeKindV1Alpha
+
+Entry points are only discovered when a changeset uses a kind that is neither
+built in nor registered with `register_custom_resource`, so changesets made of
+built-in resources never scan the installed packages.
+"""
+import importlib
+import sys
+import threading
+from typing import Dict, Iterator, MutableMapping, Optional, Type
+
+from gator.exceptions import InvalidResourceError
+from gator.resources.models import CodeChangeResource, FilterResource, GatorResource
+
+ENTRY_POINT_GROUP = "gator.resources"
+
+# kind -> "module:class"
+BUILTIN_RESOURCES = {
+    "NewFileCodeChange": "gator.resources.code_changes.new_file:NewFileCodeChangeV1Alpha",
+    "RemoveFileCodeChange": (
+        "gator.resources.code_changes.remove_file:RemoveFileCodeChangeV1Alpha"
+    ),
+    "RegexReplaceCodeChange": (
+        "gator.resources.code_changes.regex_replace:RegexReplaceCodeChangeV1Alpha"
+    ),
+    "RegexFilter": "gator.resources.filters.regex_filter:RegexFilterV1Alpha",
+    "PathExistsFilter": "gator.resources.filters.metadata:PathExistsFilterV1Alpha",
+    "GlobFilter": "gator.resources.filters.metadata:GlobFilterV1Alpha",
+    "FileSizeFilter": "gator.resources.filters.metadata:FileSizeFilterV1Alpha",
+    "LanguageFilter": "gator.resources.filters.metadata:LanguageFilterV1Alpha",
+    "AndFilter": "gator.resources.filters.composite:AndFilterV1Alpha",
+    "OrFilter": "gator.resources.filters.composite:OrFilterV1Alpha",
+    "NotFilter": "gator.resources.filters.composite:NotFilterV1Alpha",
+}
+
+
+def resource_kind(resource_class: Type) -> str:
+    """
+    Return the kind a resource class defines.
+
+    :raises InvalidResourceError: The class is not a filter or code change resource,
+        or does not define its kind.
+    """
+    if not isinstance(resource_class, type) or not issubclass(
+        resource_class, (CodeChangeResource, FilterResource)
+    ):
+        raise InvalidResourceError(
+            "Resource must subclass either CodeChangeResource or FilterResource"
+        )
+    try:
+        return resource_class.schema()["properties"]["kind"]["const"]
+    except KeyError:
+        raise InvalidResourceError(
+            "Custom resource must define a class variable 'kind'"
+        )
+
+
+def _entry_points(group: str) -> Dict[str, str]:
+    # imported when first discovering, which most runs never do
+    if sys.version_info >= (3, 8):
+        from importlib import metadata
+    else:  # pragma: no cover
+        import importlib_metadata as metadata
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        selected = entry_points.select(group=group)
+    else:  # Python < 3.10
+        selected = entry_points.get(group, ())  # type: ignore
+    return {entry_point.name: entry_point.value for entry_point in selected}
+
+
+class ResourceRegistry(MutableMapping[str, Type[GatorResource]]):
+    """
+    Resource classes by kind, imported on first lookup.
+
+    Safe to share between threads.
+    :param locations: Where the classes of known kinds are defined, as `module:class`.
+    :param entry_point_group: Group of the package entry points to discover other
+        kinds from, if given.
+    """
+
+    def __init__(
+        self, locations: Dict[str, str], entry_point_group: Optional[str] = None
+    ):
+        self._locations = dict(locations)
+        self._classes: Dict[str, Type[GatorResource]] = {}
+        self._entry_point_group = entry_point_group
+        self._discovered = entry_point_group is None
+        self._lock = threading.RLock()
+
+    def _discover(self) -> None:
+        with self._lock:
+            if self._discovered:
+                return
+            self._discovered = True
+            assert self._entry_point_group is not None  # nosec
+            for kind, location in _entry_points(self._entry_point_group).items():
+                # built-in and registered resources take precedence
+                if kind not in self._classes:
+                    self._locations.setdefault(kind, location)
+
+    def _load(self, kind: str, location: str) -> Type[GatorResource]:
+        module_name, _, class_name = location.partition(":")
+        try:
+            resource_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as e:
+            raise InvalidResourceError(
+                f"Could not import resource of kind {kind} from {location}"
+            ) from e
+        if resource_kind(resource_class) != kind:
+            raise InvalidResourceError(
+                f"Resource {location} does not define kind {kind}"
+            )
+        return resource_class
+
+    def __getitem__(self, kind: str) -> Type[GatorResource]:
+        with self._lock:
+            if kind in self._classes:
+                return self._classes[kind]
+            if kind not in self._locations:
+                self._discover()
+            if kind not in self._locations:
+                raise KeyError(kind)
+            resource_class = self._load(kind, self._locations[kind])
+            self._classes[kind] = resource_class
+            return resource_class
+
+    def __setitem__(self, kind: str, resource_class: Type[GatorResource]) -> None:
+        with self._lock:
+            self._classes[kind] = resource_class
+
+    def __delitem__(self, kind: str) -> None:
+        with self._lock:
+            if kind not in self._classes and kind not in self._locations:
+                raise KeyError(kind)
+            self._classes.pop(kind, None)
+            self._locations.pop(kind, None)
+
+    def __contains__(self, kind: object) -> bool:
+        with self._lock:
+            if kind not in self._classes and kind not in self._locations:
+                self._discover()
+            return kind in self._classes or kind in self._locations
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        with self._lock:
+            return iter(list({**self._locations, **self._classes}))
+
+    def __len__(self) -> int:
+        self._discover()
+        with self._lock:
+            return len({**self._locations, **self._classes})
@@ -1,36 +1,119 @@
 import logging
+import os
 from pathlib import Path
-from typing import Iterator, List, Tuple
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
 
+from gator import metrics
 from gator.constants import GIT_INTERNALS_DIRECTORY
+from gator.resources.content import FileContent
+from gator.resources.ignore import IgnoreRules
 
 _logger = logging.getLogger(__name__)
 
 
+def normalize_path(path: Union[str, Path]) -> str:
+    """Return an absolute, normalised string form of `path`, suitable as a lookup key."""
+    return os.path.normpath(os.path.abspath(path))
+
+
+def scrub_url(url: str) -> str:
+    """Remove credentials from a URL, e.g. the token of a GitHub clone URL."""
+    parts = urlsplit(url)
+    if "@" not in parts.netloc:
+        return url
+    return urlunsplit(parts._replace(netloc=parts.netloc.rsplit("@", 1)[1]))
+
+
+def stat_path(path: Union[str, Path]) -> Optional[os.stat_result]:
+    """Return the stat result for `path`, or None if it does not exist."""
+    try:
+        return os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def list_directory(
+    directory: Path, relative_path: str, rules: Optional[IgnoreRules]
+) -> Tuple[List[str], List[str]]:
+    """
+    List the subdirectories and files of a single directory.
+
+    `.git` directories and files, symlinked directories and ignored entries are left out,
+    so that they are pruned before a walk descends into them.
+    :param directory: Directory to list.
+    :param relative_path: `directory` relative to the root of the walk.
+    :param rules: Ignore rules that apply within `directory`.
+    :return: Names of the subdirectories and files in `directory`.
+    """
+    dirs: List[str] = []
+    files: List[str] = []
+    prefix = f"{relative_path}/" if relative_path else ""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name == GIT_INTERNALS_DIRECTORY:
+                # a directory, or a gitlink file in submodules and worktrees
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if rules and rules.is_ignored(prefix + entry.name, is_dir=True):
+                    continue
+                dirs.append(entry.name)
+            elif entry.is_symlink() and entry.is_dir():
+                # symlinked directories are not followed
+                continue
+            elif not (rules and rules.is_ignored(prefix + entry.name, is_dir=False)):
+                files.append(entry.name)
+    return dirs, files
+
+
+def walk_files(target_path: Path, respect_ignore_files: bool = True) -> Iterator[Path]:
+    """
+    Generate all file paths recursively present in provided target_path.
+
+    Directories are listed one at a time as the walk reaches them, so memory use
+    does not grow with the size of the tree. The `.git` directory, and paths
+    ignored by `.gitignore` or `.gatorignore` files at or below `target_path`,
+    are pruned before they are descended into.
+    :param target_path: File or directory to walk.
+    :param respect_ignore_files: Whether to honour ignore files.
+    :raises FileNotFoundError: If target_path does not exist.
+    :return: Generate file paths, rooted at target_path.
+    """
+    if not target_path.is_dir():
+        if not target_path.exists():
+            raise FileNotFoundError(f"No such file or directory: '{target_path}'")
+        yield target_path
+        return
+
+    stack: List[Tuple[Path, str, Optional[IgnoreRules]]] = [(target_path, "", None)]
+    while stack:
+        directory, relative_path, rules = stack.pop()
+        if respect_ignore_files:
+            rules = IgnoreRules.for_directory(directory, relative_path, rules)
+        dirs, files = list_directory(directory, relative_path, rules)
+        metrics.add("files_walked", len(files))
+        for name in files:
+            yield directory / name
+        prefix = f"{relative_path}/" if relative_path else ""
+        stack.extend(
+            (directory / name, prefix + name, rules) for name in reversed(dirs)
+        )
+
+
 def get_recursive_path_contents(target_path: Path) -> Iterator[Tuple[Path, str]]:
     """
     Generate file content for all files recursively present in provided target_path.
 
-    Note: ignores contents of the `.git` directory
+    Note: ignores contents of the `.git` directory, paths ignored by `.gitignore` or
+    `.gatorignore` files, binary files and files that cannot be decoded as UTF-8.
     :param target_path: Path to recursively scan for content.
     :return: Generate (Path, str) tuples containing path and content at path.
     """
-
-    file_paths: List[Path] = []
-
-    if target_path.is_dir():
-        # build list of file paths that recursively reside in the provided `target_dir`
-        for matched_path in target_path.glob("**/*"):
-            if not matched_path.is_dir():
-                file_paths.append(matched_path)
-    else:
-        file_paths.append(target_path)
-
-    for path in file_paths:
-        if GIT_INTERNALS_DIRECTORY in str(path).split("/"):
+    for path in walk_files(target_path):
+        content = FileContent.read(path)
+        if content.is_binary:
+            _logger.debug(f"Skipping binary file at path {path}")
             continue
-        try:
-            content = path.read_text()
-            yield path, content
-        except UnicodeDecodeError as e:
-            _logger.warning(f"We could not decode text at path {path}: {e}")
+        text = content.text
+        if text is not None:
+            yield path, text
@@ -0,0 +1,341 @@
+"""
+Discover the repositories to run a changeset against.
+
+A `RepositorySource` generates `RepositoryTarget`s lazily, so the pipeline starts
+cloning the first repositories while the rest are still being listed. Sources:
+
+- `ListedRepositories`: repositories listed one per line, e.g. in a file
+- `GitHubOrgRepositories`: every repository of a GitHub organization, optionally
+  only those with given topics
+- `GitHubSearchRepositories`: the results of a GitHub repository search query
+
+GitHub listings are paginated. Once the first page reports how many pages there
+are, the remaining pages are fetched concurrently, a bounded number ahead of the
+consumer, and handed out in order. With a `ResponseCache`, every page is revalidated
+with a conditional request, which does not count against the rate limit when the
+page did not change.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from github import Github
+
+from gator.pipeline import RepositoryTarget, read_repository_targets
+from gator.post_process import GITHUB_PUBLIC_DOMAIN_NAME
+from gator.rate_limit import RateLimiter
+
+_logger = logging.getLogger(__name__)
+
+# the most results GitHub returns per page
+MAX_PER_PAGE = 100
+_LAST_PAGE_LINK = re.compile(r'<([^>]*)>;\s*rel="last"')
+
+
+class RepositorySource:
+    """Generates the repositories to run a changeset against."""
+
+    def targets(self) -> Iterator[RepositoryTarget]:
+        """Generate the repositories, as they are discovered."""
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[RepositoryTarget]:
+        return self.targets()
+
+
+def iter_targets(sources: Iterable[RepositorySource]) -> Iterator[RepositoryTarget]:
+    """
+    Generate the repositories of every source in turn, each repository once.
+
+    :param sources: Where to discover repositories.
+    :return: Generate the targets, by `name`, in the order first discovered.
+    """
+    seen = set()
+    for source in sources:
+        for target in source.targets():
+            if target.name not in seen:
+                seen.add(target.name)
+                yield target
+
+
+class ListedRepositories(RepositorySource):
+    """
+    Repositories listed one per line, see `read_repository_targets`.
+
+    :param lines: The lines to parse, e.g. an open file.
+    """
+
+    def __init__(
+        self,
+        lines: Iterable[str],
+        github_username: Optional[str] = None,
+        github_token: Optional[str] = None,
+        github_domain: Optional[str] = None,
+    ):
+        self.lines = lines
+        self.github_username = github_username
+        self.github_token = github_token
+        self.github_domain = github_domain
+
+    def targets(self) -> Iterator[RepositoryTarget]:
+        return read_repository_targets(
+            self.lines, self.github_username, self.github_token, self.github_domain
+        )
+
+
+class ResponseCache:
+    """
+    GitHub API responses kept on disk, to revalidate by ETag.
+
+    Safe to share between threads and processes: entries are replaced atomically.
+    :param directory: Where to keep the responses.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the response stored under `key`, or None if there is none."""
+        try:
+            return json.loads(self._path(key).read_text())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            _logger.warning(f"Ignoring corrupt cached response for {key}")
+            return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store `response`, which must be JSON serializable, under `key`."""
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(response, f)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+class GitHubClient:
+    """
+    Read paginated listings from the GitHub API.
+
+    Safe to share between threads; like `PullRequestOpener`, every thread gets its
+    own PyGithub client, and all requests are paced by a shared `RateLimiter`.
+    :param github_token: Token to list repositories as; private repositories are only
+        listed if the token has access to them.
+    :param github_domain: GitHub domain; the API of GitHub Enterprise instances is
+        served under `/api/v3`.
+    :param github_username: Username to clone repositories as, along with the token.
+    :param cache: Responses to revalidate instead of downloading again, if given.
+    :param page_workers: Number of pages fetched concurrently.
+    :param rate_limiter: Paces requests; a default `RateLimiter` if not given.
+    :param api_url: URL of the API, instead of the one derived from `github_domain`.
+    """
+
+    def __init__(
+        self,
+        github_token: Optional[str] = None,
+        github_domain: Optional[str] = GITHUB_PUBLIC_DOMAIN_NAME,
+        github_username: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        page_workers: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_url: Optional[str] = None,
+    ):
+        if api_url is None and github_domain not in (None, GITHUB_PUBLIC_DOMAIN_NAME):
+            api_url = f"https://{github_domain}/api/v3"
+        self.github_token = github_token
+        self.github_domain = github_domain
+        self.github_username = github_username
+        self.cache = cache
+        self.page_workers = page_workers
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._api_url = api_url
+        self._local = threading.local()
+
+    def _requester(self) -> Any:
+        requester = getattr(self._local, "requester", None)
+        if requester is None:
+            if self._api_url is None:
+                github = Github(self.github_token)
+            else:
+                github = Github(self.github_token, base_url=self._api_url)
+            # the authenticated user is lazy, so this makes no request; requesters
+            # are not part of the type stubs
+            requester = github.get_user()._requester  # type: ignore
+            self._local.requester = requester
+        return requester
+
+    def get_page(
+        self, path: str, parameters: Dict[str, Any]
+    ) -> Tuple[Any, Optional[int]]:
+        """
+        Fetch a page of a listing, revalidating a cached copy if there is one.
+
+        :param path: Path of the listing in the API, e.g. `/orgs/some-org/repos`.
+        :param parameters: Query parameters, including the `page` number.
+        :raises GithubException: The request failed.
+        :return: The content of the page, and the number of the last page, if the
+            response reported it.
+        """
+        key = f"{self._api_url or GITHUB_PUBLIC_DOMAIN_NAME}{path}?" + urlencode(
+            sorted(parameters.items())
+        )
+        cached = self.cache.get(key) if self.cache is not None else None
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+        requester = self._requester()
+
+        response_headers, data = self.rate_limiter.call(
+            lambda: requester.requestJsonAndCheck("GET", path, parameters, headers),
+            lambda: (requester.rate_limiting[0], requester.rate_limiting_resettime),
+        )
+        if data is None and cached is not None:
+            # 304 Not Modified
+            return cached["data"], cached["last_page"]
+
+        last_page = _last_page(response_headers.get("link", ""))
+        if self.cache is not None and "etag" in response_headers:
+            self.cache.put(
+                key,
+                {
+                    "etag": response_headers["etag"],
+                    "data": data,
+                    "last_page": last_page,
+                },
+            )
+        return data, last_page
+
+    def iter_pages(self, path: str, parameters: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Generate every page of a listing, in order.
+
+        Pages after the first are fetched concurrently, at most twice `page_workers`
+        ahead of the consumer.
+        :param path: Path of the listing in the API.
+        :param parameters: Query parameters, other than the page number.
+        :return: Generate the content of each page.
+        """
+        first, last_page = self.get_page(path, {**parameters, "page": 1})
+        yield first
+        if not last_page or last_page < 2:
+            return
+
+        pages = iter(range(2, last_page + 1))
+        executor = ThreadPoolExecutor(self.page_workers)
+        pending: Deque[Future] = deque()
+
+        def fetch_next() -> None:
+            page = next(pages, None)
+            if page is not None:
+                pending.append(
+                    executor.submit(self.get_page, path, {**parameters, "page": page})
+                )
+
+        try:
+            for _ in range(2 * self.page_workers):
+                fetch_next()
+            while pending:
+                data, _ = pending.popleft().result()
+                fetch_next()
+                yield data
+        finally:
+            # the consumer may stop early; `cancel_futures` needs Python 3.9
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def target(self, repository: Dict[str, Any]) -> RepositoryTarget:
+        """Build a target for a repository, as returned by the API."""
+        return RepositoryTarget.from_github(
+            repository["full_name"],
+            self.github_username,
+            self.github_token,
+            self.github_domain,
+        )
+
+
+def _last_page(link: str) -> Optional[int]:
+    """Return the number of the last page, from a `Link` header, if it has one."""
+    match = _LAST_PAGE_LINK.search(link)
+    if match is None:
+        return None
+    pages = parse_qs(urlparse(match.group(1)).query).get("page")
+    return int(pages[0]) if pages else None
+
+
+def _is_open(repository: Dict[str, Any]) -> bool:
+    # changes to archived or disabled repositories cannot be pushed
+    return not repository.get("archived") and not repository.get("disabled")
+
+
+class GitHubOrgRepositories(RepositorySource):
+    """
+    Every repository of a GitHub organization, other than archived ones.
+
+    :param client: Lists the repositories.
+    :param org: The organization.
+    :param topics: Only list repositories with all of these topics, if given.
+    """
+
+    def __init__(self, client: GitHubClient, org: str, topics: Sequence[str] = ()):
+        self.client = client
+        self.org = org
+        self.topics = topics
+
+    def targets(self) -> Iterator[RepositoryTarget]:
+        # sorted by name, so that pages fetched concurrently do not overlap
+        parameters = {"type": "all", "sort": "full_name", "per_page": MAX_PER_PAGE}
+        for page in self.client.iter_pages(f"/orgs/{self.org}/repos", parameters):
+            for repository in page:
+                if _is_open(repository) and set(self.topics) <= set(
+                    repository.get("topics") or ()
+                ):
+                    yield self.client.target(repository)
+
+
+class GitHubSearchRepositories(RepositorySource):
+    """
+    The repositories found by a GitHub search, other than archived ones.
+
+    GitHub returns at most the first 1000 results of a search; list organizations
+    with `GitHubOrgRepositories` rather than searching them.
+    :param client: Runs the search.
+    :param query: Search query, e.g. `org:some-org topic:python language:python`.
+    """
+
+    def __init__(self, client: GitHubClient, query: str):
+        self.client = client
+        self.query = query
+
+    def targets(self) -> Iterator[RepositoryTarget]:
+        parameters = {"q": self.query, "per_page": MAX_PER_PAGE}
+        for page in self.client.iter_pages("/search/repositories", parameters):
+            if page.get("incomplete_results"):
+                _logger.warning(f"GitHub search for {self.query!r} timed out early")
+            for repository in page["items"]:
+                if _is_open(repository):
+                    yield self.client.target(repository)
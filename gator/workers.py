@@ -0,0 +1,110 @@
+"""
+Run the process stage of the pipeline in its workers.
+
+Every worker process imports this module to start, so it only imports what
+processing a repository needs: cloning, pushing and the GitHub API stay out of
+the workers.
+"""
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Sequence, Tuple
+
+from gator import metrics
+from gator.constants import PROCESS
+from gator.hooks import ResourceHook, register_resource_hook
+from gator.metrics import Metrics, Sample
+from gator.process import apply_changeset, changesets_match, preview_repository
+from gator.resources.index import repository_index
+from gator.resources.plan import ChangesetPlan
+
+if TYPE_CHECKING:  # pragma: no cover
+    from gator.resources.filters.store import FilterResultStore
+
+# the plans of the changesets being run, and the filter result store, if any, set
+# once in every process stage worker
+_WORKER_PLANS: Tuple[ChangesetPlan, ...] = ()
+_WORKER_FILTER_STORE: Optional["FilterResultStore"] = None
+
+
+def set_worker_plans(
+    plans: Sequence[ChangesetPlan],
+    filter_store: Optional["FilterResultStore"] = None,
+    resource_hooks: Sequence[ResourceHook] = (),
+) -> None:
+    """Initialize a worker with the changesets to run."""
+    global _WORKER_PLANS, _WORKER_FILTER_STORE
+    _WORKER_PLANS = tuple(plans)
+    _WORKER_FILTER_STORE = filter_store
+    # worker processes do not inherit the hooks registered in the parent
+    for hook in resource_hooks:
+        register_resource_hook(hook)
+
+
+class ProcessStageResult(NamedTuple):
+    """
+    Outcome of the process stage of a repository.
+
+    :param matched: Indexes of the plans whose filters matched, in order.
+    :param diffs: For dry runs, the diff of each matched plan, in the order of `matched`.
+    :param changed_paths: Otherwise, the files the code changes of the first matched
+        plan wrote or removed, see `apply_changeset`.
+    :param samples: The metrics of the stage, which may have run in another process.
+    """
+
+    matched: List[int]
+    diffs: List[str]
+    changed_paths: Optional[List[str]]
+    samples: List[Sample]
+
+
+def process_stage(
+    repo_path: Path,
+    dry_run: bool,
+    plan_indexes: Sequence[int],
+    skip_filters: bool = False,
+) -> ProcessStageResult:
+    """
+    Process stage: evaluate the filters of the given plans, and apply the first that matched.
+
+    The filters of every plan are evaluated in a single pass over the content. Only the
+    first plan that matched is applied, so that its changes can be committed before
+    the next is applied, from the same base, by another call with `skip_filters`. For
+    a dry run, the diff of every plan that matched is computed instead, each on its
+    own overlay of the clone.
+    :param repo_path: The clone.
+    :param dry_run: Compute diffs instead of applying changes.
+    :param plan_indexes: Indexes of the plans to run, see `set_worker_plans`.
+    :param skip_filters: The filters of the plans are known to match.
+    """
+    plans = [_WORKER_PLANS[i] for i in plan_indexes]
+    store = _WORKER_FILTER_STORE
+    diffs = []
+    changed_paths = None
+    with metrics.collecting(Metrics()) as collected:
+        with metrics.timed("stage", stage=PROCESS):
+            # shared by the filters and the code changes applied after them
+            with repository_index(repo_path, dry_run=dry_run):
+                if skip_filters:
+                    plans_matched = [True] * len(plans)
+                else:
+                    plans_matched = changesets_match(plans, repo_path, store)
+                matched = [
+                    (index, plan)
+                    for index, plan, plan_matched in zip(
+                        plan_indexes, plans, plans_matched
+                    )
+                    if plan_matched
+                ]
+                if matched and not dry_run:
+                    result = apply_changeset(
+                        matched[0][1], repo_path, skip_filters=True
+                    )
+                    changed_paths = result.changed_paths
+            if dry_run:
+                # every preview starts from the clone, on an overlay of its own
+                diffs = [
+                    preview_repository(plan, repo_path, skip_filters=True) or ""
+                    for _, plan in matched
+                ]
+    return ProcessStageResult(
+        [index for index, _ in matched], diffs, changed_paths, collected.samples()
+    )
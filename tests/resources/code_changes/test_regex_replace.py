@@ -0,0 +1,69 @@
+from gator.resources.build import build_gator_resource
+from gator.resources.content import FileContent
+from gator.resources.index import RepositoryIndex
+
+SOME_FILE_NAME = "requirements.txt"
+
+SOME_CODE_CHANGE = {
+    "kind": "RegexReplaceCodeChange",
+    "version": "v1alpha",
+    "spec": {
+        "replacement_details": [
+            {"regex": "pygitops", "replace_term": "intermediate", "paths": ["."]},
+            {
+                "regex": "intermediate",
+                "replace_term": "pygitops",
+                "paths": [".", SOME_FILE_NAME],
+            },
+            {"regex": "0\\.9\\.0", "replace_term": "0.10.0", "paths": [SOME_FILE_NAME]},
+        ]
+    },
+}
+
+
+def test_make_code_changes__several_details_apply_to_file__file_read_and_written_once(
+    tmp_path, mocker
+):
+    (tmp_path / SOME_FILE_NAME).write_text("pygitops==0.9.0\n")
+    read_spy = mocker.spy(FileContent, "read")
+    write_spy = mocker.spy(RepositoryIndex, "write_bytes")
+
+    build_gator_resource(SOME_CODE_CHANGE).make_code_changes(tmp_path)
+
+    assert (tmp_path / SOME_FILE_NAME).read_text() == "pygitops==0.10.0\n"
+    assert read_spy.call_count == 1
+    assert write_spy.call_count == 1
+
+
+def test_make_code_changes__details_cancel_out__file_not_written(tmp_path, mocker):
+    (tmp_path / SOME_FILE_NAME).write_text("pygitops\n")
+    write_spy = mocker.spy(RepositoryIndex, "write_bytes")
+
+    build_gator_resource(SOME_CODE_CHANGE).make_code_changes(tmp_path)
+
+    assert (tmp_path / SOME_FILE_NAME).read_text() == "pygitops\n"
+    write_spy.assert_not_called()
+
+
+def test_make_code_changes__crlf_newlines__matched_as_newlines_and_kept(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_bytes(b"black==22.1.0\r\npygitops==0.9.0\r\n")
+    code_change = {
+        "kind": "RegexReplaceCodeChange",
+        "version": "v1alpha",
+        "spec": {
+            "replacement_details": [
+                {"regex": "==.*$", "replace_term": "", "paths": [SOME_FILE_NAME]},
+                {
+                    "regex": "^black\\npygitops",
+                    "replace_term": "black\\nisort\\npygitops",
+                    "paths": [SOME_FILE_NAME],
+                },
+            ]
+        },
+    }
+
+    build_gator_resource(code_change).make_code_changes(tmp_path)
+
+    assert (tmp_path / SOME_FILE_NAME).read_bytes() == (
+        b"black\r\nisort\r\npygitops\r\n"
+    )
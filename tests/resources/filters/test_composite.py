@@ -0,0 +1,212 @@
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from gator.resources.build import build_gator_resource
+from gator.resources.code_changes.remove_file import (
+    RemoveFileCodeChangeV1Alpha,
+    RemoveFileCodeChangeV1AlphaSpec,
+)
+from gator.resources.filters.composite import (
+    AndFilterV1Alpha,
+    CompositeFilterV1AlphaSpec,
+    NotFilterV1Alpha,
+    NotFilterV1AlphaSpec,
+    OrFilterV1Alpha,
+)
+from gator.resources.filters.metadata import (
+    PathExistsFilterV1Alpha,
+    PathExistsFilterV1AlphaSpec,
+)
+from gator.resources.filters.regex_filter import (
+    RegexFilterV1Alpha,
+    RegexFilterV1AlphaSpec,
+)
+from gator.resources.filters.selectivity import FILTER_SELECTIVITY
+from gator.resources.git_tree import GitTree
+from gator.resources.models import FilterResource
+
+SOME_FILE_NAME = "requirements.txt"
+SOME_FILE_CONTENT = "pygitops==0.9.0\n"
+
+
+class AlwaysFilter(FilterResource):
+    kind = "AlwaysFilter"
+    version = "v1alpha"
+    result: bool
+
+    def matches(self, repo_path: Path) -> bool:
+        return self.result
+
+
+class AlwaysTreeFilter(AlwaysFilter):
+    kind = "AlwaysTreeFilter"
+    supports_git_tree = True
+
+    def matches_tree(self, tree: GitTree) -> bool:
+        return self.result
+
+
+@pytest.fixture(autouse=True)
+def selectivity():
+    FILTER_SELECTIVITY.reset()
+    yield FILTER_SELECTIVITY
+    FILTER_SELECTIVITY.reset()
+
+
+@pytest.fixture
+def repo_path(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    return tmp_path
+
+
+def _and(*filters):
+    return AndFilterV1Alpha(spec=CompositeFilterV1AlphaSpec(filters=list(filters)))
+
+
+def _or(*filters):
+    return OrFilterV1Alpha(spec=CompositeFilterV1AlphaSpec(filters=list(filters)))
+
+
+def _not(filter_resource):
+    return NotFilterV1Alpha(spec=NotFilterV1AlphaSpec(filter=filter_resource))
+
+
+def _path_exists_filter(path):
+    return PathExistsFilterV1Alpha(spec=PathExistsFilterV1AlphaSpec(paths=[path]))
+
+
+def _regex_filter(regex):
+    return RegexFilterV1Alpha(
+        spec=RegexFilterV1AlphaSpec(regex=regex, paths=[SOME_FILE_NAME])
+    )
+
+
+@pytest.mark.parametrize(
+    "results, expected",
+    [([True, True], True), ([True, False], False), ([False, False], False)],
+)
+def test_and_filter__filter_results__matches_if_all_match(repo_path, results, expected):
+    resource = _and(*[AlwaysFilter(result=result) for result in results])
+
+    assert resource.matches(repo_path) is expected
+
+
+@pytest.mark.parametrize(
+    "results, expected",
+    [([True, True], True), ([False, True], True), ([False, False], False)],
+)
+def test_or_filter__filter_results__matches_if_any_matches(
+    repo_path, results, expected
+):
+    resource = _or(*[AlwaysFilter(result=result) for result in results])
+
+    assert resource.matches(repo_path) is expected
+
+
+@pytest.mark.parametrize("result", [True, False])
+def test_not_filter__filter_result__negated(repo_path, result):
+    assert _not(AlwaysFilter(result=result)).matches(repo_path) is not result
+
+
+def test_and_filter__cheap_filter_does_not_match__content_not_scanned(
+    repo_path, mocker
+):
+    scan = mocker.spy(RegexFilterV1Alpha, "matches")
+
+    resource = _and(_regex_filter("pygitops"), _path_exists_filter("setup.py"))
+
+    assert resource.matches(repo_path) is False
+    assert scan.call_count == 0
+
+
+def test_or_filter__cheap_filter_matches__content_not_scanned(repo_path, mocker):
+    scan = mocker.spy(RegexFilterV1Alpha, "matches")
+
+    resource = _or(_regex_filter("flake8"), _path_exists_filter(SOME_FILE_NAME))
+
+    assert resource.matches(repo_path) is True
+    assert scan.call_count == 0
+
+
+def test_and_filter__filter_seldom_matches__evaluated_first(repo_path, mocker):
+    matches = mocker.spy(AlwaysFilter, "matches")
+    often, seldom = AlwaysFilter(result=True), AlwaysFilter(result=False)
+    for _ in range(5):
+        FILTER_SELECTIVITY.record(often, True)
+        FILTER_SELECTIVITY.record(seldom, False)
+
+    assert _and(often, seldom).matches(repo_path) is False
+    assert matches.call_count == 1
+
+
+def test_composite_filter__nested_filters__built_from_dicts(repo_path):
+    resource = build_gator_resource(
+        {
+            "kind": "NotFilter",
+            "version": "v1alpha",
+            "spec": {
+                "filter": {
+                    "kind": "OrFilter",
+                    "version": "v1alpha",
+                    "spec": {
+                        "filters": [
+                            {
+                                "kind": "PathExistsFilter",
+                                "version": "v1alpha",
+                                "spec": {"paths": ["setup.py"]},
+                            },
+                            {
+                                "kind": "RegexFilter",
+                                "version": "v1alpha",
+                                "spec": {"regex": "pygitops", "paths": ["."]},
+                            },
+                        ]
+                    },
+                }
+            },
+        }
+    )
+
+    assert isinstance(resource, NotFilterV1Alpha)
+    assert resource.matches(repo_path) is False
+    assert resource.touched_paths() == ["setup.py", "."]
+
+
+def test_composite_filter__code_change__raises_validation_error():
+    code_change = RemoveFileCodeChangeV1Alpha(
+        spec=RemoveFileCodeChangeV1AlphaSpec(files=[SOME_FILE_NAME])
+    )
+
+    with pytest.raises(ValidationError):
+        CompositeFilterV1AlphaSpec(filters=[code_change])
+
+
+def test_composite_filter__no_filters__raises_validation_error():
+    with pytest.raises(ValidationError):
+        CompositeFilterV1AlphaSpec(filters=[])
+
+
+def test_and_filter__tree__filters_without_support_skipped(tmp_path, mocker):
+    tree = mocker.Mock(spec=GitTree, root=tmp_path)
+
+    resource = _and(AlwaysFilter(result=False), AlwaysTreeFilter(result=True))
+
+    assert resource.matches_tree(tree) is True
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ([AlwaysTreeFilter(result=False), AlwaysFilter(result=False)], True),
+        ([AlwaysTreeFilter(result=False), AlwaysTreeFilter(result=True)], True),
+        ([AlwaysTreeFilter(result=False)], False),
+    ],
+)
+def test_or_filter__tree__false_only_if_no_filter_can_match(
+    tmp_path, mocker, filters, expected
+):
+    tree = mocker.Mock(spec=GitTree, root=tmp_path)
+
+    assert _or(*filters).matches_tree(tree) is expected
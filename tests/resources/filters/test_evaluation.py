@@ -0,0 +1,224 @@
+from pathlib import Path
+
+import pytest
+from git import Actor, Repo
+
+from gator.resources.content import FileContent
+from gator.resources.filters import evaluation
+from gator.resources.filters.evaluation import (
+    evaluate_filters,
+    filter_sets_match,
+    filter_sets_match_tree,
+    filters_match,
+    filters_match_tree,
+)
+from gator.resources.filters.metadata import (
+    PathExistsFilterV1Alpha,
+    PathExistsFilterV1AlphaSpec,
+)
+from gator.resources.filters.regex_filter import (
+    RegexFilterV1Alpha,
+    RegexFilterV1AlphaSpec,
+)
+from gator.resources.git_tree import GitTree
+from gator.resources.index import repository_index
+from gator.resources.models import FilterResource
+
+SOME_FILE_NAME = "requirements.txt"
+SOME_DIR_NAME = "app1"
+SOME_FILE_CONTENT = "pygitops==0.9.0\nblack==22.1.0\n"
+SOME_ACTOR = Actor("some-name", "some-email@example.com")
+
+
+class AlwaysFilter(FilterResource):
+    kind = "AlwaysFilter"
+    version = "v1alpha"
+    result: bool
+
+    def matches(self, repo_path: Path) -> bool:
+        return self.result
+
+
+class AlwaysTreeFilter(AlwaysFilter):
+    kind = "AlwaysTreeFilter"
+    supports_git_tree = True
+
+    def matches_tree(self, tree: GitTree) -> bool:
+        return self.result
+
+
+def _regex_filter(regex, paths):
+    return RegexFilterV1Alpha(spec=RegexFilterV1AlphaSpec(regex=regex, paths=paths))
+
+
+def test_evaluate_filters__several_regex_filters__each_result_reported(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    filters = [
+        _regex_filter("pygitops", [SOME_FILE_NAME]),
+        _regex_filter("flake8", [SOME_FILE_NAME]),
+        _regex_filter(r"black==\d+", ["."]),
+        _regex_filter("pygitops", ["some-path-dne"]),
+    ]
+
+    assert evaluate_filters(filters, tmp_path) == [True, False, True, False]
+
+
+def test_evaluate_filters__overlapping_paths__each_file_read_once(tmp_path, mocker):
+    (tmp_path / SOME_DIR_NAME).mkdir()
+    (tmp_path / SOME_DIR_NAME / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    read = mocker.spy(FileContent, "read")
+
+    filters = [
+        _regex_filter("flake8", ["."]),
+        _regex_filter("mypy", [SOME_DIR_NAME, f"{SOME_DIR_NAME}/{SOME_FILE_NAME}"]),
+        _regex_filter("isort", [SOME_FILE_NAME]),
+    ]
+
+    with repository_index(tmp_path):
+        assert evaluate_filters(filters, tmp_path) == [False, False, False]
+
+    assert read.call_count == 2
+
+
+def test_evaluate_filters__custom_filter__custom_matches_used(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    filters = [
+        AlwaysFilter(result=False),
+        _regex_filter("pygitops", [SOME_FILE_NAME]),
+    ]
+
+    assert evaluate_filters(filters, tmp_path) == [False, True]
+
+
+def test_filters_match__regex_filter_does_not_match__custom_filter_not_evaluated(
+    tmp_path, mocker
+):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    custom_filter = AlwaysFilter(result=True)
+    matches = mocker.spy(AlwaysFilter, "matches")
+
+    filters = [custom_filter, _regex_filter("flake8", [SOME_FILE_NAME])]
+
+    assert filters_match(filters, tmp_path) is False
+    assert matches.call_count == 0
+
+
+def test_filters_match__all_filters_match__true_returned(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    filters = [
+        AlwaysFilter(result=True),
+        _regex_filter("pygitops", [SOME_FILE_NAME]),
+        _regex_filter("black", ["."]),
+    ]
+
+    assert filters_match(filters, tmp_path) is True
+
+
+def test_filter_sets_match__several_sets__content_read_once(tmp_path, mocker):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    read = mocker.spy(FileContent, "read")
+
+    filter_sets = [
+        [_regex_filter("pygitops", [SOME_FILE_NAME])],
+        [_regex_filter("pygitops", [SOME_FILE_NAME]), _regex_filter("flake8", ["."])],
+        [_regex_filter("black", ["."])],
+    ]
+
+    with repository_index(tmp_path):
+        assert filter_sets_match(filter_sets, tmp_path) == [True, False, True]
+
+    assert read.call_count == 1
+
+
+def test_filter_sets_match__shared_custom_filter__evaluated_once(tmp_path, mocker):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    matches = mocker.spy(AlwaysFilter, "matches")
+
+    filter_sets = [
+        [AlwaysFilter(result=True), _regex_filter("pygitops", [SOME_FILE_NAME])],
+        [AlwaysFilter(result=True)],
+        [AlwaysFilter(result=False), _regex_filter("flake8", [SOME_FILE_NAME])],
+    ]
+
+    assert filter_sets_match(filter_sets, tmp_path) == [True, True, False]
+    assert matches.call_count == 1
+
+
+def test_filters_match__metadata_filter_does_not_match__content_not_scanned(
+    tmp_path, mocker
+):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    scan = mocker.spy(evaluation, "scan_for_matches")
+
+    filters = [
+        _regex_filter("pygitops", [SOME_FILE_NAME]),
+        PathExistsFilterV1Alpha(spec=PathExistsFilterV1AlphaSpec(paths=["setup.py"])),
+    ]
+
+    assert filters_match(filters, tmp_path) is False
+    assert scan.call_count == 0
+
+
+def test_filter_sets_match__set_ruled_out_by_metadata__not_scanned_for(
+    tmp_path, mocker
+):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    scan = mocker.spy(evaluation, "scan_for_matches")
+    missing = PathExistsFilterV1Alpha(spec=PathExistsFilterV1AlphaSpec(paths=["a"]))
+
+    filter_sets = [
+        [_regex_filter("pygitops", [SOME_FILE_NAME])],
+        [_regex_filter("black", ["."]), missing],
+    ]
+
+    assert filter_sets_match(filter_sets, tmp_path) == [True, False]
+    assert [len(call.args[1]) for call in scan.call_args_list] == [1]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    work_path = tmp_path / "work"
+    work = Repo.init(work_path, initial_branch="main")
+    (work_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    work.index.add([SOME_FILE_NAME])
+    work.index.commit("initial commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+    Repo.clone_from(work_path, tmp_path / "mirror.git", bare=True)
+    with GitTree(tmp_path / "mirror.git") as tree:
+        yield tree
+
+
+@pytest.mark.parametrize("regex, expected", [("pygitops", True), ("flake8", False)])
+def test_filters_match_tree__regex_filter__evaluated_from_objects(
+    tree, regex, expected
+):
+    assert filters_match_tree([_regex_filter(regex, ["."])], tree) is expected
+
+
+def test_filters_match_tree__custom_filter_without_support__skipped(tree, mocker):
+    matches = mocker.spy(AlwaysFilter, "matches")
+
+    filters = [AlwaysFilter(result=False), _regex_filter("pygitops", ["."])]
+
+    assert filters_match_tree(filters, tree) is True
+    assert matches.call_count == 0
+
+
+def test_filters_match_tree__custom_filter_with_support__matches_tree_used(tree):
+    filters = [AlwaysTreeFilter(result=False), _regex_filter("pygitops", ["."])]
+
+    assert filters_match_tree(filters, tree) is False
+
+
+def test_filter_sets_match_tree__several_sets__each_result_reported(tree):
+    filter_sets = [
+        [_regex_filter("pygitops", ["."]), AlwaysFilter(result=False)],
+        [_regex_filter("flake8", ["."])],
+        [AlwaysTreeFilter(result=False)],
+        [],
+    ]
+
+    assert filter_sets_match_tree(filter_sets, tree) == [True, False, False, True]
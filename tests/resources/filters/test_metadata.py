@@ -0,0 +1,154 @@
+import pytest
+from git import Actor, Repo
+from pydantic import ValidationError
+
+from gator.resources.content import FileContent
+from gator.resources.filters.metadata import (
+    FileSizeFilterV1Alpha,
+    FileSizeFilterV1AlphaSpec,
+    GlobFilterV1Alpha,
+    GlobFilterV1AlphaSpec,
+    LanguageFilterV1Alpha,
+    LanguageFilterV1AlphaSpec,
+    PathExistsFilterV1Alpha,
+    PathExistsFilterV1AlphaSpec,
+)
+from gator.resources.git_tree import GitTree
+
+SOME_DIR_NAME = "app1"
+SOME_FILE_NAME = "requirements.txt"
+SOME_PYTHON_FILE_NAME = "main.py"
+SOME_FILE_CONTENT = "pygitops==0.9.0\n"
+SOME_ACTOR = Actor("some-name", "some-email@example.com")
+
+
+@pytest.fixture
+def repo_path(tmp_path):
+    repo_path = tmp_path / "work"
+    (repo_path / SOME_DIR_NAME).mkdir(parents=True)
+    (repo_path / SOME_DIR_NAME / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    (repo_path / SOME_DIR_NAME / SOME_PYTHON_FILE_NAME).write_text("")
+    return repo_path
+
+
+@pytest.fixture
+def tree(repo_path):
+    work = Repo.init(repo_path, initial_branch="main")
+    work.index.add([SOME_DIR_NAME])
+    work.index.commit("initial commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+    Repo.clone_from(repo_path, repo_path.parent / "mirror.git", bare=True)
+    with GitTree(repo_path.parent / "mirror.git") as tree:
+        yield tree
+
+
+def _path_exists_filter(paths):
+    return PathExistsFilterV1Alpha(spec=PathExistsFilterV1AlphaSpec(paths=paths))
+
+
+def _glob_filter(paths):
+    return GlobFilterV1Alpha(spec=GlobFilterV1AlphaSpec(paths=paths))
+
+
+def _language_filter(languages, paths=(".",)):
+    return LanguageFilterV1Alpha(
+        spec=LanguageFilterV1AlphaSpec(languages=languages, paths=list(paths))
+    )
+
+
+@pytest.mark.parametrize(
+    "paths, expected",
+    [
+        ([SOME_DIR_NAME], True),
+        ([f"{SOME_DIR_NAME}/{SOME_FILE_NAME}"], True),
+        (["setup.py", SOME_DIR_NAME], True),
+        (["setup.py"], False),
+    ],
+)
+def test_path_exists_filter__paths__matches_if_any_exists(repo_path, paths, expected):
+    assert _path_exists_filter(paths).matches(repo_path) is expected
+
+
+@pytest.mark.parametrize(
+    "paths, expected", [([f"{SOME_DIR_NAME}/{SOME_FILE_NAME}"], True), (["a"], False)]
+)
+def test_path_exists_filter__tree__matches_as_checkout(tree, paths, expected):
+    assert _path_exists_filter(paths).matches_tree(tree) is expected
+
+
+def test_path_exists_filter__glob_path__raises_validation_error():
+    with pytest.raises(ValidationError):
+        PathExistsFilterV1AlphaSpec(paths=["**/setup.py"])
+
+
+@pytest.mark.parametrize(
+    "paths, expected",
+    [
+        (["**/requirements*.txt"], True),
+        ([f"{SOME_DIR_NAME}/*.py"], True),
+        (["*.py"], False),
+        (["other/**"], False),
+    ],
+)
+def test_glob_filter__paths__matches_if_any_file_selected(repo_path, paths, expected):
+    assert _glob_filter(paths).matches(repo_path) is expected
+
+
+@pytest.mark.parametrize("paths, expected", [(["**/*.py"], True), (["*.txt"], False)])
+def test_glob_filter__tree__matches_as_checkout(tree, paths, expected):
+    assert _glob_filter(paths).matches_tree(tree) is expected
+
+
+def test_glob_filter__file_selected__content_not_read(repo_path, mocker):
+    read = mocker.spy(FileContent, "read")
+
+    assert _glob_filter(["**/*.txt"]).matches(repo_path) is True
+    assert read.call_count == 0
+
+
+@pytest.mark.parametrize(
+    "min_bytes, max_bytes, expected",
+    [(1, None, True), (None, 0, True), (100, None, False), (1, 4, False)],
+)
+def test_file_size_filter__bounds__matches_if_any_file_within(
+    repo_path, min_bytes, max_bytes, expected
+):
+    resource = FileSizeFilterV1Alpha(
+        spec=FileSizeFilterV1AlphaSpec(
+            paths=[SOME_DIR_NAME], min_bytes=min_bytes, max_bytes=max_bytes
+        )
+    )
+
+    assert resource.matches(repo_path) is expected
+
+
+@pytest.mark.parametrize("min_bytes, max_bytes", [(None, None), (-1, None), (10, 1)])
+def test_file_size_filter__invalid_bounds__raises_validation_error(
+    min_bytes, max_bytes
+):
+    with pytest.raises(ValidationError):
+        FileSizeFilterV1AlphaSpec(paths=["."], min_bytes=min_bytes, max_bytes=max_bytes)
+
+
+@pytest.mark.parametrize(
+    "languages, paths, expected",
+    [
+        (["Python"], ["."], True),
+        (["go", "python"], [SOME_DIR_NAME], True),
+        (["go"], ["."], False),
+        (["python"], ["other"], False),
+    ],
+)
+def test_language_filter__languages__matches_if_any_file_of_language(
+    repo_path, languages, paths, expected
+):
+    assert _language_filter(languages, paths).matches(repo_path) is expected
+
+
+@pytest.mark.parametrize("languages, expected", [(["python"], True), (["java"], False)])
+def test_language_filter__tree__matches_as_checkout(tree, languages, expected):
+    assert _language_filter(languages).matches_tree(tree) is expected
+
+
+def test_language_filter__unknown_language__raises_validation_error():
+    with pytest.raises(ValidationError):
+        LanguageFilterV1AlphaSpec(languages=["klingon"])
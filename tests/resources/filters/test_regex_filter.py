@@ -1,4 +1,5 @@
 import pytest
+from pydantic import ValidationError
 
 from gator.resources.filters.regex_filter import (
     RegexFilterV1Alpha,
@@ -96,3 +97,80 @@ def test_regex_filter_v1_alpha__match_present__one_specified_dir_not_present__fi
     resource = RegexFilterV1Alpha(spec=spec)
 
     assert resource.matches(tmp_path) is True
+
+
+@pytest.mark.parametrize(
+    ["specified_path", "expected"],
+    [
+        (f"**/{SOME_FILE_NAME}", True),
+        (f"{SOME_DIR_NAME}/*.txt", True),
+        (f"{ANOTHER_DIR_NAME}/*.txt", False),
+        ("**/*.yml", False),
+    ],
+)
+def test_regex_filter_v1_alpha__glob_path_specified__matching_files_searched(
+    tmp_path, specified_path, expected
+):
+    dir_path = tmp_path / SOME_DIR_NAME
+    dir_path.mkdir()
+    (dir_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT_PYTHON38)
+
+    resource = RegexFilterV1Alpha(
+        spec=RegexFilterV1AlphaSpec(
+            regex=SOME_REGEX_PYTHON_VERSION, paths=[specified_path]
+        )
+    )
+
+    assert resource.matches(tmp_path) is expected
+
+
+def test_regex_filter_v1_alpha__invalid_regex__validation_error_raised():
+    with pytest.raises(ValidationError, match="Invalid regex"):
+        RegexFilterV1AlphaSpec(regex="(unclosed", paths=[SOME_FILE_NAME])
+
+
+@pytest.mark.parametrize(
+    ["content", "regex"],
+    [
+        (b"version: 1.0\r\nname: gator\r\n", r"version: 1\.0$"),
+        (b"version: 1.0\rname: gator\r", r"version: 1\.0$"),
+        (b"version: 1.0\r\nname: gator\r\n", r"1\.0\nname"),
+    ],
+)
+def test_regex_filter_v1_alpha__crlf_newlines__matched_as_newlines(
+    tmp_path, content, regex
+):
+    (tmp_path / SOME_FILE_NAME).write_bytes(content)
+
+    resource = RegexFilterV1Alpha(
+        spec=RegexFilterV1AlphaSpec(regex=regex, paths=[SOME_FILE_NAME])
+    )
+
+    assert resource.matches(tmp_path) is True
+
+
+def test_regex_filter_v1_alpha__git_file_present__git_file_not_searched(tmp_path):
+    (tmp_path / ".git").write_text("gitdir: ../.git/worktrees/some-worktree\n")
+
+    resource = RegexFilterV1Alpha(
+        spec=RegexFilterV1AlphaSpec(regex="gitdir", paths=["."])
+    )
+
+    assert resource.matches(tmp_path) is False
+
+
+@pytest.mark.parametrize(
+    "paths, expected", [([".", SOME_DIR_NAME], True), (["."], False)]
+)
+def test_regex_filter_v1_alpha__ignored_dir_listed_with_root__ignored_dir_searched(
+    tmp_path, paths, expected
+):
+    (tmp_path / ".gitignore").write_text(f"{SOME_DIR_NAME}/\n")
+    (tmp_path / SOME_DIR_NAME).mkdir()
+    (tmp_path / SOME_DIR_NAME / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT_PYTHON38)
+
+    resource = RegexFilterV1Alpha(
+        spec=RegexFilterV1AlphaSpec(regex=SOME_REGEX_PYTHON_VERSION, paths=paths)
+    )
+
+    assert resource.matches(tmp_path) is expected
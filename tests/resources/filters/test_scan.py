@@ -0,0 +1,77 @@
+import re
+
+from git import Actor, Repo
+
+from gator.resources.filters.scan import scan_files, scan_for_matches, scan_tree
+from gator.resources.git_tree import GitTree
+from gator.resources.index import RepositoryIndex
+
+SOME_FILE_NAME = "requirements.txt"
+
+
+def test_scan_files__given_files__only_listed_covered_files_searched(tmp_path):
+    for directory in ("app1", "app2", "ignored"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / SOME_FILE_NAME).write_text("pygitops==0.9.0\n")
+    (tmp_path / ".gatorignore").write_text("ignored/\n")
+    scans = [
+        (re.compile("pygitops"), ["app2"]),
+        (re.compile("pygitops"), ["**/requirements.txt"]),
+        (re.compile("absent"), ["."]),
+    ]
+
+    matched_files = scan_files(
+        tmp_path,
+        scans,
+        [tmp_path / "app1" / SOME_FILE_NAME, tmp_path / "ignored" / SOME_FILE_NAME],
+    )
+
+    assert matched_files == [None, tmp_path / "app1" / SOME_FILE_NAME, None]
+
+
+def test_scan_files__missing_file__skipped(tmp_path):
+    matched_files = scan_files(
+        tmp_path, [(re.compile("pygitops"), ["."])], [tmp_path / SOME_FILE_NAME]
+    )
+
+    assert matched_files == [None]
+
+
+def test_scan_for_matches__nested_paths__files_read_once(tmp_path, mocker):
+    (tmp_path / "app1").mkdir()
+    (tmp_path / "app1" / SOME_FILE_NAME).write_text("pygitops==0.9.0\n")
+    read_content = mocker.spy(RepositoryIndex, "read_content")
+    scans = [
+        (re.compile("absent"), [".", "app1"]),
+        (re.compile("pygitops"), ["app1/**/*.txt"]),
+    ]
+
+    assert scan_for_matches(tmp_path, scans) == [False, True]
+    assert read_content.call_count == 1
+
+
+def test_scan_tree__bare_mirror__same_results_as_checkout(tmp_path):
+    work_path = tmp_path / "work"
+    work = Repo.init(work_path, initial_branch="main")
+    for directory in ("app1", "app2", "ignored"):
+        (work_path / directory).mkdir()
+        (work_path / directory / SOME_FILE_NAME).write_text(f"{directory}==1.0\n")
+    (work_path / ".gatorignore").write_text("ignored/\n")
+    work.git.add("--all", "--force")
+    actor = Actor("some-name", "some-email@example.com")
+    work.index.commit("initial commit", author=actor, committer=actor)
+    Repo.clone_from(work_path, tmp_path / "mirror.git", bare=True)
+    scans = [
+        (re.compile("app1"), ["**/requirements.txt"]),
+        (re.compile("app2"), ["app1"]),
+        (re.compile("ignored=="), ["."]),
+        (re.compile("ignored=="), ["ignored/requirements.txt"]),
+        (re.compile("app2"), ["app3"]),
+    ]
+
+    with GitTree(tmp_path / "mirror.git") as tree:
+        results = scan_tree(tree, scans)
+
+    assert results == scan_for_matches(work_path, scans)
+    # a path listed explicitly is searched even if ignored
+    assert results == [True, False, False, True, False]
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pytest
+
+from gator.constants import CONTENT_FILTER_COST
+from gator.resources.filters.metadata import (
+    PathExistsFilterV1Alpha,
+    PathExistsFilterV1AlphaSpec,
+)
+from gator.resources.filters.selectivity import FILTER_SELECTIVITY, rank
+from gator.resources.models import FilterResource
+
+
+class AlwaysFilter(FilterResource):
+    kind = "AlwaysFilter"
+    version = "v1alpha"
+    result: bool
+
+    def matches(self, repo_path: Path) -> bool:
+        return self.result
+
+
+@pytest.fixture(autouse=True)
+def selectivity():
+    FILTER_SELECTIVITY.reset()
+    yield FILTER_SELECTIVITY
+    FILTER_SELECTIVITY.reset()
+
+
+def test_match_rate__never_evaluated__even_chances():
+    assert FILTER_SELECTIVITY.match_rate(AlwaysFilter(result=True)) == 0.5
+
+
+def test_match_rate__equal_filters__share_observations():
+    FILTER_SELECTIVITY.record(AlwaysFilter(result=True), True)
+    FILTER_SELECTIVITY.record(AlwaysFilter(result=True), True)
+
+    assert FILTER_SELECTIVITY.match_rate(AlwaysFilter(result=True)) == 0.75
+
+
+def test_rank__custom_filter__content_cost_assumed():
+    assert AlwaysFilter(result=True).estimated_cost() == CONTENT_FILTER_COST
+
+
+def test_rank__metadata_filter__ranked_before_content_filter():
+    cheap = PathExistsFilterV1Alpha(spec=PathExistsFilterV1AlphaSpec(paths=["a"]))
+    expensive = AlwaysFilter(result=True)
+
+    assert rank([expensive, cheap], lambda f: f, deciding=False) == [cheap, expensive]
+
+
+@pytest.mark.parametrize("deciding", [True, False])
+def test_rank__equal_cost__filter_most_likely_to_decide_first(deciding):
+    often, seldom = AlwaysFilter(result=True), AlwaysFilter(result=False)
+    for _ in range(5):
+        FILTER_SELECTIVITY.record(often, True)
+        FILTER_SELECTIVITY.record(seldom, False)
+
+    ranked = rank([often, seldom], lambda f: f, deciding=deciding)
+
+    assert ranked == ([often, seldom] if deciding else [seldom, often])
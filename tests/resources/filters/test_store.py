@@ -0,0 +1,190 @@
+import pickle
+
+import pytest
+from git import Actor, Repo
+
+from gator.resources.filters import store as store_module
+from gator.resources.filters.evaluation import evaluate_filters
+from gator.resources.filters.regex_filter import (
+    RegexFilterV1Alpha,
+    RegexFilterV1AlphaSpec,
+)
+from gator.resources.filters.store import FilterResultStore, filter_hash
+
+SOME_ACTOR = Actor("some-name", "some-email@example.com")
+
+
+def _regex_filter(regex, paths):
+    return RegexFilterV1Alpha(spec=RegexFilterV1AlphaSpec(regex=regex, paths=paths))
+
+
+def _commit(repo_path, files):
+    repo = Repo(repo_path)
+    for name, content in files.items():
+        path = repo_path / name
+        if content is None:
+            path.unlink()
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    repo.git.add("--all")
+    repo.index.commit("some commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+
+
+@pytest.fixture
+def repo_path(tmp_path):
+    repo_path = tmp_path / "repo"
+    Repo.init(repo_path, initial_branch="main")
+    _commit(
+        repo_path,
+        {
+            "requirements.txt": "pygitops==0.9.0\n",
+            "app1/requirements.txt": "pygitops==0.9.0\n",
+            "app2/setup.py": "name = 'app2'\n",
+        },
+    )
+    return repo_path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FilterResultStore(tmp_path / "store.sqlite")
+
+
+@pytest.fixture
+def scans(mocker):
+    return (
+        mocker.spy(store_module, "scan_for_matches"),
+        mocker.spy(store_module, "scan_files"),
+    )
+
+
+def test_evaluate__first_run__full_scan_stored(repo_path, store, scans):
+    filters = [_regex_filter("pygitops", ["."]), _regex_filter("flake8", ["."])]
+
+    results = store.evaluate(filters, repo_path)
+
+    assert results == [True, False]
+    assert scans[0].call_count == 1
+    stored = store.load(str(repo_path), [filter_hash(f) for f in filters])
+    tree = Repo(repo_path).git.rev_parse("HEAD^{tree}")
+    assert {key: record.tree for key, record in stored.items()} == {
+        filter_hash(filters[0]): tree,
+        filter_hash(filters[1]): tree,
+    }
+
+
+def test_evaluate__tree_unchanged__nothing_scanned(repo_path, store, scans):
+    filters = [_regex_filter("pygitops", ["."]), _regex_filter("flake8", ["."])]
+    store.evaluate(filters, repo_path)
+    scans[0].reset_mock()
+
+    results = store.evaluate(filters, repo_path)
+
+    assert results == [True, False]
+    scans[0].assert_not_called()
+    scans[1].assert_not_called()
+
+
+def test_evaluate__head_moved__only_changed_files_scanned(repo_path, store, scans):
+    filters = [_regex_filter("flake8", ["."])]
+    store.evaluate(filters, repo_path)
+    scans[0].reset_mock()
+    _commit(repo_path, {"app2/requirements.txt": "flake8==4.0.1\n"})
+
+    results = store.evaluate(filters, repo_path)
+
+    assert results == [True]
+    scans[0].assert_not_called()
+    assert scans[1].call_args.args[2] == [repo_path / "app2/requirements.txt"]
+
+
+def test_evaluate__matched_file_unchanged__still_matches(repo_path, store, scans):
+    filters = [_regex_filter("pygitops", ["requirements.txt"])]
+    store.evaluate(filters, repo_path)
+    scans[0].reset_mock()
+    _commit(repo_path, {"app2/setup.py": "name = 'renamed'\n"})
+
+    assert store.evaluate(filters, repo_path) == [True]
+    scans[0].assert_not_called()
+
+
+def test_evaluate__matched_file_changed_other_file_matches__full_scan_fallback(
+    repo_path, store, scans
+):
+    filters = [_regex_filter("pygitops", ["."])]
+    store.evaluate(filters, repo_path)
+    matched_file = (
+        store.load(str(repo_path), [filter_hash(filters[0])]).popitem()[1].matched_file
+    )
+    scans[0].reset_mock()
+    _commit(repo_path, {matched_file: "requests==2.0.0\n"})
+
+    results = store.evaluate(filters, repo_path)
+
+    assert results == [True]
+    assert scans[0].call_count == 1
+
+
+def test_evaluate__only_matched_files_removed__no_longer_matches(repo_path, store):
+    filters = [_regex_filter("pygitops", ["."])]
+    store.evaluate(filters, repo_path)
+    _commit(repo_path, {"requirements.txt": None, "app1/requirements.txt": None})
+
+    assert store.evaluate(filters, repo_path) == [False]
+
+
+def test_evaluate__ignore_file_changed__full_scan(repo_path, store, scans):
+    filters = [_regex_filter("pygitops", ["."])]
+    store.evaluate(filters, repo_path)
+    scans[0].reset_mock()
+    _commit(repo_path, {".gatorignore": "requirements.txt\napp1/\n"})
+
+    assert store.evaluate(filters, repo_path) == [False]
+    assert scans[0].call_count == 1
+
+
+def test_evaluate__dirty_working_tree__scanned_and_not_stored(repo_path, store):
+    filters = [_regex_filter("pygitops", ["."])]
+    (repo_path / "untracked.txt").write_text("some content\n")
+
+    assert store.evaluate(filters, repo_path) == [True]
+    assert store.load(str(repo_path), [filter_hash(filters[0])]) == {}
+
+
+def test_evaluate__not_a_repository__scanned(tmp_path, store):
+    (tmp_path / "requirements.txt").write_text("pygitops==0.9.0\n")
+
+    assert store.evaluate([_regex_filter("pygitops", ["."])], tmp_path) == [True]
+
+
+def test_evaluate__another_clone_of_same_remote__results_shared(
+    tmp_path, repo_path, store, scans
+):
+    filters = [_regex_filter("pygitops", ["."])]
+    Repo.clone_from(repo_path, tmp_path / "first")
+    Repo.clone_from(repo_path, tmp_path / "second")
+    store.evaluate(filters, tmp_path / "first")
+    scans[0].reset_mock()
+
+    assert store.evaluate(filters, tmp_path / "second") == [True]
+    scans[0].assert_not_called()
+
+
+def test_filter_result_store__pickled__same_database(repo_path, store):
+    filters = [_regex_filter("pygitops", ["."])]
+    store.evaluate(filters, repo_path)
+
+    unpickled = pickle.loads(pickle.dumps(store))
+
+    assert unpickled.load(str(repo_path), [filter_hash(filters[0])])
+
+
+def test_evaluate_filters__store__regex_filters_evaluated_through_store(
+    repo_path, store, mocker
+):
+    evaluate = mocker.spy(store, "evaluate")
+    filters = [_regex_filter("pygitops", ["."])]
+
+    assert evaluate_filters(filters, repo_path, store) == [True]
+    evaluate.assert_called_once_with(filters, repo_path)
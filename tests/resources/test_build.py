@@ -6,11 +6,15 @@ from pydantic import BaseModel
 
 from gator.exceptions import InvalidResourceError, InvalidSpecificationError
 from gator.resources.build import (
+    Changeset,
     CodeChangeResource,
     build_changeset,
+    build_changeset_plans,
+    build_changesets,
     build_gator_resource,
     register_custom_resource,
 )
+from gator.resources.changeset_cache import ChangesetCache
 
 SOME_INVALID_YAML = """not: real: \n- : -"""
 SOME_INVALID_CHANGESET = """
@@ -182,3 +186,76 @@ def test_register_custom_resource__no_kind_field__raises_error():
                 pass
 
         register_custom_resource(SomeClass)
+
+
+def test_build_changesets__multiple_documents__every_changeset_built():
+    spec = f"{SOME_VALID_CHANGESET}\n---\n---\n{DO_NOTHING_CHANGESET}"
+    register_custom_resource(DoNothingCodeChange)
+
+    changesets = build_changesets(spec)
+
+    assert [len(c.spec.code_changes) for c in changesets] == [1, 1]
+    assert isinstance(changesets[1].spec.code_changes[0], DoNothingCodeChange)
+
+
+def test_build_changeset_plans__multiple_documents__plan_per_changeset():
+    spec = f"{SOME_VALID_CHANGESET}\n---\n{DO_NOTHING_CHANGESET}"
+    register_custom_resource(DoNothingCodeChange)
+
+    plans = build_changeset_plans(spec)
+
+    assert [plan.name for plan in plans] == [
+        changeset.spec.name for changeset in build_changesets(spec)
+    ]
+    assert isinstance(plans[1].code_changes[0], DoNothingCodeChange)
+
+
+def test_build_changeset__multiple_documents__raises_invalid_specification_error():
+    with pytest.raises(InvalidSpecificationError, match="found 2"):
+        build_changeset(f"{SOME_VALID_CHANGESET}\n---\n{SOME_VALID_CHANGESET}")
+
+
+def test_build_changesets__cached__not_validated_again(mocker):
+    cache = ChangesetCache()
+    first = build_changesets(SOME_VALID_CHANGESET, cache)
+    parse = mocker.spy(Changeset, "parse_obj")
+
+    second = build_changesets(SOME_VALID_CHANGESET, cache)
+
+    assert second is first
+    parse.assert_not_called()
+
+
+def test_build_changesets__cached_on_disk__reused_by_another_cache(tmp_path, mocker):
+    expected = build_changesets(SOME_VALID_CHANGESET, ChangesetCache(tmp_path))
+    parse = mocker.spy(Changeset, "parse_obj")
+
+    changesets = build_changesets(SOME_VALID_CHANGESET, ChangesetCache(tmp_path))
+
+    assert changesets == expected
+    parse.assert_not_called()
+
+
+def test_build_changesets__resource_class_replaced__validated_again(mocker):
+    cache = ChangesetCache()
+    register_custom_resource(DoNothingCodeChange)
+    build_changesets(DO_NOTHING_CHANGESET, cache)
+
+    class OtherDoNothingCodeChange(DoNothingCodeChange):
+        kind = "DoNothingCodeChange"
+
+    register_custom_resource(OtherDoNothingCodeChange)
+    try:
+        changesets = build_changesets(DO_NOTHING_CHANGESET, cache)
+    finally:
+        register_custom_resource(DoNothingCodeChange)
+
+    assert isinstance(changesets[0].spec.code_changes[0], OtherDoNothingCodeChange)
+
+
+def test_changeset_cache__corrupt_entry__treated_as_missing(tmp_path):
+    cache = ChangesetCache(tmp_path)
+    cache.put(SOME_VALID_CHANGESET, [])
+    next(tmp_path.glob("*.pickle")).write_bytes(b"not a pickle")
+
+    assert ChangesetCache(tmp_path).get(SOME_VALID_CHANGESET) is None
@@ -0,0 +1,107 @@
+import codecs
+import mmap
+import re
+
+import pytest
+
+from gator.constants import DEFAULT_REGEX_MODES
+from gator.resources.content import FileContent, compile_content_pattern
+
+SOME_FILENAME = "some-filename"
+SOME_ASCII_CONTENT = b"pygitops==0.9.0\nblack==22.1.0\n"
+SOME_NON_ASCII_CONTENT = "café==0.9.0\n".encode("utf-8")
+SOME_BINARY_CONTENT = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+
+
+def _content(tmp_path, data):
+    path = tmp_path / SOME_FILENAME
+    path.write_bytes(data)
+    return FileContent.read(path)
+
+
+def _pattern(regex):
+    return compile_content_pattern(re.compile(regex, flags=DEFAULT_REGEX_MODES))
+
+
+def test_read__large_file__memory_mapped(tmp_path, monkeypatch):
+    monkeypatch.setattr("gator.resources.content.MMAP_THRESHOLD_BYTES", 1)
+
+    content = _content(tmp_path, SOME_ASCII_CONTENT)
+
+    assert isinstance(content.data, mmap.mmap)
+    assert _pattern(r"black==\d+").search(content) is True
+
+
+def test_search__ascii_pattern_ascii_content__content_not_decoded(tmp_path, mocker):
+    content = _content(tmp_path, SOME_ASCII_CONTENT)
+    decode = mocker.spy(FileContent, "decode")
+
+    assert _pattern(r"^black==22\.1\.0$").search(content) is True
+    assert _pattern("flake8").search(content) is False
+    assert decode.call_count == 0
+
+
+@pytest.mark.parametrize(["regex", "expected"], [(r"^\w+==", True), ("caf.==", True)])
+def test_search__non_ascii_content__decoded_content_searched(tmp_path, regex, expected):
+    content = _content(tmp_path, SOME_NON_ASCII_CONTENT)
+
+    assert _pattern(regex).search(content) is expected
+
+
+def test_search__unit_separator_in_content__unicode_whitespace_semantics_kept(
+    tmp_path,
+):
+    content = _content(tmp_path, b"foo\x1fbar")
+
+    assert _pattern(r"foo\sbar").search(content) is True
+
+
+def test_search__binary_content__no_match(tmp_path):
+    content = _content(tmp_path, SOME_BINARY_CONTENT)
+
+    assert content.is_binary is True
+    assert _pattern("PNG").search(content) is False
+
+
+def test_sub__no_match__none_returned(tmp_path):
+    content = _content(tmp_path, SOME_ASCII_CONTENT)
+
+    assert _pattern("flake8").sub("mypy", content) is None
+
+
+@pytest.mark.parametrize(
+    ["data", "expected"],
+    [
+        (b"black==22.1.0\r\nisort==5.10.1\r\n", b"black\r\nisort\r\n"),
+        (b"black==22.1.0\risort==5.10.1\r", b"black\risort\r"),
+        (b"black==22.1.0\r\nisort==5.10.1\n", b"black\r\nisort\n"),
+    ],
+)
+def test_sub__line_end_anchor__matches_before_any_line_ending(tmp_path, data, expected):
+    content = _content(tmp_path, data)
+
+    assert _pattern("==[0-9.]+$").search(content) is True
+    assert _pattern("==.*$").sub("", content) == expected
+
+
+def test_search__literal_newline__crlf_content_not_rejected_by_prefilter(tmp_path):
+    content = _content(tmp_path, b"black==22.1.0\r\nisort==5.10.1\r\n")
+
+    assert _pattern(r"22\.1\.0\nisort").search(content) is True
+
+
+def test_sub__crlf_newlines__newlines_preserved(tmp_path):
+    content = _content(tmp_path, b"black==22.1.0\r\nisort==5.10.1\r\n")
+
+    assert (
+        _pattern(r"(?<=black==)22\.1\.0").sub("22.3.0", content)
+        == b"black==22.3.0\r\nisort==5.10.1\r\n"
+    )
+
+
+def test_sub__byte_order_mark__byte_order_mark_preserved(tmp_path):
+    content = _content(tmp_path, codecs.BOM_UTF8 + SOME_NON_ASCII_CONTENT)
+
+    assert _pattern(r"0\.9\.0").sub("1.0.0", content) == (
+        codecs.BOM_UTF8 + "café==1.0.0\n".encode("utf-8")
+    )
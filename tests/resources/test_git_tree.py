@@ -0,0 +1,110 @@
+import os
+
+import pytest
+from git import Actor, Repo
+
+from gator.resources.git_tree import GitTree
+from gator.resources.index import RepositoryIndex
+
+SOME_ACTOR = Actor("some-name", "some-email@example.com")
+SOME_FILES = {
+    "requirements.txt": "pygitops==0.9.0\n",
+    "app1/requirements.txt": "pygitops==0.9.0\n",
+    "app1/secret.txt": "some secret\n",
+    "app1/.gatorignore": "secret.txt\n",
+    "build/output.txt": "some output\n",
+    "docs/build/index.md": "# docs\n",
+    ".gitignore": "/build/\n",
+}
+
+
+@pytest.fixture
+def work_path(tmp_path):
+    """A working tree with committed ignore files, symlinks and ignored files."""
+    work_path = tmp_path / "work"
+    work = Repo.init(work_path, initial_branch="main")
+    for name, content in SOME_FILES.items():
+        (work_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (work_path / name).write_text(content)
+    os.symlink("requirements.txt", work_path / "linked.txt")
+    os.symlink("app1", work_path / "linked-dir")
+    work.git.add("--all", "--force")
+    work.index.commit("initial commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+    return work_path
+
+
+@pytest.fixture
+def mirror_path(tmp_path, work_path):
+    Repo.clone_from(work_path, tmp_path / "mirror.git", bare=True)
+    return tmp_path / "mirror.git"
+
+
+def _relative(paths, root):
+    return {str(path.relative_to(root)) for path in paths}
+
+
+@pytest.mark.parametrize("target", ["", "app1", "docs", "build", "requirements.txt"])
+def test_iter_files__bare_mirror__same_files_as_checkout(
+    work_path, mirror_path, target
+):
+    with GitTree(mirror_path) as tree:
+        files = _relative(tree.iter_files(mirror_path / target), mirror_path)
+
+    index = RepositoryIndex(work_path)
+    assert files == _relative(index.iter_files(work_path / target), work_path)
+
+
+def test_iter_files__root__ignored_files_and_symlinked_directories_left_out(
+    mirror_path,
+):
+    with GitTree(mirror_path) as tree:
+        files = _relative(tree.iter_files(mirror_path), mirror_path)
+
+    assert files == {
+        ".gitignore",
+        "requirements.txt",
+        "linked.txt",
+        "app1/.gatorignore",
+        "app1/requirements.txt",
+        "docs/build/index.md",
+    }
+
+
+def test_iter_files__path_dne__raises_file_not_found_error(mirror_path):
+    with GitTree(mirror_path) as tree:
+        with pytest.raises(FileNotFoundError):
+            list(tree.iter_files(mirror_path / "some-dir"))
+
+
+def test_iter_files__empty_repository__raises_file_not_found_error(tmp_path):
+    Repo.init(tmp_path / "empty.git", bare=True)
+
+    with GitTree(tmp_path / "empty.git") as tree:
+        with pytest.raises(FileNotFoundError):
+            list(tree.iter_files(tmp_path / "empty.git"))
+
+
+def test_read_content__several_files__one_cat_file_process(mirror_path):
+    with GitTree(mirror_path) as tree:
+        first = tree.read_text(mirror_path / "requirements.txt")
+        process = tree._repo.git.cat_file_all
+        linked = tree.read_content(mirror_path / "linked.txt")
+
+        assert tree._repo.git.cat_file_all is process
+    assert first == "pygitops==0.9.0\n"
+    assert bytes(linked.data) == b"pygitops==0.9.0\n"
+
+
+def test_read_content__file_dne__raises_file_not_found_error(mirror_path):
+    with GitTree(mirror_path) as tree:
+        with pytest.raises(FileNotFoundError):
+            tree.read_content(mirror_path / "app1")
+
+
+def test_exists__paths__files_and_directories_of_tree(mirror_path):
+    with GitTree(mirror_path) as tree:
+        assert tree.exists(mirror_path)
+        assert tree.exists(mirror_path / "app1")
+        assert tree.exists(mirror_path / "app1" / "requirements.txt")
+        assert not tree.exists(mirror_path / "app")
+        assert not tree.exists(mirror_path.parent)
@@ -0,0 +1,47 @@
+import pytest
+
+from gator.resources.ignore import IgnoreRules
+
+
+@pytest.mark.parametrize(
+    ["patterns", "relative_path", "is_dir", "expected"],
+    [
+        ("node_modules/", "node_modules", True, True),
+        ("node_modules/", "app/node_modules", True, True),
+        ("node_modules/", "node_modules", False, False),
+        ("/vendor", "vendor", True, True),
+        ("/vendor", "app/vendor", True, False),
+        ("*.log", "app/debug.log", False, True),
+        ("*.log\n!keep.log", "app/keep.log", False, False),
+        ("# comment\n\nfoo", "comment", False, False),
+        ("docs/**/*.md", "docs/a/b/c.md", False, True),
+        ("docs/**/*.md", "src/c.md", False, False),
+        ("\\#notes", "#notes", False, True),
+    ],
+)
+def test_is_ignored__root_ignore_file__gitignore_semantics_followed(
+    tmp_path, patterns, relative_path, is_dir, expected
+):
+    (tmp_path / ".gitignore").write_text(patterns)
+
+    rules = IgnoreRules.for_directory(tmp_path, "", None)
+
+    assert rules is not None
+    assert rules.is_ignored(relative_path, is_dir) is expected
+
+
+def test_is_ignored__nested_ignore_file__nested_patterns_take_precedence(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.txt\n")
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / ".gatorignore").write_text("!requirements.txt\n")
+
+    root_rules = IgnoreRules.for_directory(tmp_path, "", None)
+    app_rules = IgnoreRules.for_directory(tmp_path / "app", "app", root_rules)
+
+    assert app_rules is not None
+    assert app_rules.is_ignored("app/requirements.txt", is_dir=False) is False
+    assert app_rules.is_ignored("app/notes.txt", is_dir=False) is True
+
+
+def test_for_directory__no_ignore_files__parent_rules_returned(tmp_path):
+    assert IgnoreRules.for_directory(tmp_path, "", None) is None
@@ -0,0 +1,160 @@
+from collections import Counter
+
+import pytest
+
+from gator.resources.content import FileContent
+from gator.resources.index import (
+    RepositoryIndex,
+    get_repository_index,
+    repository_index,
+)
+
+SOME_TEXT_1 = "some-text-1"
+SOME_TEXT_2 = "some-text-2"
+
+SOME_FILENAME_1 = "some-filename-1"
+SOME_FILENAME_2 = "some-filename-2"
+SOME_DIR_NAME = "some-dir"
+
+
+def test_iter_contents__nested_files__all_content_returned(tmp_path):
+    (tmp_path / SOME_DIR_NAME).mkdir()
+    some_path_1 = tmp_path / SOME_FILENAME_1
+    some_path_2 = tmp_path / SOME_DIR_NAME / SOME_FILENAME_2
+    some_path_1.write_text(SOME_TEXT_1)
+    some_path_2.write_text(SOME_TEXT_2)
+
+    index = RepositoryIndex(tmp_path)
+
+    assert Counter(index.iter_contents(tmp_path)) == Counter(
+        [(some_path_1, SOME_TEXT_1), (some_path_2, SOME_TEXT_2)]
+    )
+
+
+def test_iter_contents__path_dne__raises_file_not_found_error(tmp_path):
+    index = RepositoryIndex(tmp_path)
+
+    with pytest.raises(FileNotFoundError):
+        list(index.iter_contents(tmp_path / SOME_DIR_NAME))
+
+
+def test_read_text__called_twice__file_read_once(tmp_path, mocker):
+    some_path = tmp_path / SOME_FILENAME_1
+    some_path.write_text(SOME_TEXT_1)
+    index = RepositoryIndex(tmp_path)
+    read = mocker.spy(FileContent, "read")
+
+    assert index.read_text(some_path) == SOME_TEXT_1
+    assert index.read_text(some_path) == SOME_TEXT_1
+    assert read.call_count == 1
+
+
+def test_write_text__new_file_in_new_dir__visible_in_cached_listing(tmp_path):
+    (tmp_path / SOME_FILENAME_1).write_text(SOME_TEXT_1)
+    index = RepositoryIndex(tmp_path)
+    list(index.iter_files(tmp_path))
+
+    new_path = tmp_path / SOME_DIR_NAME / SOME_FILENAME_2
+    index.write_text(new_path, SOME_TEXT_2)
+
+    assert new_path.read_text() == SOME_TEXT_2
+    assert Counter(index.iter_contents(tmp_path)) == Counter(
+        [(tmp_path / SOME_FILENAME_1, SOME_TEXT_1), (new_path, SOME_TEXT_2)]
+    )
+
+
+def test_write_text__existing_file__cached_content_updated(tmp_path):
+    some_path = tmp_path / SOME_FILENAME_1
+    some_path.write_text(SOME_TEXT_1)
+    index = RepositoryIndex(tmp_path)
+    index.read_text(some_path)
+
+    index.write_text(some_path, SOME_TEXT_2)
+
+    assert index.read_text(some_path) == SOME_TEXT_2
+
+
+def test_unlink__cached_file__removed_from_listing_and_content(tmp_path):
+    some_path = tmp_path / SOME_FILENAME_1
+    some_path.write_text(SOME_TEXT_1)
+    index = RepositoryIndex(tmp_path)
+    list(index.iter_contents(tmp_path))
+
+    index.unlink(some_path)
+
+    assert not some_path.exists()
+    assert not index.exists(some_path)
+    assert list(index.iter_contents(tmp_path)) == []
+
+
+def test_invalidate__file_changed_behind_index__new_content_returned(tmp_path):
+    some_path = tmp_path / SOME_FILENAME_1
+    some_path.write_text(SOME_TEXT_1)
+    index = RepositoryIndex(tmp_path)
+    index.read_text(some_path)
+
+    some_path.write_text(SOME_TEXT_2)
+    index.invalidate(some_path)
+
+    assert index.read_text(some_path) == SOME_TEXT_2
+
+
+def test_get_repository_index__inside_context__shared_index_returned(tmp_path):
+    with repository_index(tmp_path) as index:
+        assert get_repository_index(tmp_path) is index
+        assert get_repository_index(tmp_path / ".") is index
+
+    assert get_repository_index(tmp_path) is not index
+
+
+@pytest.mark.parametrize(
+    ["path", "target", "expected"],
+    [
+        (f"{SOME_DIR_NAME}/{SOME_FILENAME_1}", ".", True),
+        (f"{SOME_DIR_NAME}/{SOME_FILENAME_1}", SOME_DIR_NAME, True),
+        (
+            f"{SOME_DIR_NAME}/{SOME_FILENAME_1}",
+            f"{SOME_DIR_NAME}/{SOME_FILENAME_1}",
+            True,
+        ),
+        (f"{SOME_DIR_NAME}/{SOME_FILENAME_1}", "other-dir", False),
+        (f"{SOME_DIR_NAME}/{SOME_FILENAME_2}", ".", False),
+        (f"ignored/{SOME_FILENAME_1}", ".", False),
+        (f"{SOME_DIR_NAME}/missing", ".", False),
+        (SOME_DIR_NAME, ".", False),
+    ],
+)
+def test_is_listed__file__whether_iter_files_generates_it(
+    tmp_path, path, target, expected
+):
+    (tmp_path / SOME_DIR_NAME).mkdir()
+    (tmp_path / "ignored").mkdir()
+    (tmp_path / SOME_DIR_NAME / SOME_FILENAME_1).write_text(SOME_TEXT_1)
+    (tmp_path / SOME_DIR_NAME / SOME_FILENAME_2).write_text(SOME_TEXT_2)
+    (tmp_path / "ignored" / SOME_FILENAME_1).write_text(SOME_TEXT_1)
+    (tmp_path / ".gatorignore").write_text(f"ignored/\n{SOME_FILENAME_2}\n")
+    index = RepositoryIndex(tmp_path)
+
+    assert index.is_listed(tmp_path / path, tmp_path / target) is expected
+
+
+def test_changed_files__written_and_removed__relative_paths_returned(tmp_path):
+    (tmp_path / SOME_FILENAME_1).write_text(SOME_TEXT_1)
+    index = RepositoryIndex(tmp_path)
+
+    index.write_text(tmp_path / SOME_DIR_NAME / SOME_FILENAME_2, SOME_TEXT_2)
+    index.unlink(tmp_path / SOME_FILENAME_1)
+
+    assert index.changed_files() == [
+        f"{SOME_DIR_NAME}/{SOME_FILENAME_2}",
+        SOME_FILENAME_1,
+    ]
+
+
+def test_changed_files__everything_invalidated__none_returned(tmp_path):
+    index = RepositoryIndex(tmp_path)
+    index.write_text(tmp_path / SOME_FILENAME_1, SOME_TEXT_1)
+
+    index.invalidate()
+
+    assert index.changed_files() is None
@@ -0,0 +1,108 @@
+import pytest
+
+from gator.resources.index import RepositoryIndex
+from gator.resources.overlay import Overlay
+
+SOME_FILE_NAME = "some-file.txt"
+SOME_OTHER_FILE_NAME = "some-other-file.txt"
+SOME_DIR_NAME = "some-dir"
+
+
+@pytest.fixture
+def index(tmp_path):
+    return RepositoryIndex(tmp_path, overlay=Overlay(tmp_path))
+
+
+def test_write_text__overlay__disk_unchanged_and_index_sees_new_content(
+    tmp_path, index
+):
+    (tmp_path / SOME_FILE_NAME).write_text("old\n")
+
+    index.write_text(tmp_path / SOME_FILE_NAME, "new\n")
+
+    assert (tmp_path / SOME_FILE_NAME).read_text() == "old\n"
+    assert index.read_text(tmp_path / SOME_FILE_NAME) == "new\n"
+
+
+def test_write_text__new_file_in_new_dir__listed_but_not_created(tmp_path, index):
+    some_path = tmp_path / SOME_DIR_NAME / SOME_FILE_NAME
+
+    index.write_text(some_path, "new\n")
+    index.invalidate()
+
+    assert not (tmp_path / SOME_DIR_NAME).exists()
+    assert index.is_dir(tmp_path / SOME_DIR_NAME)
+    assert list(index.iter_files(tmp_path)) == [some_path]
+
+
+def test_unlink__overlay__file_hidden_but_not_removed(tmp_path, index):
+    (tmp_path / SOME_DIR_NAME).mkdir()
+    some_path = tmp_path / SOME_DIR_NAME / SOME_FILE_NAME
+    some_path.write_text("old\n")
+
+    index.unlink(some_path)
+    index.invalidate()
+
+    assert some_path.exists()
+    assert not index.exists(some_path)
+    assert list(index.iter_files(tmp_path)) == []
+    assert index.is_empty_dir(tmp_path / SOME_DIR_NAME)
+    with pytest.raises(FileNotFoundError):
+        index.read_content(some_path)
+
+
+def test_unlink__file_dne__raises_file_not_found_error(tmp_path, index):
+    with pytest.raises(FileNotFoundError):
+        index.unlink(tmp_path / SOME_FILE_NAME)
+
+
+def test_diff__file_modified__unified_diff_against_disk(tmp_path, index):
+    (tmp_path / SOME_FILE_NAME).write_text("first\nsecond\n")
+
+    index.write_text(tmp_path / SOME_FILE_NAME, "first\nchanged\n")
+
+    assert index.overlay.diff() == (
+        f"--- a/{SOME_FILE_NAME}\n"
+        f"+++ b/{SOME_FILE_NAME}\n"
+        "@@ -1,2 +1,2 @@\n"
+        " first\n"
+        "-second\n"
+        "+changed\n"
+    )
+
+
+def test_diff__files_created_and_removed__dev_null_used(tmp_path, index):
+    (tmp_path / SOME_OTHER_FILE_NAME).write_text("removed")
+
+    index.write_text(tmp_path / SOME_FILE_NAME, "created\n")
+    index.unlink(tmp_path / SOME_OTHER_FILE_NAME)
+
+    assert index.overlay.diff() == (
+        "--- /dev/null\n"
+        f"+++ b/{SOME_FILE_NAME}\n"
+        "@@ -0,0 +1 @@\n"
+        "+created\n"
+        f"--- a/{SOME_OTHER_FILE_NAME}\n"
+        "+++ /dev/null\n"
+        "@@ -1 +0,0 @@\n"
+        "-removed\n"
+        "\\ No newline at end of file\n"
+    )
+
+
+def test_diff__content_written_back_unchanged__no_diff(tmp_path, index):
+    (tmp_path / SOME_FILE_NAME).write_text("same\n")
+
+    index.write_text(tmp_path / SOME_FILE_NAME, "same\n")
+
+    assert index.overlay.diff() == ""
+
+
+def test_diff__binary_file_modified__binary_notice(tmp_path, index):
+    (tmp_path / SOME_FILE_NAME).write_bytes(b"\x00old")
+
+    index.write_bytes(tmp_path / SOME_FILE_NAME, b"\x00new")
+
+    assert index.overlay.diff() == (
+        f"Binary files a/{SOME_FILE_NAME} and b/{SOME_FILE_NAME} differ\n"
+    )
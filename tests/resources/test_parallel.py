@@ -0,0 +1,149 @@
+import re
+
+import pytest
+
+from gator.process import process_repository
+from gator.resources.build import build_changeset
+from gator.resources.parallel import FileWorkerPool
+
+SOME_FILE_COUNT = 40
+SOME_MATCHING_FILE_NAME = "some-file-7.txt"
+
+CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: bump pygitops
+  filters:
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: 'pygitops'
+        paths:
+          - .
+  code_changes:
+    - kind: RegexReplaceCodeChange
+      version: v1alpha
+      spec:
+        replacement_details:
+          - regex: '0\\.9\\.0'
+            replace_term: "0.10.0"
+            paths:
+              - .
+          - regex: 'pygitops==0\\.10\\.0'
+            replace_term: "pygitops>=0.10.0"
+            paths:
+              - dir-1
+"""
+
+
+def _make_repo(path):
+    for dir_index in range(4):
+        directory = path / f"dir-{dir_index}"
+        directory.mkdir()
+        for file_index in range(SOME_FILE_COUNT // 4):
+            content = "pygitops==0.9.0\n" if file_index % 3 == 0 else "other\n"
+            (directory / f"some-file-{file_index}.txt").write_text(content)
+
+
+def _read_repo(path):
+    return {
+        str(file_path.relative_to(path)): file_path.read_text()
+        for file_path in sorted(path.rglob("*.txt"))
+    }
+
+
+@pytest.fixture(params=[True, False], ids=["processes", "threads"])
+def pool(request):
+    pool = FileWorkerPool(2, use_processes=request.param, chunk_size=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_search__pattern_in_one_file__match_recorded(pool, tmp_path):
+    some_paths = [tmp_path / f"some-file-{i}.txt" for i in range(SOME_FILE_COUNT)]
+    for path in some_paths:
+        path.write_text(
+            "match\n" if path.name == SOME_MATCHING_FILE_NAME else "nothing\n"
+        )
+    results = [False, False]
+
+    pool.search(
+        ((path, [0, 1]) for path in some_paths),
+        [re.compile("match"), re.compile("absent")],
+        results,
+    )
+
+    assert results == [True, False]
+
+
+def test_search__matched_files__first_matching_file_recorded(pool, tmp_path):
+    some_paths = [tmp_path / f"some-file-{i}.txt" for i in range(SOME_FILE_COUNT)]
+    for path in some_paths:
+        path.write_text(
+            "match\n" if path.name == SOME_MATCHING_FILE_NAME else "nothing\n"
+        )
+    results = [False, False]
+    matched_files = [None, None]
+
+    pool.search(
+        ((path, [0, 1]) for path in some_paths),
+        [re.compile("match"), re.compile("absent")],
+        results,
+        matched_files=matched_files,
+    )
+
+    assert matched_files == [tmp_path / SOME_MATCHING_FILE_NAME, None]
+
+
+def test_search__every_pattern_matched__remaining_candidates_not_consumed(
+    pool, tmp_path
+):
+    some_path = tmp_path / SOME_MATCHING_FILE_NAME
+    some_path.write_text("match\n")
+    consumed = []
+
+    def candidates():
+        for i in range(SOME_FILE_COUNT):
+            consumed.append(i)
+            yield some_path, [0]
+
+    results = [False]
+    pool.search(candidates(), [re.compile("match")], results)
+
+    assert results == [True]
+    assert len(consumed) < SOME_FILE_COUNT
+
+
+def test_replace__several_chunks__results_generated_in_plan_order(pool, tmp_path):
+    some_paths = [tmp_path / f"some-file-{i}.txt" for i in range(SOME_FILE_COUNT)]
+    for path in some_paths:
+        path.write_text("a\n")
+
+    replaced = list(
+        pool.replace(
+            ((path, [0, 1]) for path in some_paths),
+            [(re.compile("a"), "b"), (re.compile("b"), "c")],
+        )
+    )
+
+    assert replaced == [(path, b"c\n") for path in some_paths]
+
+
+@pytest.mark.parametrize("use_processes", [True, False])
+def test_process_repository__parallel__same_result_as_serial(tmp_path, use_processes):
+    serial_path, parallel_path = tmp_path / "serial", tmp_path / "parallel"
+    for path in (serial_path, parallel_path):
+        path.mkdir()
+        _make_repo(path)
+    changeset = build_changeset(CHANGESET)
+
+    assert process_repository(changeset, serial_path) is True
+    assert (
+        process_repository(
+            changeset, parallel_path, workers=2, use_processes=use_processes
+        )
+        is True
+    )
+
+    assert _read_repo(parallel_path) == _read_repo(serial_path)
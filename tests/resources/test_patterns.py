@@ -0,0 +1,83 @@
+import pytest
+
+from gator.resources.patterns import SpecPath, literal_root, normalize_spec_paths
+from gator.resources.util import normalize_path
+
+
+@pytest.mark.parametrize(
+    ["spec_path", "file_path", "expected"],
+    [
+        ("**/requirements*.txt", "requirements.txt", True),
+        ("**/requirements*.txt", "app1/requirements-test.txt", True),
+        ("**/requirements*.txt", "app1/setup.py", False),
+        ("app*/requirements.txt", "app1/requirements.txt", True),
+        ("app*/requirements.txt", "app1/nested/requirements.txt", False),
+        ("app*", "app1/nested/requirements.txt", True),
+        ("apps/*.yml", "apps/k8s.yml", True),
+        ("apps/*.yml", "other/k8s.yml", False),
+        ("apps/k8s.y?l", "apps/k8s.yml", True),
+        ("apps/k8s.[!y]ml", "apps/k8s.yml", False),
+    ],
+)
+def test_spec_path_covers__glob_spec_path__matching_files_covered(
+    tmp_path, spec_path, file_path, expected
+):
+    spec = SpecPath(tmp_path, spec_path)
+
+    assert spec.is_glob is True
+    assert spec.covers(normalize_path(tmp_path / file_path)) is expected
+
+
+def test_spec_path__glob_spec_path__root_is_literal_prefix(tmp_path):
+    spec = SpecPath(tmp_path, "apps/**/k8s.yml")
+
+    assert spec.root == tmp_path / "apps"
+
+
+def test_spec_path__literal_spec_path__everything_covered(tmp_path):
+    spec = SpecPath(tmp_path, "apps/k8s.yml")
+
+    assert spec.is_glob is False
+    assert spec.root == tmp_path / "apps" / "k8s.yml"
+
+
+@pytest.mark.parametrize(
+    ["paths", "expected"],
+    [
+        (["./app1/", "app1"], ["app1"]),
+        (["app1", ".", "./app1"], ["app1", "."]),
+        (["**/*.yml", "./**/*.yml", "app1"], ["**/*.yml", "app1"]),
+        ([""], ["."]),
+    ],
+)
+def test_normalize_spec_paths__redundant_paths__normalized_and_deduplicated(
+    paths, expected
+):
+    assert normalize_spec_paths(paths) == expected
+
+
+@pytest.mark.parametrize(
+    ["paths", "expected"],
+    [
+        (["app1", ".", "app2/setup.py"], ["."]),
+        (["app1/setup.py", "app1", "app10"], ["app1", "app10"]),
+        (["app1/**", "app1"], ["app1/**", "app1"]),
+    ],
+)
+def test_normalize_spec_paths__drop_nested__only_outermost_literal_paths_kept(
+    paths, expected
+):
+    assert normalize_spec_paths(paths, drop_nested=True) == expected
+
+
+@pytest.mark.parametrize(
+    ["path", "expected"],
+    [
+        ("apps/k8s.yml", "apps/k8s.yml"),
+        ("apps/**/k8s.yml", "apps"),
+        ("app*/k8s.yml", ""),
+        ("**", ""),
+    ],
+)
+def test_literal_root__spec_path__leading_literal_segments(path, expected):
+    assert literal_root(path) == expected
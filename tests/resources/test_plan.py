@@ -0,0 +1,119 @@
+import pickle
+import re
+
+from gator.constants import DEFAULT_REGEX_MODES
+from gator.process import process_repository
+from gator.resources.build import build_changeset_plan
+from gator.resources.models import BaseModelForbidExtra, FilterResource
+from gator.resources.plan import ChangesetPlan
+
+SOME_FILE_NAME = "requirements.txt"
+SOME_FILE_CONTENT = "pygitops==0.9.0\n"
+
+SOME_CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: bump pygitops
+  issue_title: Bump pygitops
+  filters:
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: '^pygitops'
+        paths:
+          - ./
+          - .
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: '^pygitops'
+        paths:
+          - .
+  code_changes:
+    - kind: RegexReplaceCodeChange
+      version: v1alpha
+      spec:
+        replacement_details:
+          - regex: '^pygitops==0\\.9\\.0$'
+            replace_term: "pygitops==0.10.0"
+            paths:
+              - requirements.txt
+"""
+
+
+class AlwaysMatchesFilterSpec(BaseModelForbidExtra):
+    pass
+
+
+class AlwaysMatchesFilter(FilterResource):
+    kind = "AlwaysMatchesFilter"
+    version = "v1alpha"
+    spec: AlwaysMatchesFilterSpec
+
+    def matches(self, repo_path) -> bool:
+        return True
+
+
+def test_build_changeset_plan__duplicate_filters__deduplicated():
+    plan = build_changeset_plan(SOME_CHANGESET)
+
+    assert plan.name == "bump pygitops"
+    assert plan.issue_title == "Bump pygitops"
+    assert len(plan.filters) == 1
+    assert plan.filters[0].spec.paths == ["."]
+
+
+def test_changeset_plan__custom_filter_first__fused_filters_ordered_first():
+    custom_filter = AlwaysMatchesFilter(spec={})
+    regex_filter = build_changeset_plan(SOME_CHANGESET).filters[0]
+
+    plan = ChangesetPlan("some-name", filters=[custom_filter, regex_filter])
+
+    assert plan.filters == (regex_filter, custom_filter)
+
+
+def test_build_changeset_plan__regexes__compiled_with_default_modes():
+    plan = build_changeset_plan(SOME_CHANGESET)
+
+    replacement_detail = plan.code_changes[0].spec.replacement_details[0]
+    assert plan.filters[0].expression.flags & DEFAULT_REGEX_MODES
+    assert replacement_detail.regex.flags & DEFAULT_REGEX_MODES
+
+
+def test_build_changeset_plan__pickled__unpickled_plan_applies_changeset(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(f"# header\n{SOME_FILE_CONTENT}")
+
+    plan = pickle.loads(pickle.dumps(build_changeset_plan(SOME_CHANGESET)))
+
+    assert isinstance(plan.filters[0].expression, re.Pattern)
+    assert process_repository(plan, tmp_path) is True
+    assert (tmp_path / SOME_FILE_NAME).read_text() == "# header\npygitops==0.10.0\n"
+
+
+def test_changeset_plan_touched_paths__paths_inside_root__only_root_kept():
+    plan = build_changeset_plan(SOME_CHANGESET)
+
+    assert plan.touched_paths() == ["."]
+
+
+def test_changeset_plan_touched_paths__custom_filter__none():
+    plan = ChangesetPlan("some", [AlwaysMatchesFilter(spec={})])
+
+    assert plan.touched_paths() is None
+
+
+def test_changeset_plan_fingerprint__same_changeset__same_fingerprint():
+    assert (
+        build_changeset_plan(SOME_CHANGESET).fingerprint()
+        == build_changeset_plan(SOME_CHANGESET).fingerprint()
+    )
+
+
+def test_changeset_plan_fingerprint__changed_replacement__new_fingerprint():
+    changed = SOME_CHANGESET.replace("pygitops==0.10.0", "pygitops==0.11.0")
+
+    assert (
+        build_changeset_plan(changed).fingerprint()
+        != build_changeset_plan(SOME_CHANGESET).fingerprint()
+    )
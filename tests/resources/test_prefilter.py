@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+from gator.constants import DEFAULT_REGEX_MODES
+from gator.resources.content import FileContent, compile_content_pattern
+from gator.resources.prefilter import (
+    PREFILTER_STATS,
+    LiteralPrefilter,
+    extract_required_literals,
+)
+
+SOME_FILENAME = "some-filename"
+
+
+@pytest.mark.parametrize(
+    ["regex", "expected"],
+    [
+        ("registry.company.com", {"registry"}),
+        (r"registry\.company\.com", {"registry.company.com"}),
+        (r"(?<=black==)(22\.1\.0|21\.\w+)", {"black=="}),
+        (r"^python\d{1}\.?\d+$", {"python"}),
+        (r"(foo|barbaz)\d+", {"foo", "barbaz"}),
+        (r"(foo|\d+)bar", {"bar"}),
+        (r"(?:abc)+x", {"abc"}),
+        (r"(?:abc)?x", None),
+        (r"(?i)registry", None),
+        (r"(?i:registry)\.company", {".company"}),
+        (r"(?!registry)\w+", None),
+        (r".*", None),
+        (r"a\db", None),
+    ],
+)
+def test_extract_required_literals__various_patterns__required_literals_found(
+    regex, expected
+):
+    literals = extract_required_literals(re.compile(regex, flags=DEFAULT_REGEX_MODES))
+
+    assert (set(literals) if literals else None) == expected
+
+
+def test_may_match__literal_absent__rejected_and_counted():
+    prefilter = LiteralPrefilter(frozenset(["registry.company.com"]))
+    PREFILTER_STATS.reset()
+
+    assert prefilter.may_match(b"image: registry.other.com/app") is False
+    assert prefilter.may_match(b"image: registry.company.com/app") is True
+    assert (prefilter.stats.files_checked, prefilter.stats.files_rejected) == (2, 1)
+    assert PREFILTER_STATS.rejection_rate == 0.5
+
+
+def test_may_match__multiple_literals__any_literal_accepted():
+    prefilter = LiteralPrefilter(frozenset(["22.1.0", "21."]))
+
+    assert prefilter.may_match(b"black==21.12b0") is True
+    assert prefilter.may_match(b"black==20.8b1") is False
+
+
+def test_search__literal_absent__content_not_decoded(tmp_path, mocker):
+    path = tmp_path / SOME_FILENAME
+    path.write_bytes("image: registry.other.com/café\n".encode("utf-8"))
+    pattern = compile_content_pattern(re.compile(r"registry\.company\.com/(\w+)"))
+    content = FileContent.read(path)
+    decode = mocker.spy(FileContent, "decode")
+
+    assert pattern.search(content) is False
+    assert pattern.sub("new-registry.com/\\1", content) is None
+    assert decode.call_count == 0
@@ -0,0 +1,105 @@
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from gator.exceptions import InvalidResourceError
+from gator.resources import registry
+from gator.resources.build import build_gator_resource, register_custom_resource
+from gator.resources.models import CodeChangeResource, FilterResource
+from gator.resources.registry import ResourceRegistry
+
+SOME_GROUP = "some.group"
+
+
+class DoNothingSpec(BaseModel):
+    some_value: str
+
+
+class DoNothingCodeChange(CodeChangeResource):
+    kind = "DoNothingCodeChange"
+    version = "v1alpha"
+    spec: DoNothingSpec
+
+    def make_code_changes(self, path: Path) -> None:
+        pass
+
+
+class AlwaysMatchesFilter(FilterResource):
+    kind = "AlwaysMatchesFilter"
+    version = "v1alpha"
+
+    def matches(self, repo_path: Path) -> bool:
+        return True
+
+
+DO_NOTHING_LOCATION = f"{__name__}:DoNothingCodeChange"
+
+
+@pytest.fixture
+def entry_points(mocker):
+    return mocker.patch.object(
+        registry,
+        "_entry_points",
+        return_value={"DoNothingCodeChange": DO_NOTHING_LOCATION},
+    )
+
+
+def test_entry_points__group_nobody_declares__no_entry_points():
+    assert registry._entry_points("gator.no-such-group") == {}
+
+
+def test_registry__known_location__class_imported_on_lookup():
+    resources = ResourceRegistry(
+        {"DoNothingCodeChange": DO_NOTHING_LOCATION, "Broken": "no_such_module:Cls"}
+    )
+
+    assert resources["DoNothingCodeChange"] is DoNothingCodeChange
+    with pytest.raises(InvalidResourceError, match="Could not import"):
+        resources["Broken"]
+
+
+def test_registry__known_kind__entry_points_not_discovered(entry_points):
+    resources = ResourceRegistry(registry.BUILTIN_RESOURCES, SOME_GROUP)
+
+    resources["RegexFilter"]
+
+    entry_points.assert_not_called()
+
+
+def test_registry__unknown_kind__discovered_from_entry_points(entry_points):
+    resources = ResourceRegistry(registry.BUILTIN_RESOURCES, SOME_GROUP)
+
+    assert resources["DoNothingCodeChange"] is DoNothingCodeChange
+    assert "SomeUnknownKind" not in resources
+    entry_points.assert_called_once_with(SOME_GROUP)
+
+
+def test_registry__entry_point_of_another_kind__raises_invalid_resource_error(
+    mocker,
+):
+    mocker.patch.object(
+        registry, "_entry_points", return_value={"OtherKind": DO_NOTHING_LOCATION}
+    )
+    resources = ResourceRegistry({}, SOME_GROUP)
+
+    with pytest.raises(InvalidResourceError, match="does not define kind OtherKind"):
+        resources["OtherKind"]
+
+
+def test_registry__registered_class__takes_precedence_over_entry_point(mocker):
+    mocker.patch.object(
+        registry, "_entry_points", return_value={"RegexFilter": DO_NOTHING_LOCATION}
+    )
+    resources = ResourceRegistry(registry.BUILTIN_RESOURCES, SOME_GROUP)
+
+    assert resources["RegexFilter"].__name__ == "RegexFilterV1Alpha"
+    assert len(resources) == len(registry.BUILTIN_RESOURCES)
+
+
+def test_register_custom_resource__filter__registered():
+    register_custom_resource(AlwaysMatchesFilter)
+
+    resource = build_gator_resource({"kind": "AlwaysMatchesFilter"})
+
+    assert isinstance(resource, AlwaysMatchesFilter)
@@ -1,8 +1,9 @@
+import os
 from collections import Counter
 
 import pytest
 
-from gator.resources.util import get_recursive_path_contents
+from gator.resources.util import get_recursive_path_contents, walk_files
 
 SOME_TEXT_1 = "some-text-1"
 SOME_TEXT_2 = "some-text-2"
@@ -112,6 +113,15 @@ def test_get_recursive_path_contents__git_directory_present__git_directory_ignor
     assert list(get_recursive_path_contents(tmp_path)) == []
 
 
+def test_walk_files__git_file_present__git_file_ignored(tmp_path):
+    # submodule checkouts and worktrees have a `.git` file pointing at their git dir
+    (tmp_path / "submodule").mkdir()
+    (tmp_path / "submodule" / ".git").write_text("gitdir: ../.git/modules/submodule\n")
+    (tmp_path / "submodule" / SOME_FILENAME_1).write_text(SOME_TEXT_1)
+
+    assert list(walk_files(tmp_path)) == [tmp_path / "submodule" / SOME_FILENAME_1]
+
+
 def test_get_recursive_path_contents__content_present_in_root_and_nested_directories__content_returned(
     tmp_path,
 ):
@@ -142,3 +152,32 @@ def test_get_recursive_path_contents__content_present_in_root_and_nested_directo
             (some_path_3, SOME_TEXT_3),
         ]
     )
+
+
+def test_walk_files__ignored_directory__not_descended_into(tmp_path, mocker):
+    (tmp_path / ".gitignore").write_text("node_modules/\n")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / SOME_FILENAME_1).write_text(SOME_TEXT_1)
+    (tmp_path / SOME_FILENAME_2).write_text(SOME_TEXT_2)
+    scandir = mocker.spy(os, "scandir")
+
+    assert Counter(walk_files(tmp_path)) == Counter(
+        [tmp_path / ".gitignore", tmp_path / SOME_FILENAME_2]
+    )
+    assert [call.args[0] for call in scandir.call_args_list] == [tmp_path]
+
+
+def test_walk_files__gatorignore_present__ignored_files_skipped(tmp_path):
+    (tmp_path / ".gatorignore").write_text(f"{SOME_FILENAME_1}\n")
+    (tmp_path / SOME_FILENAME_1).write_text(SOME_TEXT_1)
+
+    assert list(walk_files(tmp_path)) == [tmp_path / ".gatorignore"]
+
+
+def test_walk_files__respect_ignore_files_disabled__ignored_files_returned(tmp_path):
+    (tmp_path / ".gatorignore").write_text(f"{SOME_FILENAME_1}\n")
+    (tmp_path / SOME_FILENAME_1).write_text(SOME_TEXT_1)
+
+    assert Counter(walk_files(tmp_path, respect_ignore_files=False)) == Counter(
+        [tmp_path / ".gatorignore", tmp_path / SOME_FILENAME_1]
+    )
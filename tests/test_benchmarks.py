@@ -0,0 +1,56 @@
+from benchmarks.run import build_benchmarks, compare, run_suite
+from benchmarks.synthetic_repo import MATCH_TOKEN, SyntheticRepoParams, generate_repo
+from gator.resources.content import FileContent
+
+SOME_PARAMS = SyntheticRepoParams(
+    file_count=50, depth=2, median_file_bytes=256, binary_ratio=0.2, match_density=0.5
+)
+
+
+def _snapshot(path):
+    return {
+        str(file_path.relative_to(path)): file_path.read_bytes()
+        for file_path in sorted(path.rglob("*"))
+        if file_path.is_file()
+    }
+
+
+def test_generate_repo__same_params__identical_repos(tmp_path):
+    generate_repo(tmp_path / "first", SOME_PARAMS)
+    generate_repo(tmp_path / "second", SOME_PARAMS)
+
+    assert _snapshot(tmp_path / "first") == _snapshot(tmp_path / "second")
+
+
+def test_generate_repo__params__files_match_params(tmp_path):
+    repo = generate_repo(tmp_path, SOME_PARAMS)
+
+    binary_files = [p for p in repo.files if FileContent.read(p).is_binary]
+    token_files = [p for p in repo.files if MATCH_TOKEN.encode() in p.read_bytes()]
+    assert len(repo.files) == SOME_PARAMS.file_count
+    assert 0 < len(binary_files) < SOME_PARAMS.file_count
+    assert token_files == repo.matching_files
+    assert sum(p.stat().st_size for p in repo.files) == repo.total_bytes
+
+
+def test_run_suite__small_repo__every_benchmark_reported(tmp_path):
+    repo = generate_repo(tmp_path, SOME_PARAMS)
+
+    report = run_suite(SOME_PARAMS, repeat=1, spec_resources=2)
+
+    assert set(report["results"]) == set(build_benchmarks(repo, 2))
+    assert report["repo"]["files"] == SOME_PARAMS.file_count
+    assert all(result["median_s"] >= 0 for result in report["results"].values())
+
+
+def test_compare__median_slower_than_threshold__regression_reported():
+    baseline = {
+        "params": {},
+        "results": {"fast": {"median_s": 1.0}, "slow": {"median_s": 1.0}},
+    }
+    current = {
+        "params": {},
+        "results": {"fast": {"median_s": 1.05}, "slow": {"median_s": 1.5}},
+    }
+
+    assert compare(baseline, current, threshold=0.1) == ["slow"]
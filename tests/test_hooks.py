@@ -0,0 +1,148 @@
+import json
+import pickle
+import pstats
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from gator.hooks import (
+    MAKE_CODE_CHANGES,
+    MATCHES,
+    Profiler,
+    ResourceHook,
+    observed,
+    register_resource_hook,
+    registered_resource_hooks,
+    unregister_resource_hook,
+)
+from gator.process import process_repository
+from gator.resources.build import build_changeset
+from gator.resources.code_changes import RemoveFileCodeChangeV1Alpha
+
+SOME_FILE_NAME = "requirements.txt"
+SOME_FILE_CONTENT = "pygitops==0.9.0\n"
+
+SOME_CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: bump pygitops
+  filters:
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: 'pygitops'
+        paths:
+          - requirements.txt
+  code_changes:
+    - kind: RegexReplaceCodeChange
+      version: v1alpha
+      spec:
+        replacement_details:
+          - regex: '0\\.9\\.0'
+            replace_term: "0.10.0"
+            paths:
+              - requirements.txt
+"""
+
+
+class _RecordingHook(ResourceHook):
+    def __init__(self):
+        self.calls = []
+
+    def before(self, call):
+        self.calls.append(("before", call.kind, call.operation))
+
+    def after(self, call, timing):
+        self.calls.append(("after", call.kind, call.operation, timing.error))
+
+
+@pytest.fixture
+def registered():
+    hooks = []
+
+    def register(hook):
+        hooks.append(hook)
+        register_resource_hook(hook)
+        return hook
+
+    yield register
+    for hook in hooks:
+        unregister_resource_hook(hook)
+
+
+def test_process_repository__hook_registered__called_around_every_resource(
+    tmp_path, registered
+):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    hook = registered(_RecordingHook())
+
+    process_repository(build_changeset(SOME_CHANGESET), tmp_path)
+
+    assert hook.calls == [
+        ("before", "RegexFilter", MATCHES),
+        ("after", "RegexFilter", MATCHES, None),
+        ("before", "RegexReplaceCodeChange", MAKE_CODE_CHANGES),
+        ("after", "RegexReplaceCodeChange", MAKE_CODE_CHANGES, None),
+    ]
+
+
+def test_observed__resource_raises__after_called_with_error(registered):
+    hook = registered(_RecordingHook())
+    resource = RemoveFileCodeChangeV1Alpha(spec={"files": [SOME_FILE_NAME]})
+
+    with pytest.raises(ValueError):
+        with observed([resource], MAKE_CODE_CHANGES, Path("some-repo")):
+            raise ValueError("some error")
+
+    assert isinstance(hook.calls[-1][3], ValueError)
+
+
+def test_register_resource_hook__twice__registered_once(registered):
+    hook = _RecordingHook()
+    registered(hook)
+    registered(hook)
+
+    assert registered_resource_hooks().count(hook) == 1
+
+
+def test_profiler__resources_run__profile_and_summary_written(tmp_path, registered):
+    repo_path = tmp_path / "org" / "repo"
+    repo_path.mkdir(parents=True)
+    (repo_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    registered(Profiler(tmp_path / "profiles"))
+
+    process_repository(build_changeset(SOME_CHANGESET), repo_path)
+
+    lines = (tmp_path / "profiles" / "profiles.jsonl").read_text().splitlines()
+    summaries = [json.loads(line) for line in lines]
+    assert [s["kind"] for s in summaries] == ["RegexFilter", "RegexReplaceCodeChange"]
+    assert all(s["peak_memory_bytes"] > 0 for s in summaries)
+    profile = tmp_path / "profiles" / summaries[1]["profile"]
+    assert profile.parent.name == "org-repo"
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+
+def test_profiler__no_reset_peak__profile_and_summary_written(
+    tmp_path, registered, monkeypatch
+):
+    # tracemalloc.reset_peak was added in Python 3.9
+    monkeypatch.delattr(tracemalloc, "reset_peak")
+    repo_path = tmp_path / "org" / "repo"
+    repo_path.mkdir(parents=True)
+    (repo_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    registered(Profiler(tmp_path / "profiles"))
+
+    process_repository(build_changeset(SOME_CHANGESET), repo_path)
+
+    lines = (tmp_path / "profiles" / "profiles.jsonl").read_text().splitlines()
+    summaries = [json.loads(line) for line in lines]
+    assert len(summaries) == 2
+    assert all(s["peak_memory_bytes"] > 0 for s in summaries)
+
+
+def test_profiler__pickled__directory_kept(tmp_path):
+    profiler = pickle.loads(pickle.dumps(Profiler(tmp_path)))
+
+    assert profiler.directory == tmp_path
@@ -0,0 +1,91 @@
+import pytest
+
+from gator.journal import JournalStage, RunJournal, RunJournalError
+from gator.resources.build import build_changeset_plan
+from gator.resources.plan import ChangesetPlan
+
+SOME_REPOSITORY = "some-org/some-repo"
+OTHER_REPOSITORY = "some-org/other-repo"
+SOME_PLAN = ChangesetPlan(name="some changeset")
+
+OTHER_CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: other changeset
+"""
+
+
+def test_resume__stages_recorded__last_stage_of_each_repository(tmp_path):
+    with RunJournal.create(tmp_path, SOME_PLAN) as journal:
+        journal.record(SOME_REPOSITORY, JournalStage.CLONED)
+        journal.record(SOME_REPOSITORY, JournalStage.PUSHED, base="main")
+        journal.record(OTHER_REPOSITORY, JournalStage.FILTERED_OUT)
+
+    with RunJournal.resume(tmp_path, journal.run_id, SOME_PLAN) as resumed:
+        assert resumed.last_entry(SOME_REPOSITORY) == {
+            "repository": SOME_REPOSITORY,
+            "stage": "pushed",
+            "base": "main",
+        }
+        assert resumed.last_entry(OTHER_REPOSITORY)["stage"] == "filtered-out"
+        assert resumed.last_entry("some-org/unknown") is None
+
+
+def test_resume__record_cut_short__ignored_and_next_record_kept(tmp_path):
+    with RunJournal.create(tmp_path, SOME_PLAN) as journal:
+        journal.record(SOME_REPOSITORY, JournalStage.CLONED)
+    with journal.path.open("a") as f:
+        f.write('{"repository": "some-org/other-repo", "sta')
+
+    with RunJournal.resume(tmp_path, journal.run_id, SOME_PLAN) as resumed:
+        assert resumed.last_entry(OTHER_REPOSITORY) is None
+        resumed.record(OTHER_REPOSITORY, JournalStage.UNCHANGED)
+
+    with RunJournal.resume(tmp_path, journal.run_id, SOME_PLAN) as resumed:
+        assert resumed.last_entry(SOME_REPOSITORY)["stage"] == "cloned"
+        assert resumed.last_entry(OTHER_REPOSITORY)["stage"] == "unchanged"
+
+
+def test_resume__other_changeset__raises_run_journal_error(tmp_path):
+    with RunJournal.create(tmp_path, SOME_PLAN) as journal:
+        pass
+
+    with pytest.raises(RunJournalError):
+        RunJournal.resume(
+            tmp_path, journal.run_id, build_changeset_plan(OTHER_CHANGESET)
+        )
+
+
+def test_resume__run_dne__raises_run_journal_error(tmp_path):
+    with pytest.raises(RunJournalError):
+        RunJournal.resume(tmp_path, "some-run", SOME_PLAN)
+
+
+def test_resume__several_changesets__last_stage_of_each_changeset(tmp_path):
+    plans = [SOME_PLAN, build_changeset_plan(OTHER_CHANGESET)]
+    with RunJournal.create(tmp_path, plans) as journal:
+        journal.record(SOME_REPOSITORY, JournalStage.CLONED)
+        journal.record(SOME_REPOSITORY, JournalStage.PUSHED, "some changeset")
+        journal.record(SOME_REPOSITORY, JournalStage.UNCHANGED, "other changeset")
+
+    with RunJournal.resume(tmp_path, journal.run_id, plans) as resumed:
+        assert resumed.last_entry(SOME_REPOSITORY)["stage"] == "cloned"
+        assert resumed.last_entry(SOME_REPOSITORY, "some changeset") == {
+            "repository": SOME_REPOSITORY,
+            "stage": "pushed",
+            "changeset": "some changeset",
+        }
+        assert (
+            resumed.last_entry(SOME_REPOSITORY, "other changeset")["stage"]
+            == "unchanged"
+        )
+
+
+def test_resume__changesets_reordered__raises_run_journal_error(tmp_path):
+    plans = [SOME_PLAN, build_changeset_plan(OTHER_CHANGESET)]
+    with RunJournal.create(tmp_path, plans) as journal:
+        pass
+
+    with pytest.raises(RunJournalError):
+        RunJournal.resume(tmp_path, journal.run_id, plans[::-1])
@@ -1,2 +1,326 @@
-def test_placeholder():
-    pass
+import json
+import subprocess  # nosec
+import sys
+
+from click.testing import CliRunner
+from git import Actor, Repo
+
+from gator.__main__ import cli
+from gator.pipeline import Pipeline
+
+SOME_ACTOR = Actor("some-name", "some-email@example.com")
+SOME_FILE_NAME = "requirements.txt"
+SOME_FILE_CONTENT = "pygitops==0.9.0\n"
+
+SOME_CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: bump pygitops
+  code_changes:
+    - kind: RegexReplaceCodeChange
+      version: v1alpha
+      spec:
+        replacement_details:
+          - regex: '0\\.9\\.0'
+            replace_term: "0.10.0"
+            paths:
+              - requirements.txt
+"""
+
+
+def _remote_name(tmp_path):
+    # repositories cloned from a file URL are named after their whole path
+    return f"{tmp_path.as_posix().lstrip('/')}/remote"
+
+
+def test_process__dry_run__diff_printed_and_repository_unchanged(tmp_path):
+    repo_path = tmp_path / "repo"
+    repo_path.mkdir()
+    (repo_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET)
+
+    result = CliRunner().invoke(
+        cli, ["process", str(changeset_path), str(repo_path), "--dry-run"]
+    )
+
+    assert result.exit_code == 0
+    assert "+pygitops==0.10.0\n" in result.output
+    assert (repo_path / SOME_FILE_NAME).read_text() == SOME_FILE_CONTENT
+
+
+def test_process__no_dry_run__changes_written(tmp_path):
+    repo_path = tmp_path / "repo"
+    repo_path.mkdir()
+    (repo_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET)
+
+    result = CliRunner().invoke(cli, ["process", str(changeset_path), str(repo_path)])
+
+    assert result.exit_code == 0
+    assert (repo_path / SOME_FILE_NAME).read_text() == "pygitops==0.10.0\n"
+
+
+def test_run__repositories_from_stdin__dry_run_diffs_printed(tmp_path):
+    remote = Repo.init(tmp_path / "remote.git", bare=True, initial_branch="main")
+    work = Repo.init(tmp_path / "work", initial_branch="main")
+    (tmp_path / "work" / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    work.index.add([SOME_FILE_NAME])
+    work.index.commit("initial commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+    work.create_remote("origin", remote.working_dir).push("main:main")
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        cli,
+        [
+            "run",
+            str(changeset_path),
+            "--repositories",
+            "-",
+            "--clone-dir",
+            str(tmp_path / "clones"),
+            "--threads",
+            "--dry-run",
+        ],
+        input=f"file://{tmp_path}/remote.git\n",
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert "+pygitops==0.10.0\n" in result.stdout
+    assert "remote: changed" in result.stderr
+
+
+def test_run__report_and_metrics_file__written_once_run_completes(tmp_path):
+    Repo.init(tmp_path / "remote.git", bare=True, initial_branch="main")
+    work = Repo.init(tmp_path / "work", initial_branch="main")
+    (tmp_path / "work" / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    work.index.add([SOME_FILE_NAME])
+    work.index.commit("initial commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+    work.create_remote("origin", str(tmp_path / "remote.git")).push("main:main")
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        cli,
+        [
+            "run",
+            str(changeset_path),
+            "--repository",
+            f"file://{tmp_path}/remote.git",
+            "--clone-dir",
+            str(tmp_path / "clones"),
+            "--threads",
+            "--dry-run",
+            "--metrics-file",
+            str(tmp_path / "gator.prom"),
+            "--report",
+            str(tmp_path / "report.json"),
+        ],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["repositories"][_remote_name(tmp_path)]["status"] == "changed"
+    assert report["slowest_repositories"][0]["seconds"] > 0
+    assert (tmp_path / "gator.prom").read_text().endswith("# EOF\n")
+
+
+def test_run__several_changesets__result_per_changeset_and_report(tmp_path):
+    Repo.init(tmp_path / "remote.git", bare=True, initial_branch="main")
+    work = Repo.init(tmp_path / "work", initial_branch="main")
+    (tmp_path / "work" / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    work.index.add([SOME_FILE_NAME])
+    work.index.commit("initial commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+    work.create_remote("origin", str(tmp_path / "remote.git")).push("main:main")
+    changeset_path = tmp_path / "changesets.yaml"
+    other_changeset = SOME_CHANGESET.replace("bump pygitops", "other bump").replace(
+        "0.10.0", "1.0.0"
+    )
+    changeset_path.write_text(f"{SOME_CHANGESET}---\n{other_changeset}")
+
+    result = CliRunner(mix_stderr=False).invoke(
+        cli,
+        [
+            "run",
+            str(changeset_path),
+            "--repository",
+            f"file://{tmp_path}/remote.git",
+            "--clone-dir",
+            str(tmp_path / "clones"),
+            "--threads",
+            "--dry-run",
+            "--report",
+            str(tmp_path / "report.json"),
+        ],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert "remote [bump pygitops]: changed" in result.stderr
+    assert "remote [other bump]: changed" in result.stderr
+    assert "+pygitops==0.10.0\n" in result.stdout
+    assert "+pygitops==1.0.0\n" in result.stdout
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["repositories"][_remote_name(tmp_path)]["status"] == {
+        "bump pygitops": "changed",
+        "other bump": "changed",
+    }
+
+
+def test_run__several_changesets_with_branch__usage_error(tmp_path):
+    changeset_path = tmp_path / "changesets.yaml"
+    other_changeset = SOME_CHANGESET.replace("bump pygitops", "other bump")
+    changeset_path.write_text(f"{SOME_CHANGESET}---\n{other_changeset}")
+
+    result = CliRunner().invoke(
+        cli,
+        [
+            "run",
+            str(changeset_path),
+            "--repository",
+            "some-org/some-repo",
+            "--branch",
+            "some-branch",
+        ],
+    )
+
+    assert result.exit_code == 2
+    assert "single changeset" in result.output
+
+
+def test_run__invalid_changeset__validation_error_reported(tmp_path):
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET.replace("replace_term", "replacement"))
+
+    result = CliRunner().invoke(
+        cli, ["run", str(changeset_path), "--repository", "some-org/some-repo"]
+    )
+
+    assert result.exit_code == 2
+    assert f"{changeset_path} is not a valid changeset" in result.output
+    assert "replace_term" in result.output
+
+
+def test_process__invalid_yaml__error_reported(tmp_path):
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text("kind: [Changeset\n")
+
+    result = CliRunner().invoke(cli, ["process", str(changeset_path), str(tmp_path)])
+
+    assert result.exit_code == 2
+    assert f"{changeset_path} is not a valid changeset" in result.output
+    assert "while parsing" in result.output
+
+
+def test_cli__imported__heavy_dependencies_not_imported():
+    # a fresh interpreter, since the tests import everything
+    imported = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, gator.__main__; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.split()
+
+    assert not {"git", "github", "pygitops", "yaml"} & set(imported)
+    assert not [m for m in imported if m.startswith("gator.resources.")]
+
+
+def test_run__no_repositories__usage_error(tmp_path):
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET)
+
+    result = CliRunner().invoke(cli, ["run", str(changeset_path)])
+
+    assert result.exit_code == 2
+
+
+def test_run__resume_dry_run__usage_error(tmp_path):
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET)
+
+    result = CliRunner().invoke(
+        cli,
+        [
+            "run",
+            str(changeset_path),
+            "--repository",
+            "some-org/some-repo",
+            "--resume",
+            "some-run",
+            "--dry-run",
+        ],
+    )
+
+    assert result.exit_code == 2
+
+
+def test_run__sparse_clone_strategy__only_changeset_paths_checked_out(tmp_path):
+    remote_path = tmp_path / "remote.git"
+    work_path = tmp_path / "work"
+    Repo.init(remote_path, bare=True, initial_branch="main")
+    work = Repo.init(work_path, initial_branch="main")
+    (work_path / "docs").mkdir()
+    (work_path / "docs" / "index.md").write_text("# docs\n")
+    (work_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    work.git.add("--all")
+    work.index.commit("initial commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+    work.create_remote("origin", str(remote_path)).push("main:main")
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        cli,
+        [
+            "run",
+            str(changeset_path),
+            "--repository",
+            f"file://{remote_path}",
+            "--clone-dir",
+            str(tmp_path / "clones"),
+            "--clone-strategy",
+            "shallow",
+            "--clone-strategy",
+            "sparse",
+            "--threads",
+            "--dry-run",
+        ],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    assert "+pygitops==0.10.0\n" in result.stdout
+    clone_path = tmp_path / "clones" / _remote_name(tmp_path)
+    assert (clone_path / SOME_FILE_NAME).exists()
+    assert not (clone_path / "docs").exists()
+
+
+def test_run__filter_cache__passed_to_pipeline_config(tmp_path, mocker):
+    init = mocker.spy(Pipeline, "__init__")
+    Repo.init(tmp_path / "remote.git", bare=True, initial_branch="main")
+    changeset_path = tmp_path / "changeset.yaml"
+    changeset_path.write_text(SOME_CHANGESET)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        cli,
+        [
+            "run",
+            str(changeset_path),
+            "--repository",
+            f"file://{tmp_path}/remote.git",
+            "--clone-dir",
+            str(tmp_path / "clones"),
+            "--threads",
+            "--dry-run",
+            "--filter-cache",
+            str(tmp_path / "filters.sqlite"),
+        ],
+    )
+
+    assert result.exit_code == 0, result.stderr
+    config = init.call_args.args[2]
+    assert str(config.filter_store_path) == str(tmp_path / "filters.sqlite")
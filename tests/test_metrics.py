@@ -0,0 +1,116 @@
+import json
+import threading
+
+from gator import metrics
+from gator.metrics import Metrics, MetricsFile, run_report
+
+
+def test_metrics_add__same_labels__summed():
+    m = Metrics()
+
+    m.add("files_walked", 2, stage="process")
+    m.add("files_walked", 3, stage="process")
+    m.add("files_walked", 4, stage="pre-process")
+
+    assert m.total("files_walked", stage="process") == 5
+    assert m.total("files_walked") == 9
+
+
+def test_metrics_merge__labels__added_to_every_sample():
+    m = Metrics()
+    other = Metrics()
+    other.add("bytes_read", 10)
+    other.add("regex_seconds", 0.5, pattern="a+")
+
+    m.merge(other.samples(), repository="org/repo")
+
+    assert m.total("bytes_read", repository="org/repo") == 10
+    assert m.total("regex_seconds", repository="org/repo", pattern="a+") == 0.5
+    assert m.total("bytes_read", repository="org/other") == 0
+
+
+def test_to_openmetrics__labels__counters_rendered_and_escaped():
+    m = Metrics()
+    m.add("files_written", 2)
+    m.add("regex_seconds", 1.5, pattern='say "hi"\\n')
+
+    assert m.to_openmetrics() == (
+        "# TYPE gator_files_written counter\n"
+        "gator_files_written_total 2.0\n"
+        "# TYPE gator_regex_seconds counter\n"
+        'gator_regex_seconds_total{pattern="say \\"hi\\"\\\\n"} 1.5\n'
+        "# EOF\n"
+    )
+
+
+def test_collecting__nested__recorded_into_innermost_only():
+    outer = Metrics()
+    inner = Metrics()
+
+    with metrics.collecting(outer):
+        metrics.add("files_walked")
+        with metrics.collecting(inner):
+            metrics.add("files_walked")
+        metrics.add("files_walked")
+
+    assert outer.total("files_walked") == 2
+    assert inner.total("files_walked") == 1
+
+
+def test_collecting__other_thread__not_collected():
+    collected = Metrics()
+
+    with metrics.collecting(collected):
+        thread = threading.Thread(target=metrics.add, args=("files_walked",))
+        thread.start()
+        thread.join()
+
+    assert collected.total("files_walked") == 0
+
+
+def test_timed__context__wall_and_cpu_seconds_recorded():
+    collected = Metrics()
+
+    with metrics.collecting(collected), metrics.timed("stage", stage="process"):
+        sum(range(10_000))
+
+    assert collected.total("stage_seconds", stage="process") > 0
+    assert collected.total("stage_cpu_seconds", stage="process") >= 0
+
+
+def test_metrics_file__within_interval__not_rewritten(tmp_path):
+    metrics_file = MetricsFile(tmp_path / "gator.prom", interval_seconds=3600)
+    m = Metrics()
+    m.add("files_walked")
+    metrics_file.update(m)
+    m.add("files_walked")
+
+    metrics_file.update(m)
+    unforced = metrics_file.path.read_text()
+    metrics_file.update(m, force=True)
+
+    assert "gator_files_walked_total 1.0" in unforced
+    assert "gator_files_walked_total 2.0" in metrics_file.path.read_text()
+
+
+def test_run_report__repositories__totals_and_slowest_listed():
+    m = Metrics()
+    m.add("stage_seconds", 1, repository="org/fast", stage="process")
+    m.add("stage_seconds", 5, repository="org/slow", stage="process")
+    m.add("stage_seconds", 2, repository="org/slow", stage="post-process")
+    m.add("regex_seconds", 3, repository="org/slow", pattern="a+")
+    m.add("regex_seconds", 1, repository="org/fast", pattern="a+")
+    m.add("github_api_calls", 4, write="false")
+
+    report = run_report(m, {"org/fast": "unchanged", "org/slow": "pushed"}, top=1)
+
+    assert report["totals"]["stage_seconds"] == 8
+    assert report["totals"]["github_api_calls"] == 4
+    assert report["repositories"]["org/slow"] == {
+        "status": "pushed",
+        "stage_seconds": 7,
+        "regex_seconds": 3,
+    }
+    assert report["slowest_repositories"] == [{"repository": "org/slow", "seconds": 7}]
+    assert report["slowest_patterns"] == [{"pattern": "a+", "seconds": 4}]
+    json.dumps(report)
@@ -0,0 +1,318 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from git import Actor, Repo
+from github import GithubException
+
+from gator.post_process import PullRequestOpener, postprocess_repository
+from gator.rate_limit import RateLimiter
+
+SOME_TOKEN = "some-token"
+SOME_FULL_NAME = "some-org/some-repo"
+PULLS_PATH = f"/repos/{SOME_FULL_NAME}/pulls"
+SOME_ACTOR = Actor("some-name", "some-email@example.com")
+SOME_BRANCH_NAME = "gator/some-branch"
+SOME_FILES = {
+    "requirements.txt": "pygitops==0.9.0\n",
+    "app/old.txt": "some old content\n",
+    "run.sh": "#!/bin/sh\n",
+    ".gitignore": "*.log\n",
+}
+# a code change's writes, relative to the clone, and the content written; None removes
+SOME_CHANGES = {
+    "requirements.txt": "pygitops==0.10.0\n",
+    "app/old.txt": None,
+    "new/dir/new.txt": "some new content\n",
+    "debug.log": "ignored\n",
+}
+
+
+class _StubGitHub(ThreadingHTTPServer):
+    """
+    A local stand-in for the pull request endpoints of the GitHub API.
+
+    :param pulls: The open pull requests, returned by lookups.
+    :param create_responses: (status, headers, body) of successive pull request
+        creations; the last one is repeated.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.pulls = []
+        self.create_responses = [(201, {}, {"number": 1})]
+        self.requests = []
+        self.rate_limit_remaining = 4999
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: _StubGitHub
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, status, headers, body):
+        content = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("X-RateLimit-Limit", "5000")
+        self.send_header("X-RateLimit-Remaining", str(self.server.rate_limit_remaining))
+        self.send_header("X-RateLimit-Reset", "0")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, dict(self.headers)))
+        etag = f'"pulls-{len(self.server.pulls)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._respond(304, {"ETag": etag}, None)
+        else:
+            self._respond(200, {"ETag": etag}, self.server.pulls)
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = json.loads(self.rfile.read(length))
+        self.server.requests.append(("POST", self.path, body))
+        responses = self.server.create_responses
+        self._respond(*(responses.pop(0) if len(responses) > 1 else responses[0]))
+
+
+@pytest.fixture
+def stub():
+    server = _StubGitHub()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def opener(stub):
+    return PullRequestOpener(
+        SOME_TOKEN,
+        rate_limiter=RateLimiter(writes_per_second=1000, backoff_seconds=0.01),
+        api_url=stub.url,
+    )
+
+
+def _open_pull_request(opener):
+    opener.open_pull_request(
+        SOME_FULL_NAME, head="some-branch", base="main", title="title", body="body"
+    )
+
+
+def _requests(stub, method):
+    return [request for request in stub.requests if request[0] == method]
+
+
+def test_pull_request_opener__enterprise_domain__enterprise_api_used(mocker):
+    github = mocker.patch("gator.post_process.Github")
+    repo = github.return_value.get_repo.return_value
+    repo._requester.rate_limiting = (-1, -1)
+    repo._requester.requestJsonAndCheck.return_value = ({}, [])
+
+    _open_pull_request(PullRequestOpener(SOME_TOKEN, "github.example.com"))
+
+    github.assert_called_once_with(
+        SOME_TOKEN, base_url="https://github.example.com/api/v3"
+    )
+
+
+def test_open_pull_request__new_branch__pull_request_created(stub, opener):
+    _open_pull_request(opener)
+
+    lookup = _requests(stub, "GET")[0]
+    assert lookup[1] == f"{PULLS_PATH}?head=some-org%3Asome-branch&state=open"
+    assert _requests(stub, "POST") == [
+        (
+            "POST",
+            PULLS_PATH,
+            {
+                "title": "title",
+                "body": "body",
+                "head": "some-branch",
+                "base": "main",
+                "draft": False,
+            },
+        )
+    ]
+
+
+def test_open_pull_request__already_open__nothing_created(stub, opener):
+    stub.pulls = [{"number": 1}]
+
+    _open_pull_request(opener)
+
+    assert _requests(stub, "POST") == []
+
+
+def test_open_pull_request__opened_since_lookup__error_ignored(stub, opener):
+    stub.create_responses = [(422, {}, {"message": "A pull request already exists"})]
+
+    _open_pull_request(opener)
+
+
+def test_open_pull_request__other_error__raised(stub, opener):
+    stub.create_responses = [(404, {}, {"message": "Not Found"})]
+
+    with pytest.raises(GithubException):
+        _open_pull_request(opener)
+
+
+def test_open_pull_request__secondary_rate_limit__retried_after_retry_after(
+    stub, opener
+):
+    stub.create_responses = [
+        (
+            403,
+            {"Retry-After": "0"},
+            {"message": "You have exceeded a secondary rate limit"},
+        ),
+        (201, {}, {"number": 1}),
+    ]
+
+    _open_pull_request(opener)
+
+    assert len(_requests(stub, "POST")) == 2
+
+
+def test_open_pull_request__server_error__retried(stub, opener):
+    stub.create_responses = [(502, {}, {"message": "Bad Gateway"}), (201, {}, {})]
+
+    _open_pull_request(opener)
+
+    assert len(_requests(stub, "POST")) == 2
+
+
+def test_find_pull_request__unchanged__conditional_request_answered_from_cache(
+    stub, opener
+):
+    stub.pulls = [{"number": 1}]
+
+    first = opener.find_pull_request(SOME_FULL_NAME, "some-branch")
+    second = opener.find_pull_request(SOME_FULL_NAME, "some-branch")
+
+    assert first == second == {"number": 1}
+    lookups = _requests(stub, "GET")
+    assert "If-None-Match" not in lookups[0][2]
+    assert lookups[1][2]["If-None-Match"] == '"pulls-1"'
+
+
+def test_open_pull_request__primary_limit_exhausted__later_requests_paused(
+    stub, opener, mocker
+):
+    stub.rate_limit_remaining = 0
+    pause_until = mocker.spy(opener.rate_limiter, "pause_until")
+
+    _open_pull_request(opener)
+
+    pause_until.assert_called_with(0)
+
+
+def test_open_pull_request__many_threads__each_thread_has_own_client(stub, opener):
+    threads = [
+        threading.Thread(target=_open_pull_request, args=(opener,)) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(_requests(stub, "POST")) == 4
+
+
+def _clone(tmp_path, name):
+    """Clone a remote with some committed files, creating the remote on first use."""
+    remote_path = tmp_path / "remote.git"
+    if not remote_path.exists():
+        work = Repo.init(tmp_path / "work", initial_branch="main")
+        for path, content in SOME_FILES.items():
+            (tmp_path / "work" / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / "work" / path).write_text(content)
+        os.chmod(tmp_path / "work" / "run.sh", 0o755)
+        work.git.add("--all")
+        work.index.commit("initial commit", author=SOME_ACTOR, committer=SOME_ACTOR)
+        Repo.clone_from(tmp_path / "work", remote_path, bare=True)
+    Repo.clone_from(remote_path, tmp_path / name)
+    return tmp_path / name
+
+
+def _make_changes(repo_path):
+    for path, content in SOME_CHANGES.items():
+        if content is None:
+            (repo_path / path).unlink()
+        else:
+            (repo_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (repo_path / path).write_text(content)
+    os.chmod(repo_path / "run.sh", 0o644)
+    return sorted([*SOME_CHANGES, "run.sh"])
+
+
+def _pushed_tree(tmp_path):
+    return Repo(tmp_path / "remote.git").commit(SOME_BRANCH_NAME).tree.hexsha
+
+
+def test_postprocess_repository__changed_paths__same_tree_as_status_scan(tmp_path):
+    scanned = _clone(tmp_path, "scanned")
+    _make_changes(scanned)
+    postprocess_repository(scanned, SOME_BRANCH_NAME, "message", SOME_ACTOR)
+    expected = _pushed_tree(tmp_path)
+
+    tracked = _clone(tmp_path, "tracked")
+    changed_paths = _make_changes(tracked)
+    base = postprocess_repository(
+        tracked, SOME_BRANCH_NAME, "message", SOME_ACTOR, changed_paths
+    )
+
+    assert base == "main"
+    assert _pushed_tree(tmp_path) == expected
+
+
+def test_postprocess_repository__changed_paths__working_tree_not_scanned(
+    tmp_path, mocker
+):
+    repo_path = _clone(tmp_path, "clone")
+    changed_paths = _make_changes(repo_path)
+    is_dirty = mocker.spy(Repo, "is_dirty")
+
+    postprocess_repository(
+        repo_path, SOME_BRANCH_NAME, "message", SOME_ACTOR, changed_paths
+    )
+
+    is_dirty.assert_not_called()
+
+
+def test_postprocess_repository__changed_paths__clone_restored(tmp_path):
+    repo_path = _clone(tmp_path, "clone")
+    changed_paths = _make_changes(repo_path)
+
+    postprocess_repository(
+        repo_path, SOME_BRANCH_NAME, "message", SOME_ACTOR, changed_paths
+    )
+
+    repo = Repo(repo_path)
+    assert repo.active_branch.name == "main"
+    assert SOME_BRANCH_NAME not in repo.heads
+    assert repo.untracked_files == []
+    assert not repo.is_dirty()
+    assert not (repo_path / "new").exists()
+
+
+def test_postprocess_repository__content_unchanged__nothing_pushed(tmp_path):
+    repo_path = _clone(tmp_path, "clone")
+    (repo_path / "requirements.txt").write_text(SOME_FILES["requirements.txt"])
+
+    base = postprocess_repository(
+        repo_path, SOME_BRANCH_NAME, "message", SOME_ACTOR, ["requirements.txt"]
+    )
+
+    assert base is None
+    assert SOME_BRANCH_NAME not in Repo(tmp_path / "remote.git").heads
@@ -0,0 +1,189 @@
+import pytest
+from git import Actor, Repo
+
+from gator.pre_process import CloneStrategy, clone_repository, sparse_checkout_cone
+from gator.resources.build import build_changeset_plan, build_gator_resource
+from gator.resources.plan import ChangesetPlan
+
+SOME_ACTOR = Actor("some-name", "some-email@example.com")
+SOME_FILES = {
+    "requirements.txt": "pygitops==0.9.0\n",
+    "definitions/application_spec.yml": "name: some-app\n",
+    "definitions/nested/other.yml": "name: other\n",
+    "src/app.py": "print('hello')\n",
+    "docs/index.md": "# docs\n",
+}
+
+SOME_CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: some changeset
+  filters:
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: 'some-app'
+        paths:
+          - definitions/application_spec.yml
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: 'hello'
+        paths:
+          - ./src/**/*.py
+  code_changes:
+    - kind: NewFileCodeChange
+      version: v1alpha
+      spec:
+        files:
+          - file_path: new/dir/file.txt
+            file_content: some content
+    - kind: RemoveFileCodeChange
+      version: v1alpha
+      spec:
+        files:
+          - definitions/application_spec.yml
+"""
+
+
+@pytest.fixture
+def remote_url(tmp_path):
+    """A bare repository with two commits, which serves partial clones."""
+    remote = Repo.init(tmp_path / "remote.git", bare=True, initial_branch="main")
+    remote.git.config("uploadpack.allowFilter", "true")
+    work_path = tmp_path / "work"
+    work = Repo.init(work_path, initial_branch="main")
+    for message in ("initial commit", "second commit"):
+        for name, content in SOME_FILES.items():
+            (work_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (work_path / name).write_text(f"{content}{message}\n")
+        work.git.add("--all")
+        work.index.commit(message, author=SOME_ACTOR, committer=SOME_ACTOR)
+    work.create_remote("origin", remote.git_dir).push("main:main")
+    return f"file://{tmp_path / 'remote.git'}"
+
+
+def _checked_out(clone_path):
+    return {
+        str(path.relative_to(clone_path))
+        for path in clone_path.rglob("*")
+        if path.is_file() and ".git" not in path.relative_to(clone_path).parts
+    }
+
+
+def _missing_objects(repo):
+    objects = repo.git.rev_list("--objects", "--all", "--missing=print").splitlines()
+    return [line for line in objects if line.startswith("?")]
+
+
+def test_clone_repository__default_strategy__full_clone(tmp_path, remote_url):
+    clone_path = clone_repository(remote_url, tmp_path / "clone")
+
+    repo = Repo(clone_path)
+    assert _checked_out(clone_path) == set(SOME_FILES)
+    assert repo.git.rev_list("--count", "HEAD") == "2"
+    assert not _missing_objects(repo)
+
+
+def test_clone_repository__shallow__only_latest_commit(tmp_path, remote_url):
+    clone_path = clone_repository(
+        remote_url, tmp_path / "clone", CloneStrategy(shallow=True)
+    )
+
+    assert Repo(clone_path).git.rev_list("--count", "HEAD") == "1"
+    assert _checked_out(clone_path) == set(SOME_FILES)
+
+
+def test_clone_repository__blobless_sparse__only_cone_blobs_fetched(
+    tmp_path, remote_url
+):
+    strategy = CloneStrategy(
+        blobless=True, sparse_directories=["definitions", "new/dir/file.txt"]
+    )
+
+    clone_path = clone_repository(remote_url, tmp_path / "clone", strategy)
+
+    assert _checked_out(clone_path) == {
+        "requirements.txt",
+        "definitions/application_spec.yml",
+        "definitions/nested/other.yml",
+    }
+    # blobs of the first commit, and outside the cone, were never fetched
+    assert len(_missing_objects(Repo(clone_path))) == len(SOME_FILES) + 2
+
+
+def test_clone_repository__sparse_file_path__parent_directory_checked_out(
+    tmp_path, remote_url
+):
+    strategy = CloneStrategy(sparse_directories=["definitions/nested/other.yml"])
+
+    clone_path = clone_repository(remote_url, tmp_path / "clone", strategy)
+
+    assert _checked_out(clone_path) == {
+        "requirements.txt",
+        "definitions/application_spec.yml",
+        "definitions/nested/other.yml",
+    }
+
+
+def test_clone_repository__existing_clone__sparse_directories_replaced(
+    tmp_path, remote_url
+):
+    clone_repository(
+        remote_url, tmp_path / "clone", CloneStrategy(sparse_directories=["src"])
+    )
+
+    clone_path = clone_repository(
+        remote_url, tmp_path / "clone", CloneStrategy(sparse_directories=["docs"])
+    )
+
+    assert _checked_out(clone_path) == {"requirements.txt", "docs/index.md"}
+
+
+def test_clone_repository__existing_sparse_clone_full_strategy__sparse_disabled(
+    tmp_path, remote_url
+):
+    clone_repository(
+        remote_url, tmp_path / "clone", CloneStrategy(sparse_directories=["src"])
+    )
+
+    clone_path = clone_repository(remote_url, tmp_path / "clone")
+
+    assert _checked_out(clone_path) == set(SOME_FILES)
+
+
+def test_sparse_checkout_cone__changeset_paths__literal_roots_used():
+    plan = build_changeset_plan(SOME_CHANGESET)
+
+    assert sparse_checkout_cone(plan) == [
+        "definitions/application_spec.yml",
+        "src",
+        "new/dir/file.txt",
+    ]
+
+
+@pytest.mark.parametrize("path", [".", "./", "**/requirements.txt", "*.yml"])
+def test_sparse_checkout_cone__path_at_root__none(path):
+    regex_filter = build_gator_resource(
+        {
+            "kind": "RegexFilter",
+            "version": "v1alpha",
+            "spec": {"regex": "some", "paths": ["definitions", path]},
+        }
+    )
+
+    assert sparse_checkout_cone(ChangesetPlan("some", [regex_filter])) is None
+
+
+def test_sparse_checkout_cone__resource_without_paths__none(mocker):
+    regex_filter = build_gator_resource(
+        {
+            "kind": "RegexFilter",
+            "version": "v1alpha",
+            "spec": {"regex": "some", "paths": ["definitions"]},
+        }
+    )
+    mocker.patch.object(type(regex_filter), "touched_paths", return_value=None)
+
+    assert sparse_checkout_cone(ChangesetPlan("some", [regex_filter])) is None
@@ -0,0 +1,218 @@
+from pathlib import Path
+
+from gator.process import (
+    apply_changeset,
+    changesets_match,
+    preview_repository,
+    process_repository,
+)
+from gator.resources.build import (
+    CodeChangeResource,
+    build_changeset,
+    register_custom_resource,
+)
+from gator.resources.models import BaseModelForbidExtra
+
+SOME_FILE_NAME = "requirements.txt"
+SOME_FILE_CONTENT = "pygitops==0.9.0\n"
+
+MATCHING_CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: bump pygitops
+  filters:
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: 'pygitops'
+        paths:
+          - requirements.txt
+  code_changes:
+    - kind: RegexReplaceCodeChange
+      version: v1alpha
+      spec:
+        replacement_details:
+          - regex: '0\\.9\\.0'
+            replace_term: "0.10.0"
+            paths:
+              - requirements.txt
+"""
+
+NON_MATCHING_CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: bump pygitops
+  filters:
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: 'some-other-package'
+        paths:
+          - requirements.txt
+  code_changes:
+    - kind: RemoveFileCodeChange
+      version: v1alpha
+      spec:
+        files:
+          - requirements.txt
+"""
+
+APPEND_THEN_REPLACE_CHANGESET = """
+kind: Changeset
+version: v1alpha
+spec:
+  name: custom resource followed by built-in resource
+  filters:
+    - kind: RegexFilter
+      version: v1alpha
+      spec:
+        regex: 'pygitops'
+        paths:
+          - requirements.txt
+  code_changes:
+    - kind: AppendLineCodeChange
+      version: v1alpha
+      spec:
+        file_path: requirements.txt
+        line: "pyyaml==5.4.1"
+    - kind: RegexReplaceCodeChange
+      version: v1alpha
+      spec:
+        replacement_details:
+          - regex: '5\\.4\\.1'
+            replace_term: "6.0"
+            paths:
+              - requirements.txt
+"""
+
+
+class AppendLineSpec(BaseModelForbidExtra):
+    file_path: str
+    line: str
+
+
+class AppendLineCodeChange(CodeChangeResource):
+    """Custom code change that writes to disk without going through the index."""
+
+    kind = "AppendLineCodeChange"
+    version = "v1alpha"
+    spec: AppendLineSpec
+
+    def make_code_changes(self, repo_path: Path) -> None:
+        with open(repo_path / self.spec.file_path, "a") as f:
+            f.write(f"{self.spec.line}\n")
+
+
+def test_process_repository__filters_match__code_changes_applied(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    assert process_repository(build_changeset(MATCHING_CHANGESET), tmp_path) is True
+    assert (tmp_path / SOME_FILE_NAME).read_text() == "pygitops==0.10.0\n"
+
+
+def test_process_repository__filters_do_not_match__code_changes_not_applied(
+    tmp_path,
+):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    assert (
+        process_repository(build_changeset(NON_MATCHING_CHANGESET), tmp_path) is False
+    )
+    assert (tmp_path / SOME_FILE_NAME).read_text() == SOME_FILE_CONTENT
+
+
+def test_process_repository__custom_code_change_writes_to_disk__later_changes_see_write(
+    tmp_path,
+):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    register_custom_resource(AppendLineCodeChange)
+
+    process_repository(build_changeset(APPEND_THEN_REPLACE_CHANGESET), tmp_path)
+
+    assert (tmp_path / SOME_FILE_NAME).read_text() == "pygitops==0.9.0\npyyaml==6.0\n"
+
+
+def test_changesets_match__several_changesets__each_result_reported(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    changesets = [
+        build_changeset(NON_MATCHING_CHANGESET),
+        build_changeset(MATCHING_CHANGESET),
+    ]
+
+    assert changesets_match(changesets, tmp_path) == [False, True]
+    assert (tmp_path / SOME_FILE_NAME).read_text() == SOME_FILE_CONTENT
+
+
+def test_apply_changeset__skip_filters__code_changes_applied(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    result = apply_changeset(
+        build_changeset(NON_MATCHING_CHANGESET), tmp_path, skip_filters=True
+    )
+
+    assert result.matched is True
+    assert not (tmp_path / SOME_FILE_NAME).exists()
+
+
+def test_apply_changeset__filters_match__changed_paths_returned(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    result = apply_changeset(build_changeset(MATCHING_CHANGESET), tmp_path)
+
+    assert result.matched is True
+    assert result.changed_paths == [SOME_FILE_NAME]
+
+
+def test_apply_changeset__custom_code_change_writes_to_disk__changed_paths_unknown(
+    tmp_path,
+):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    register_custom_resource(AppendLineCodeChange)
+
+    result = apply_changeset(build_changeset(APPEND_THEN_REPLACE_CHANGESET), tmp_path)
+
+    assert result.changed_paths is None
+
+
+def test_preview_repository__filters_match__diff_returned_and_disk_unchanged(
+    tmp_path,
+):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    diff = preview_repository(build_changeset(MATCHING_CHANGESET), tmp_path)
+
+    assert diff == (
+        f"--- a/{SOME_FILE_NAME}\n"
+        f"+++ b/{SOME_FILE_NAME}\n"
+        "@@ -1 +1 @@\n"
+        "-pygitops==0.9.0\n"
+        "+pygitops==0.10.0\n"
+    )
+    assert (tmp_path / SOME_FILE_NAME).read_text() == SOME_FILE_CONTENT
+
+
+def test_preview_repository__filters_do_not_match__none_returned(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+
+    assert preview_repository(build_changeset(NON_MATCHING_CHANGESET), tmp_path) is None
+
+
+def test_preview_repository__then_process__clone_reused_without_reset(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    changeset = build_changeset(MATCHING_CHANGESET)
+
+    preview_repository(changeset, tmp_path)
+
+    assert process_repository(changeset, tmp_path) is True
+    assert (tmp_path / SOME_FILE_NAME).read_text() == "pygitops==0.10.0\n"
+
+
+def test_preview_repository__custom_code_change_writes_to_disk__skipped(tmp_path):
+    (tmp_path / SOME_FILE_NAME).write_text(SOME_FILE_CONTENT)
+    register_custom_resource(AppendLineCodeChange)
+
+    preview_repository(build_changeset(APPEND_THEN_REPLACE_CHANGESET), tmp_path)
+
+    assert (tmp_path / SOME_FILE_NAME).read_text() == SOME_FILE_CONTENT
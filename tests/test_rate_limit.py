@@ -0,0 +1,128 @@
+import pytest
+from github import GithubException, RateLimitExceededException
+
+from gator import rate_limit
+from gator.rate_limit import SECONDARY_LIMIT_WAIT_SECONDS, RateLimiter, TokenBucket
+
+SOME_NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def clock(mocker):
+    """Freeze the wall and monotonic clocks, and make sleeping advance them."""
+    now = {"time": SOME_NOW}
+
+    def sleep(seconds):
+        now["time"] += seconds
+
+    mocker.patch.object(rate_limit.time, "time", side_effect=lambda: now["time"])
+    mocker.patch.object(rate_limit.time, "monotonic", side_effect=lambda: now["time"])
+    mocker.patch.object(rate_limit.time, "sleep", side_effect=sleep)
+    mocker.patch.object(rate_limit.random, "uniform", return_value=0.0)
+    return now
+
+
+def _unknown_limits():
+    return -1, 0.0
+
+
+def test_token_bucket__burst_used_up__waits_for_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    delays = [bucket.reserve() for _ in range(4)]
+
+    assert delays == [0.0, 0.0, 0.5, 1.0]
+
+
+def test_token_bucket__idle__refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.reserve()
+    bucket.reserve()
+
+    clock["time"] += 60
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 1.0]
+
+
+def test_token_bucket__invalid_rate__raises_value_error():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (GithubException(403, {}, {"retry-after": "30"}), 30),
+        (
+            GithubException(
+                403, {"message": "You have exceeded a secondary rate limit"}, {}
+            ),
+            SECONDARY_LIMIT_WAIT_SECONDS,
+        ),
+        (
+            RateLimitExceededException(
+                403, {}, {"x-ratelimit-reset": str(int(SOME_NOW) + 120)}
+            ),
+            120,
+        ),
+        (GithubException(429, {}, {"x-ratelimit-remaining": "0"}), 0),
+        (GithubException(502, {}, {}), 0),
+        (GithubException(403, {"message": "Forbidden"}, {}), None),
+        (GithubException(404, {}, {}), None),
+    ],
+)
+def test_retry_delay__errors__delay_from_headers(clock, error, expected):
+    assert RateLimiter().retry_delay(error, attempt=1) == expected
+
+
+def test_retry_delay__later_attempts__backoff_grows(mocker):
+    uniform = mocker.patch.object(rate_limit.random, "uniform", return_value=1.0)
+
+    RateLimiter(backoff_seconds=2).retry_delay(GithubException(502, {}, {}), 3)
+
+    uniform.assert_called_once_with(0, 8)
+
+
+def test_call__throttled__every_request_paused_until_retry_after(clock):
+    limiter = RateLimiter()
+    responses = [GithubException(429, {}, {"retry-after": "10"}), "some-result"]
+
+    def request():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert limiter.call(request, _unknown_limits) == "some-result"
+    assert clock["time"] == SOME_NOW + 10
+
+
+def test_call__attempts_exhausted__error_raised(clock):
+    limiter = RateLimiter(max_attempts=2)
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise GithubException(502, {}, {})
+
+    with pytest.raises(GithubException):
+        limiter.call(request, _unknown_limits)
+    assert len(calls) == 2
+
+
+def test_call__primary_limit_exhausted__next_request_waits_for_reset(clock):
+    limiter = RateLimiter()
+
+    limiter.call(lambda: None, lambda: (0, SOME_NOW + 300))
+    limiter.call(lambda: None, _unknown_limits)
+
+    assert clock["time"] == SOME_NOW + 300
+
+
+def test_call__writes__paced_by_token_bucket(clock):
+    limiter = RateLimiter(writes_per_second=0.5)
+
+    for _ in range(3):
+        limiter.call(lambda: None, _unknown_limits, write=True)
+
+    assert clock["time"] == SOME_NOW + 4
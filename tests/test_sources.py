@@ -0,0 +1,225 @@
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from gator.rate_limit import RateLimiter
+from gator.sources import (
+    GitHubClient,
+    GitHubOrgRepositories,
+    GitHubSearchRepositories,
+    ListedRepositories,
+    ResponseCache,
+    iter_targets,
+)
+
+SOME_ORG = "some-org"
+SOME_TOKEN = "some-token"
+PAGE_SIZE = 2
+
+
+def _repository(name, topics=(), archived=False):
+    return {
+        "full_name": f"{SOME_ORG}/{name}",
+        "topics": list(topics),
+        "archived": archived,
+    }
+
+
+SOME_REPOSITORIES = [
+    _repository("repo-1", ["python"]),
+    _repository("repo-2"),
+    _repository("repo-3", ["python", "service"]),
+    _repository("repo-4", ["python"], archived=True),
+    _repository("repo-5", ["python"]),
+]
+
+
+class _StubGitHub(ThreadingHTTPServer):
+    """
+    A local stand-in for the repository listing endpoints of the GitHub API.
+
+    Listings are served `PAGE_SIZE` repositories per page, with an ETag per page.
+    :param repositories: The repositories of `SOME_ORG`, also returned by searches.
+    :param release_pages: Pages after the first are held until this is set.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.repositories = SOME_REPOSITORIES
+        self.release_pages = threading.Event()
+        self.release_pages.set()
+        self.requests = []
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: _StubGitHub
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, status, headers, body):
+        content = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        self.server.requests.append((url.path, query, dict(self.headers)))
+        page = int(query["page"])
+        if page > 1:
+            self.server.release_pages.wait()
+
+        repositories = self.server.repositories
+        last_page = max(1, -(-len(repositories) // PAGE_SIZE))
+        items = repositories[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]
+        headers = {
+            "ETag": f'"page-{page}-{len(repositories)}"',
+            "Link": f'<{self.server.url}{url.path}?page={last_page}>; rel="last"',
+        }
+        if self.headers.get("If-None-Match") == headers["ETag"]:
+            self._respond(304, headers, None)
+        elif url.path == "/search/repositories":
+            self._respond(200, headers, {"incomplete_results": False, "items": items})
+        else:
+            self._respond(200, headers, items)
+
+
+@pytest.fixture
+def stub():
+    server = _StubGitHub()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.release_pages.set()
+    server.shutdown()
+    server.server_close()
+
+
+def _client(stub, **kwargs):
+    return GitHubClient(
+        SOME_TOKEN,
+        rate_limiter=RateLimiter(backoff_seconds=0.01),
+        api_url=stub.url,
+        **kwargs,
+    )
+
+
+def _names(targets):
+    return [target.name for target in targets]
+
+
+def test_org_repositories__several_pages__every_open_repository_in_order(stub):
+    source = GitHubOrgRepositories(_client(stub), SOME_ORG)
+
+    assert _names(source) == [
+        f"{SOME_ORG}/repo-1",
+        f"{SOME_ORG}/repo-2",
+        f"{SOME_ORG}/repo-3",
+        f"{SOME_ORG}/repo-5",
+    ]
+    assert sorted(int(request[1]["page"]) for request in stub.requests) == [1, 2, 3]
+
+
+def test_org_repositories__topics__only_repositories_with_every_topic(stub):
+    source = GitHubOrgRepositories(_client(stub), SOME_ORG, ["python", "service"])
+
+    assert _names(source) == [f"{SOME_ORG}/repo-3"]
+
+
+def test_org_repositories__targets__github_clone_urls(stub):
+    target = next(iter(GitHubOrgRepositories(_client(stub), SOME_ORG)))
+
+    assert target.github_full_name == f"{SOME_ORG}/repo-1"
+    assert target.url == f"https://github.com/{SOME_ORG}/repo-1.git"
+
+
+def test_org_repositories__later_pages_pending__first_repositories_streamed(stub):
+    stub.release_pages.clear()
+    targets = GitHubOrgRepositories(_client(stub), SOME_ORG).targets()
+
+    first = next(targets)
+    stub.release_pages.set()
+
+    assert first.name == f"{SOME_ORG}/repo-1"
+    assert len(_names(targets)) == 3
+
+
+def test_org_repositories__consumer_stops_early__listing_closed(stub):
+    stub.repositories = [_repository(f"repo-{i}") for i in range(40)]
+    targets = GitHubOrgRepositories(_client(stub, page_workers=2), SOME_ORG).targets()
+
+    next(targets)
+    targets.close()
+
+    assert len(stub.requests) <= 1 + 2 * 2
+
+
+def test_org_repositories__consumer_stops_early__pending_pages_cancelled(stub, mocker):
+    # `shutdown(cancel_futures=True)` is not available on Python 3.8
+    shutdown = mocker.spy(ThreadPoolExecutor, "shutdown")
+    cancel = mocker.spy(Future, "cancel")
+    stub.repositories = [_repository(f"repo-{i}") for i in range(40)]
+    targets = GitHubOrgRepositories(_client(stub, page_workers=2), SOME_ORG).targets()
+
+    # into the second page, once later pages are being fetched
+    for _ in range(PAGE_SIZE + 1):
+        next(targets)
+    targets.close()
+
+    assert cancel.call_count == 2 * 2
+    shutdown.assert_called_once_with(mocker.ANY, wait=True)
+
+
+def test_org_repositories__cached__pages_revalidated_with_etags(stub, tmp_path):
+    first_run = ResponseCache(tmp_path / "cache")
+    expected = _names(GitHubOrgRepositories(_client(stub, cache=first_run), SOME_ORG))
+    stub.requests.clear()
+
+    second_run = ResponseCache(tmp_path / "cache")
+    names = _names(GitHubOrgRepositories(_client(stub, cache=second_run), SOME_ORG))
+
+    assert names == expected
+    assert all("If-None-Match" in request[2] for request in stub.requests)
+
+
+def test_response_cache__corrupt_entry__treated_as_missing(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("some-key", {"etag": "some-etag"})
+    next(tmp_path.glob("*.json")).write_text("{")
+
+    assert cache.get("some-key") is None
+
+
+def test_search_repositories__query__results_listed(stub):
+    source = GitHubSearchRepositories(_client(stub), f"org:{SOME_ORG} topic:python")
+
+    assert len(_names(source)) == 4
+    assert stub.requests[0][0] == "/search/repositories"
+    assert stub.requests[0][1]["q"] == f"org:{SOME_ORG} topic:python"
+
+
+def test_iter_targets__overlapping_sources__each_repository_once(stub):
+    sources = [
+        ListedRepositories([f"{SOME_ORG}/repo-2", "other-org/repo"]),
+        GitHubOrgRepositories(_client(stub), SOME_ORG),
+    ]
+
+    assert _names(iter_targets(sources)) == [
+        f"{SOME_ORG}/repo-2",
+        "other-org/repo",
+        f"{SOME_ORG}/repo-1",
+        f"{SOME_ORG}/repo-3",
+        f"{SOME_ORG}/repo-5",
+    ]